@@ -5,23 +5,129 @@ Converts Claude's export format to the unified conversation format
 used by this tool for HTML generation.
 """
 
-import json
+import calendar
+import functools
+import itertools
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
 
+from .utils import load_json, iter_json_array, extract_zip, default_jobs
+
+# Shared read-only sub-dicts for converted messages. Every message of a large
+# export would otherwise allocate its own identical copies; nothing downstream
+# mutates them.
+_AUTHOR_USER = {"role": "user"}
+_AUTHOR_ASSISTANT = {"role": "assistant"}
+_CONTENT_EMPTY = {"content_type": "text", "parts": []}
+
+# Last "YYYY-MM-DDTHH:MM:SS" prefix seen by _parse_iso_fast and its epoch
+# seconds; consecutive messages are often stamped within the same second.
+_last_second = (None, 0)
+
+
+def _store_last_second(key, seconds):
+    global _last_second
+    _last_second = (key, seconds)
+
+
+def _parse_iso_fast(iso_string):
+    """
+    Parse a UTC timestamp of the shape Claude exports use,
+    ``YYYY-MM-DDTHH:MM:SS[.ffffff](Z|+00:00)``, to a Unix timestamp.
+
+    Returns the same value as ``datetime.fromisoformat(...).timestamp()``
+    without building datetime objects, or None when the string has any other
+    shape so the caller can fall back to the general parser.
+    """
+    s = iso_string
+    if (
+        len(s) < 20
+        or s[4] != "-"
+        or s[7] != "-"
+        or s[10] != "T"
+        or s[13] != ":"
+        or s[16] != ":"
+    ):
+        return None
+
+    if s.endswith("Z"):
+        end = len(s) - 1
+    elif s.endswith("+00:00"):
+        end = len(s) - 6
+    else:
+        return None
+
+    if end == 19:
+        micros = 0
+    elif s[19] == "." and 21 <= end <= 26 and s[20:end].isdigit():
+        micros = int(s[20:end].ljust(6, "0"))
+    else:
+        return None
+
+    key = s[:19]
+    # Read the cached pair once: it is rebound as a whole, so another thread
+    # can never observe a new key with stale seconds.
+    cached = _last_second
+    if cached[0] == key:
+        seconds = cached[1]
+    else:
+        if not (
+            key[0:4].isdigit()
+            and key[5:7].isdigit()
+            and key[8:10].isdigit()
+            and key[11:13].isdigit()
+            and key[14:16].isdigit()
+            and key[17:19].isdigit()
+        ):
+            return None
+        year = int(key[0:4])
+        month = int(key[5:7])
+        day = int(key[8:10])
+        hour = int(key[11:13])
+        minute = int(key[14:16])
+        second = int(key[17:19])
+        # calendar.timegm normalises out-of-range fields instead of
+        # rejecting them; leave those to fromisoformat, which raises.
+        if (
+            year < 1
+            or not 1 <= month <= 12
+            or not 1 <= day <= calendar.monthrange(year, month)[1]
+            or hour > 23
+            or minute > 59
+            or second > 59
+        ):
+            return None
+        seconds = calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0))
+        _store_last_second(key, seconds)
+
+    if not micros:
+        return float(seconds)
+    # Same arithmetic as timedelta.total_seconds(), so results are bit-identical.
+    return (seconds * 10**6 + micros) / 10**6
+
 
 class ClaudeParser:
     """Parse Claude conversation exports and convert to unified format."""
 
-    def __init__(self, verbose=False):
+    # Exports with fewer conversations than this are converted in-process.
+    PARALLEL_THRESHOLD = 500
+
+    def __init__(self, verbose=False, jobs=None):
         self.verbose = verbose
+        # Worker threads for zip extraction / processes for conversion
+        self.jobs = jobs or default_jobs()
 
-    def parse_export(self, export_path):
+    def parse_export(self, export_path, flat_messages=False):
         """
         Parse a Claude export zip file.
 
         Args:
             export_path: Path to claude export zip or directory
+            flat_messages: Keep each conversation's messages as an ordered
+                "messages" list instead of building its mapping tree (see
+                ``with_mapping``), for callers that build trees one
+                conversation at a time
 
         Returns:
             List of conversations in unified format
@@ -30,208 +136,295 @@ class ClaudeParser:
 
         # Handle zip file
         if export_path.suffix == ".zip":
-            import zipfile
             import tempfile
 
             temp_dir = Path(tempfile.mkdtemp(prefix="claude_export_"))
             if self.verbose:
                 print(f"Extracting Claude export to {temp_dir}")
 
-            with zipfile.ZipFile(export_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
+            extract_zip(export_path, temp_dir, jobs=self.jobs)
 
-            return self._parse_directory(temp_dir)
+            return self._parse_directory(temp_dir, flat_messages)
         else:
-            return self._parse_directory(export_path)
+            return self._parse_directory(export_path, flat_messages)
 
-    def _parse_directory(self, directory):
+    def _parse_directory(self, directory, flat_messages=False):
         """Parse extracted Claude export directory."""
         directory = Path(directory)
 
-        # Load conversations.json
-        conversations_file = directory / "conversations.json"
-        if not conversations_file.exists():
-            raise ValueError(f"No conversations.json found in {directory}")
-
-        with open(conversations_file, encoding="utf-8") as f:
-            claude_conversations = json.load(f)
-
-        if self.verbose:
-            print(f"Found {len(claude_conversations)} Claude conversations")
-
         # Load projects.json (optional)
         projects = []
         projects_file = directory / "projects.json"
         if projects_file.exists():
-            with open(projects_file, encoding="utf-8") as f:
-                projects = json.load(f)
+            projects = load_json(projects_file)
             if self.verbose:
                 print(f"Found {len(projects)} Claude projects")
 
-        # Convert to unified format
-        unified_conversations = []
-        for claude_conv in claude_conversations:
-            unified = self._convert_conversation(claude_conv)
-            if unified:
-                unified_conversations.append(unified)
+        unified_conversations = self.iter_conversations(directory)
+        if flat_messages:
+            unified_conversations = list(unified_conversations)
+        else:
+            unified_conversations = [with_mapping(c) for c in unified_conversations]
+
+        if self.verbose:
+            print(f"Found {len(unified_conversations)} Claude conversations")
 
         return unified_conversations
 
-    def _convert_conversation(self, claude_conv):
+    def iter_conversations(self, directory):
         """
-        Convert a Claude conversation to unified format.
-
-        Claude format:
-        {
-            "uuid": "...",
-            "name": "...",
-            "created_at": "2024-07-14T03:26:07.804181Z",
-            "updated_at": "...",
-            "account": {...},
-            "chat_messages": [...]
-        }
-
-        Unified format (OpenAI-like):
-        {
-            "conversation_id": "...",
-            "title": "...",
-            "create_time": 1234567890.0,
-            "update_time": 1234567890.0,
-            "mapping": {...}
-        }
+        Yield the conversations of an extracted Claude export in unified format.
+
+        ``conversations.json`` is streamed one conversation at a time (see
+        ``utils.iter_json_array``). Exports with at least
+        ``PARALLEL_THRESHOLD`` conversations are converted by a pool of
+        ``jobs`` worker processes; smaller ones are converted in-process,
+        where pool start-up would cost more than it saves. Either way the
+        conversations are yielded in export order, with their messages as a
+        flat "messages" list (see ``with_mapping``).
         """
-        conversation_id = claude_conv.get("uuid", "unknown")
-        title = claude_conv.get("name", "Untitled Conversation")
+        directory = Path(directory)
+
+        conversations_file = directory / "conversations.json"
+        if not conversations_file.exists():
+            raise ValueError(f"No conversations.json found in {directory}")
 
-        # Convert ISO timestamps to Unix timestamps
-        created_at = claude_conv.get("created_at")
-        updated_at = claude_conv.get("updated_at")
+        claude_conversations = iter_json_array(conversations_file)
+        head = list(itertools.islice(claude_conversations, self.PARALLEL_THRESHOLD))
+        convert = functools.partial(_convert_conversation, verbose=self.verbose)
+
+        if self.jobs < 2 or len(head) < self.PARALLEL_THRESHOLD:
+            converted = map(convert, itertools.chain(head, claude_conversations))
+            for unified in converted:
+                if unified:
+                    yield unified
+            return
+
+        with multiprocessing.Pool(self.jobs) as pool:
+            converted = pool.imap(
+                convert, itertools.chain(head, claude_conversations), chunksize=64
+            )
+            for unified in converted:
+                if unified:
+                    yield unified
 
-        create_time = self._iso_to_timestamp(created_at) if created_at else None
-        update_time = self._iso_to_timestamp(updated_at) if updated_at else None
+    def _convert_conversation(self, claude_conv):
+        """Convert a Claude conversation to unified format."""
+        return _convert_conversation(claude_conv, self.verbose)
 
-        # Build message mapping (OpenAI uses a tree structure, Claude is flat)
-        mapping = {}
-        chat_messages = claude_conv.get("chat_messages", [])
+    def _convert_message(self, claude_msg):
+        """Convert a Claude message to unified format."""
+        return _convert_message(claude_msg, self.verbose)
 
-        # Create root node
-        root_id = "root"
-        mapping[root_id] = {
+    def _iso_to_timestamp(self, iso_string):
+        """Convert ISO 8601 timestamp to Unix timestamp."""
+        return _iso_to_timestamp(iso_string, self.verbose)
+
+
+def _convert_conversation(claude_conv, verbose=False):
+    """
+    Convert a Claude conversation to unified format.
+
+    Claude format:
+    {
+        "uuid": "...",
+        "name": "...",
+        "created_at": "2024-07-14T03:26:07.804181Z",
+        "updated_at": "...",
+        "account": {...},
+        "chat_messages": [...]
+    }
+
+    Unified format (OpenAI-like):
+    {
+        "conversation_id": "...",
+        "title": "...",
+        "create_time": 1234567890.0,
+        "update_time": 1234567890.0,
+        "messages": [...]
+    }
+
+    Claude conversations are linear, so messages are kept as an ordered list
+    rather than an OpenAI-style node tree; ``build_mapping`` derives the tree
+    for consumers that need one.
+    """
+    conversation_id = claude_conv.get("uuid", "unknown")
+    title = claude_conv.get("name", "Untitled Conversation")
+
+    # Convert ISO timestamps to Unix timestamps
+    created_at = claude_conv.get("created_at")
+    updated_at = claude_conv.get("updated_at")
+
+    create_time = _iso_to_timestamp(created_at, verbose) if created_at else None
+    update_time = _iso_to_timestamp(updated_at, verbose) if updated_at else None
+
+    messages = [
+        _convert_message(claude_msg, verbose)
+        for claude_msg in claude_conv.get("chat_messages", [])
+    ]
+
+    return {
+        "conversation_id": conversation_id,
+        "title": title,
+        "create_time": create_time,
+        "update_time": update_time,
+        "messages": messages,
+        "_source": "claude",
+    }
+
+
+def build_mapping(messages):
+    """
+    Build an OpenAI-style mapping tree for a linear list of unified messages.
+
+    The tree is a chain under a synthetic "root" node: each message's node is
+    keyed by its id (``msg_<index>`` for messages without one) and is the only
+    child of the message before it.
+
+    Args:
+        messages: Ordered list of messages from ``_convert_message``
+
+    Returns:
+        Dict mapping node id to {"id", "message", "parent", "children"}
+    """
+    root_id = "root"
+    mapping = {
+        root_id: {
             "id": root_id,
             "message": None,
             "parent": None,
             "children": [],
         }
-
-        # Convert messages to nodes
-        prev_id = root_id
-        for idx, claude_msg in enumerate(chat_messages):
-            node_id = claude_msg.get("uuid", f"msg_{idx}")
-
-            # Convert message
-            message = self._convert_message(claude_msg)
-
-            # Create node
-            mapping[node_id] = {
-                "id": node_id,
-                "message": message,
-                "parent": prev_id,
-                "children": [],
-            }
-
-            # Link to parent
-            if prev_id in mapping:
-                mapping[prev_id]["children"].append(node_id)
-
-            prev_id = node_id
-
-        return {
-            "conversation_id": conversation_id,
-            "title": title,
-            "create_time": create_time,
-            "update_time": update_time,
-            "mapping": mapping,
-            "_source": "claude",
+    }
+
+    prev_id = root_id
+    for idx, message in enumerate(messages):
+        node_id = message["id"]
+        if node_id == "unknown":
+            node_id = f"msg_{idx}"
+
+        mapping[node_id] = {
+            "id": node_id,
+            "message": message,
+            "parent": prev_id,
+            "children": [],
         }
 
-    def _convert_message(self, claude_msg):
-        """
-        Convert a Claude message to unified format.
+        # Link to parent
+        if prev_id in mapping:
+            mapping[prev_id]["children"].append(node_id)
 
-        Claude message:
-        {
-            "uuid": "...",
-            "text": "...",
-            "content": [{
-                "type": "text",
-                "text": "...",
-                "citations": []
-            }],
-            "sender": "human" or "assistant",
-            "created_at": "...",
-            "updated_at": "...",
-            "attachments": [],
-            "files": [{"file_name": "..."}]
-        }
+        prev_id = node_id
 
-        Unified message (OpenAI-like):
-        {
-            "id": "...",
-            "author": {"role": "user" or "assistant"},
-            "create_time": 1234567890.0,
-            "content": {
-                "content_type": "text",
-                "parts": ["..."]
-            }
-        }
-        """
-        msg_id = claude_msg.get("uuid", "unknown")
-        sender = claude_msg.get("sender", "human")
-
-        # Map sender to role
-        role = "user" if sender == "human" else "assistant"
+    return mapping
 
-        # Get timestamp
-        created_at = claude_msg.get("created_at")
-        create_time = self._iso_to_timestamp(created_at) if created_at else None
 
-        # Extract text content
-        text = claude_msg.get("text", "")
+def with_mapping(conversation):
+    """
+    Return a Claude conversation in its OpenAI-style shape, with the
+    "messages" list replaced by a mapping tree (see ``build_mapping``).
 
-        # Check for files/attachments
-        files = claude_msg.get("files", [])
-        attachments = claude_msg.get("attachments", [])
+    Other conversations, and ones that already have a mapping, are returned
+    unchanged.
+    """
+    if conversation.get("_source") != "claude" or "mapping" in conversation:
+        return conversation
 
-        # Build content
-        content = {"content_type": "text", "parts": [text] if text else []}
+    converted = {}
+    for key, value in conversation.items():
+        if key == "messages":
+            converted["mapping"] = build_mapping(value)
+        else:
+            converted[key] = value
+    return converted
 
-        # Store file references
-        message = {
-            "id": msg_id,
-            "author": {"role": role},
-            "create_time": create_time,
-            "content": content,
-        }
 
-        # Add file metadata if present
-        if files or attachments:
-            message["_files"] = files
-            message["_attachments"] = attachments
+def _convert_message(claude_msg, verbose=False):
+    """
+    Convert a Claude message to unified format.
 
-        return message
+    Claude message:
+    {
+        "uuid": "...",
+        "text": "...",
+        "content": [{
+            "type": "text",
+            "text": "...",
+            "citations": []
+        }],
+        "sender": "human" or "assistant",
+        "created_at": "...",
+        "updated_at": "...",
+        "attachments": [],
+        "files": [{"file_name": "..."}]
+    }
+
+    Unified message (OpenAI-like):
+    {
+        "id": "...",
+        "author": {"role": "user" or "assistant"},
+        "create_time": 1234567890.0,
+        "content": {
+            "content_type": "text",
+            "parts": ["..."]
+        }
+    }
+    """
+    msg_id = claude_msg.get("uuid", "unknown")
+    sender = claude_msg.get("sender", "human")
+
+    # Map sender to role
+    author = _AUTHOR_USER if sender == "human" else _AUTHOR_ASSISTANT
+
+    # Get timestamp
+    created_at = claude_msg.get("created_at")
+    create_time = _iso_to_timestamp(created_at, verbose) if created_at else None
+
+    # Extract text content
+    text = claude_msg.get("text", "")
+
+    # Check for files/attachments
+    files = claude_msg.get("files", [])
+    attachments = claude_msg.get("attachments", [])
+
+    # Build content
+    if text:
+        content = {"content_type": "text", "parts": [text]}
+    else:
+        content = _CONTENT_EMPTY
+
+    # Store file references
+    message = {
+        "id": msg_id,
+        "author": author,
+        "create_time": create_time,
+        "content": content,
+    }
+
+    # Add file metadata if present
+    if files or attachments:
+        message["_files"] = files
+        message["_attachments"] = attachments
+
+    return message
+
+
+def _iso_to_timestamp(iso_string, verbose=False):
+    """Convert ISO 8601 timestamp to Unix timestamp."""
+    timestamp = _parse_iso_fast(iso_string)
+    if timestamp is not None:
+        return timestamp
+
+    try:
+        # Handle timezone-aware strings
+        if "+" in iso_string or iso_string.endswith("Z"):
+            iso_string = iso_string.replace("Z", "+00:00")
+            dt = datetime.fromisoformat(iso_string)
+        else:
+            dt = datetime.fromisoformat(iso_string)
 
-    def _iso_to_timestamp(self, iso_string):
-        """Convert ISO 8601 timestamp to Unix timestamp."""
-        try:
-            # Handle timezone-aware strings
-            if "+" in iso_string or iso_string.endswith("Z"):
-                iso_string = iso_string.replace("Z", "+00:00")
-                dt = datetime.fromisoformat(iso_string)
-            else:
-                dt = datetime.fromisoformat(iso_string)
-
-            return dt.timestamp()
-        except Exception as e:
-            if self.verbose:
-                print(f"Warning: Could not parse timestamp '{iso_string}': {e}")
-            return None
+        return dt.timestamp()
+    except Exception as e:
+        if verbose:
+            print(f"Warning: Could not parse timestamp '{iso_string}': {e}")
+        return None
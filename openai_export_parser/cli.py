@@ -6,6 +6,8 @@ from .parser import ExportParser
 from .claude_parser import ClaudeParser
 from .version import __version__
 
+_CLAUDE_ROOT_FILES = frozenset(("conversations.json", "users.json"))
+
 
 def detect_export_type(archive_path):
     """
@@ -28,11 +30,14 @@ def detect_export_type(archive_path):
     if archive_path.suffix == ".zip":
         try:
             with zipfile.ZipFile(archive_path, "r") as zf:
-                filenames = zf.namelist()
-
-                # Claude exports have conversations.json, users.json at root
-                if "conversations.json" in filenames and "users.json" in filenames:
-                    return "claude"
+                # Claude exports have conversations.json, users.json at root.
+                # One pass over the entries, stopping as soon as both turn up.
+                found = set()
+                for info in zf.infolist():
+                    if info.filename in _CLAUDE_ROOT_FILES:
+                        found.add(info.filename)
+                        if len(found) == len(_CLAUDE_ROOT_FILES):
+                            return "claude"
 
                 # OpenAI exports have nested zips or conversations.json in subdirectories
                 return "openai"
@@ -70,6 +75,27 @@ def main():
         default="both",
         help="Output format: json only, html only, or both (default: both)",
     )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Parallel workers for Claude export extraction and conversion, "
+        "and for OpenAI conversation loading and media matching "
+        "(default: CPU count, max 8)",
+    )
+    parser.add_argument(
+        "--duplicate-media",
+        action="store_true",
+        help="Copy media into conversation folders instead of hard linking "
+        "files that are on the same filesystem",
+    )
+    parser.add_argument(
+        "--pretty-json",
+        action="store_true",
+        help="Indent conversation.json and media_manifest.json "
+        "(default: compact JSON)",
+    )
     parser.add_argument(
         "--version", action="version", version=f"openai-export-parser {__version__}"
     )
@@ -93,15 +119,19 @@ def main():
 
     if export_type == "claude":
         # Parse Claude export
-        claude_parser = ClaudeParser(verbose=args.verbose)
-        conversations = claude_parser.parse_export(args.archive)
+        claude_parser = ClaudeParser(verbose=args.verbose, jobs=args.jobs)
+        # Mapping trees are built per conversation by the organizer
+        conversations = claude_parser.parse_export(args.archive, flat_messages=True)
 
         # Use ConversationOrganizer to generate output
         from .conversation_organizer import ConversationOrganizer
         from .html_generator import HTMLGenerator
 
         organizer = ConversationOrganizer(
-            verbose=args.verbose, output_format=args.output_format
+            verbose=args.verbose,
+            output_format=args.output_format,
+            duplicate_media=args.duplicate_media,
+            pretty_json=args.pretty_json,
         )
 
         # Claude exports don't have separate media files (yet)
@@ -135,6 +165,9 @@ def main():
             verbose=args.verbose,
             organize_by_conversation=not args.flat,
             output_format=args.output_format,
+            duplicate_media=args.duplicate_media,
+            pretty_json=args.pretty_json,
+            jobs=args.jobs,
         )
         ep.parse_export(args.archive, args.output)
 
@@ -12,9 +12,56 @@ This module builds multiple indices to support robust media matching:
 
 import os
 import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Set
 from pathlib import Path
 
+from .utils import SlottedRecord, scan_files, split_dir_entries
+
+# Filename patterns, compiled once: the extractors run for every media file.
+_FILE_ID_UNDER_RE = re.compile(r"(file-[A-Za-z0-9]+)_")
+_FILE_ID_DASH_RE = re.compile(r"(file-[A-Za-z0-9]+)-")
+_FILE_ID_BARE_RE = re.compile(r"(file-[A-Za-z0-9]+)(?:\.[A-Za-z0-9]+)?$")
+_FILE_HASH_RE = re.compile(r"(file_[a-f0-9]{32})-[a-f0-9-]{36}\.")
+# All three file-name patterns in one pass, for the build_index loop: a
+# file-ID (any of the separators above) or a sediment:// file hash.
+_FILENAME_RE = re.compile(
+    r"(?:(?P<fid>file-[A-Za-z0-9]+)(?:[_-]|(?:\.[A-Za-z0-9]+)?$)"
+    r"|(?P<fhash>file_[a-f0-9]{32})-[a-f0-9-]{36}\.)"
+)
+# Standard (8-4-4-4-12) and alternative (8-4-4-4-8) UUIDs in one pass.
+_CONV_UUID_RE = re.compile(
+    r"/conversations/"
+    r"([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-(?:[a-f0-9]{12}|[a-f0-9]{8}))/"
+)
+
+
+class FileInfo(SlottedRecord):
+    """
+    Metadata for one indexed media file.
+
+    Reads like the dict path_to_metadata used to hold (``info["basename"]``,
+    ``info.get("size")``, ``dict(info)``).
+    """
+
+    __slots__ = ("size", "basename", "ext", "dirname", "key")
+
+    FIELDS = ("size", "basename", "ext", "dirname", "filename_only")
+
+    def __init__(self, size, basename, ext, dirname):
+        self.size = size
+        self.basename = basename
+        self.ext = ext
+        self.dirname = dirname
+        # (basename, size), shared with basename_size_to_path as its key
+        self.key = (basename, size)
+
+    @property
+    def filename_only(self):
+        return self.basename
+
 
 class ComprehensiveMediaIndexer:
     """
@@ -24,44 +71,50 @@ class ComprehensiveMediaIndexer:
     everything and builds multiple indices for different matching strategies.
     """
 
-    MEDIA_EXTENSIONS = {
-        ".png",
-        ".jpg",
-        ".jpeg",
-        ".gif",
-        ".webp",
-        ".bmp",
-        ".tiff",
-        ".pdf",
-        ".svg",
-        ".mp3",
-        ".wav",
-        ".m4a",
-        ".ogg",
-        ".flac",
-        ".mp4",
-        ".mov",
-        ".avi",
-        ".mkv",
-        ".webm",
-        # 2025+ exports strip the real extension and store assets as
-        # "file-<ID>.dat" (inside Conversations__*.zip shards).
-        ".dat",
-    }
-
-    def __init__(self, verbose=False):
+    MEDIA_EXTENSIONS = frozenset(
+        {
+            ".png",
+            ".jpg",
+            ".jpeg",
+            ".gif",
+            ".webp",
+            ".bmp",
+            ".tiff",
+            ".pdf",
+            ".svg",
+            ".mp3",
+            ".wav",
+            ".m4a",
+            ".ogg",
+            ".flac",
+            ".mp4",
+            ".mov",
+            ".avi",
+            ".mkv",
+            ".webm",
+            # 2025+ exports strip the real extension and store assets as
+            # "file-<ID>.dat" (inside Conversations__*.zip shards).
+            ".dat",
+        }
+    )
+
+    path_to_metadata: Dict[str, FileInfo]
+
+    def __init__(self, verbose=False, max_workers=None):
         self.verbose = verbose
+        # Threads for the directory scan; stat/readdir latency dominates it.
+        self.max_workers = max_workers or min(32, 4 * (os.cpu_count() or 1))
 
         # Primary indices
         self.all_files = []  # List of all media file paths
         self.basename_size_to_path = {}  # (basename, size) -> path
         self.file_id_to_path = {}  # file-ID -> path
         self.file_hash_to_path = {}  # file_hash -> path
-        self.conversation_to_paths = {}  # conversation_id -> [paths]
-        self.size_to_paths = {}  # size -> [paths]
+        self.conversation_to_paths = defaultdict(list)  # conversation_id -> [paths]
+        self.size_to_paths = defaultdict(list)  # size -> [paths]
 
         # Secondary indices for disambiguation
-        self.path_to_metadata = {}  # path -> {size, basename, ext, dir, ...}
+        self.path_to_metadata = {}  # path -> FileInfo
 
     def log(self, msg):
         """Print log message if verbose mode is enabled."""
@@ -96,66 +149,57 @@ class ComprehensiveMediaIndexer:
         file_hash_count = 0
         conversation_files = 0
 
+        # The loop body runs once per media file, so attribute lookups are
+        # bound to locals up front.
+        add_file = self.all_files.append
+        path_to_metadata = self.path_to_metadata
+        basename_size_to_path = self.basename_size_to_path
+        file_id_to_path = self.file_id_to_path
+        file_hash_to_path = self.file_hash_to_path
+        conversation_to_paths = self.conversation_to_paths
+        size_to_paths = self.size_to_paths
+        match_filename = _FILENAME_RE.match
+        search_conversation_id = _CONV_UUID_RE.search
+        dirname_of = os.path.dirname
+        intern = sys.intern
+
         # Walk ALL files in all scan directories
         for scan_dir in dirs_to_scan:
-            for root, dirs, files in os.walk(scan_dir):
-                for filename in files:
-                    filepath = os.path.join(root, filename)
-
-                    # Check if it's a media file
-                    _, ext = os.path.splitext(filename.lower())
-                    if ext not in self.MEDIA_EXTENSIONS:
-                        continue
-
-                    # It's a media file - catalog it
-                    total_files += 1
-                    self.all_files.append(filepath)
-
-                    # Get file metadata
-                    try:
-                        file_size = os.path.getsize(filepath)
-                    except OSError:
-                        continue
-
-                    basename = os.path.basename(filepath)
-                    dirname = os.path.dirname(filepath)
-
-                    # Store metadata
-                    self.path_to_metadata[filepath] = {
-                        "size": file_size,
-                        "basename": basename,
-                        "ext": ext,
-                        "dirname": dirname,
-                        "filename_only": filename,
-                    }
-
-                    # Index 1: By (basename, size) - UNIVERSAL FALLBACK
-                    self.basename_size_to_path[(basename, file_size)] = filepath
-
-                    # Index 2: By file-ID if present (file-{ID}_* or file-{ID}-*)
-                    file_id = self._extract_file_id(filename)
+            for filepath, filename, ext, file_size in self._scan_media(scan_dir):
+                # It's a media file - catalog it
+                total_files += 1
+                add_file(filepath)
+
+                # Store metadata
+                info = FileInfo(file_size, filename, ext, dirname_of(filepath))
+                path_to_metadata[filepath] = info
+
+                # Index 1: By (basename, size) - UNIVERSAL FALLBACK
+                basename_size_to_path[info.key] = filepath
+
+                # Index 2: By file-ID if present (file-{ID}_* or file-{ID}-*)
+                # Index 3: By file hash if present (file_{hash}-{uuid}.ext)
+                # (same patterns as _extract_file_id / _extract_file_hash)
+                match = match_filename(filename)
+                if match:
+                    file_id, file_hash = match.group("fid", "fhash")
                     if file_id:
-                        self.file_id_to_path[file_id] = filepath
+                        file_id_to_path[file_id] = filepath
                         file_id_count += 1
-
-                    # Index 3: By file hash if present (file_{hash}-{uuid}.ext)
-                    file_hash = self._extract_file_hash(filename)
-                    if file_hash:
-                        self.file_hash_to_path[file_hash] = filepath
+                    else:
+                        file_hash_to_path[file_hash] = filepath
                         file_hash_count += 1
 
-                    # Index 4: By conversation_id from path if present
-                    conv_id = self._extract_conversation_id(filepath)
-                    if conv_id:
-                        if conv_id not in self.conversation_to_paths:
-                            self.conversation_to_paths[conv_id] = []
-                        self.conversation_to_paths[conv_id].append(filepath)
-                        conversation_files += 1
+                # Index 4: By conversation_id from path if present
+                match = search_conversation_id(filepath)
+                if match:
+                    # Interned so the matcher's per-conversation lookups
+                    # compare keys by identity (see ComprehensiveMediaMatcher)
+                    conversation_to_paths[intern(match.group(1))].append(filepath)
+                    conversation_files += 1
 
-                    # Index 5: By file size (for DALL-E matching)
-                    if file_size not in self.size_to_paths:
-                        self.size_to_paths[file_size] = []
-                    self.size_to_paths[file_size].append(filepath)
+                # Index 5: By file size (for DALL-E matching)
+                size_to_paths[file_size].append(filepath)
 
         self.log(f"✓ Indexed {total_files} total media files")
         self.log(f"  - {file_id_count} files with file-ID prefixes")
@@ -174,6 +218,62 @@ class ComprehensiveMediaIndexer:
             "path_to_metadata": self.path_to_metadata,
         }
 
+    def _scan_media(self, scan_dir: str) -> List[Tuple[str, str, str, int]]:
+        """
+        Find every media file under scan_dir.
+
+        Each top-level subdirectory is walked by its own worker thread, and the
+        results are concatenated in os.walk order so the indices come out the
+        same as a sequential walk.
+
+        Returns:
+            List of (filepath, filename, ext, size) tuples
+        """
+        files, subdirs = split_dir_entries(scan_dir)
+        records = self._media_records(files)
+
+        if len(subdirs) < 2 or self.max_workers < 2:
+            for subdir in subdirs:
+                records.extend(self._scan_subtree(subdir))
+            return records
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for subtree_records in executor.map(self._scan_subtree, subdirs):
+                records.extend(subtree_records)
+        return records
+
+    def _scan_subtree(self, root: str) -> List[Tuple[str, str, str, int]]:
+        """Media records for every file under root (see _scan_media)."""
+        return self._media_records(scan_files(root))
+
+    def _media_records(self, entries) -> List[Tuple[str, str, str, int]]:
+        """Filter DirEntry objects down to media files with their sizes."""
+        media_extensions = self.MEDIA_EXTENSIONS
+        records = []
+        for entry in entries:
+            filename = entry.name
+
+            # Check if it's a media file. Slicing at the last dot skips
+            # splitext's bookkeeping, and the extension is only lowercased
+            # when it isn't already a match (most exported names are lowercase).
+            dot = filename.rfind(".")
+            if dot <= 0:
+                continue
+            ext = filename[dot:]
+            if ext not in media_extensions:
+                ext = ext.lower()
+                if ext not in media_extensions:
+                    continue
+
+            # Get file metadata (stat follows symlinks, like getsize)
+            try:
+                file_size = entry.stat().st_size
+            except OSError:
+                continue
+
+            records.append((entry.path, filename, ext, file_size))
+        return records
+
     def _extract_file_id(self, filename: str) -> str:
         """
         Extract file-ID from filename.
@@ -188,18 +288,18 @@ class ComprehensiveMediaIndexer:
             file-ID or None
         """
         # Try underscore separator
-        match = re.match(r"(file-[A-Za-z0-9]+)_", filename)
+        match = _FILE_ID_UNDER_RE.match(filename)
         if match:
             return match.group(1)
 
         # Try hyphen separator
-        match = re.match(r"(file-[A-Za-z0-9]+)-", filename)
+        match = _FILE_ID_DASH_RE.match(filename)
         if match:
             return match.group(1)
 
         # 2025+ exports: "file-{ID}.dat" / "file-{ID}.jpeg" — no name part,
         # the whole stem IS the file-ID. Also handles a bare "file-{ID}".
-        match = re.match(r"(file-[A-Za-z0-9]+)(?:\.[A-Za-z0-9]+)?$", filename)
+        match = _FILE_ID_BARE_RE.match(filename)
         if match:
             return match.group(1)
 
@@ -214,7 +314,7 @@ class ComprehensiveMediaIndexer:
         Returns:
             "file_{hash}" or None
         """
-        match = re.match(r"(file_[a-f0-9]{32})-[a-f0-9-]{36}\.", filename)
+        match = _FILE_HASH_RE.match(filename)
         if match:
             return match.group(1)
         return None
@@ -228,19 +328,8 @@ class ComprehensiveMediaIndexer:
         Returns:
             conversation_id or None
         """
-        # Standard UUID: 8-4-4-4-12
-        match = re.search(
-            r"/conversations/([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/",
-            filepath,
-        )
-        if match:
-            return match.group(1)
-
-        # Alternative UUID: 8-4-4-4-8
-        match = re.search(
-            r"/conversations/([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{8})/",
-            filepath,
-        )
+        # Standard UUID (8-4-4-4-12) or alternative UUID (8-4-4-4-8)
+        match = _CONV_UUID_RE.search(filepath)
         if match:
             return match.group(1)
 
@@ -5,8 +5,13 @@ This module implements a robust matching strategy that tries multiple approaches
 in order of reliability, falling back to less precise methods only when needed.
 """
 
+from collections import defaultdict
 from typing import Dict, List, Set
+import multiprocessing
 import os
+import sys
+
+from .utils import default_jobs
 
 
 class ComprehensiveMediaMatcher:
@@ -23,8 +28,13 @@ class ComprehensiveMediaMatcher:
     7. Filename alone - least reliable fallback
     """
 
-    def __init__(self, verbose=False):
+    # Exports with fewer conversations than this are matched in-process.
+    PARALLEL_THRESHOLD = 500
+
+    def __init__(self, verbose=False, jobs=None):
         self.verbose = verbose
+        # Worker processes for matching large exports
+        self.jobs = jobs or default_jobs()
         self.stats = {
             "conversations_processed": 0,
             "conversations_with_media": 0,
@@ -39,10 +49,15 @@ class ComprehensiveMediaMatcher:
             "unmatched_references": 0,
         }
 
-    def log(self, msg):
-        """Print log message if verbose mode is enabled."""
+    def log(self, msg, *args):
+        """
+        Print log message if verbose mode is enabled.
+
+        ``args`` are %-formatted into ``msg`` only when the message is
+        printed, so hot loops can log without building strings.
+        """
         if self.verbose:
-            print(msg)
+            print(msg % args if args else msg)
 
     def match(
         self, conversations: List[Dict], file_indices: Dict, reference_extractor
@@ -60,134 +75,87 @@ class ComprehensiveMediaMatcher:
         """
         self.log("Matching media using comprehensive multi-strategy approach...")
 
-        for conv in conversations:
-            self.stats["conversations_processed"] += 1
+        verbose = self.verbose
+        file_hash_to_path = file_indices["file_hash_to_path"]
+        file_id_to_path = file_indices["file_id_to_path"]
+        conversation_to_paths = file_indices["conversation_to_paths"]
+        size_to_paths = file_indices["size_to_paths"]
 
-            # Extract all media references from this conversation
-            references = reference_extractor.extract_all_references(conv)
+        # Sizes shared by no other indexed file, for the size-based Strategies
+        # 5 and 6 (a unique size is the only size match they trust)
+        unique_size_to_path = {
+            size: paths[0] for size, paths in size_to_paths.items() if len(paths) == 1
+        }
 
-            # Collect matched files
-            matched_files = set()
+        # Basename -> paths in index order, built in one pass for Strategy 7
+        # (filename alone) instead of scanning every indexed file per filename.
+        basename_to_paths: Dict[str, List[str]] = defaultdict(list)
+        for filepath, metadata in file_indices["path_to_metadata"].items():
+            basename_to_paths[metadata["basename"]].append(filepath)
+        basename_to_paths = dict(basename_to_paths)
 
-            # Strategy 1: Match by file hash (sediment://)
-            file_hashes = reference_extractor.get_all_file_hashes(references)
-            for file_hash in file_hashes:
-                filepath = file_indices["file_hash_to_path"].get(file_hash)
-                if filepath:
-                    matched_files.add(filepath)
-                    self.stats["by_file_hash"] += 1
-                    self.log(f"    Matched by file_hash: {file_hash}")
-                else:
-                    self.stats["unmatched_references"] += 1
-                    self.log(f"    UNMATCHED file_hash: {file_hash}")
-
-            # Strategy 2: Match by file-ID
-            file_ids = reference_extractor.get_all_file_ids(references)
-            for file_id in file_ids:
-                filepath = file_indices["file_id_to_path"].get(file_id)
-                if filepath and filepath not in matched_files:
-                    matched_files.add(filepath)
-                    self.stats["by_file_id"] += 1
-                    self.log(f"    Matched by file_id: {file_id}")
-
-            # Strategy 3: Match by filename + size (for attachments)
-            for attachment in references.get("attachments", []):
-                filename = attachment.get("name")
-                size = attachment.get("size")
-                if filename and size:
-                    filepath = file_indices["basename_size_to_path"].get(
-                        (filename, size)
-                    )
-                    if filepath and filepath not in matched_files:
-                        matched_files.add(filepath)
-                        self.stats["by_filename_size"] += 1
-                        self.log(
-                            f"    Matched by filename+size: {filename} ({size} bytes)"
-                        )
-
-            # Strategy 4: Match by conversation directory
-            conv_id = conv.get("conversation_id") or conv.get("id")
-            if conv_id:
-                conv_files = file_indices["conversation_to_paths"].get(conv_id, [])
-                for filepath in conv_files:
-                    if filepath not in matched_files:
-                        matched_files.add(filepath)
-                        self.stats["by_conversation_dir"] += 1
-                        self.log(
-                            f"    Matched by conversation_dir: {os.path.basename(filepath)}"
-                        )
-
-            # Strategy 5: Match by size + metadata (DALL-E generations)
-            for dalle_gen in references.get("dalle_generations", []):
-                size_bytes = dalle_gen.get("size_bytes")
-                gen_id = dalle_gen.get("gen_id")
-                width = dalle_gen.get("width")
-                height = dalle_gen.get("height")
-
-                if size_bytes:
-                    candidate_files = file_indices["size_to_paths"].get(size_bytes, [])
-
-                    # If we have only one file with this size, it's likely a match
-                    if len(candidate_files) == 1:
-                        filepath = candidate_files[0]
-                        if filepath not in matched_files:
-                            matched_files.add(filepath)
-                            self.stats["by_size_metadata"] += 1
-                            self.log(
-                                f"    Matched by size (unique): {size_bytes} bytes"
-                            )
-
-                    # If multiple files have same size, we can't reliably match without opening files
-                    # Just take the first one for now (could be improved)
-                    elif len(candidate_files) > 1 and filepath not in matched_files:
-                        filepath = candidate_files[0]
-                        matched_files.add(filepath)
-                        self.stats["by_size_only"] += 1
-                        self.log(
-                            f"    Matched by size (ambiguous): {size_bytes} bytes - {len(candidate_files)} candidates"
-                        )
-
-            # Strategy 6: Match by asset_pointer size alone (for non-DALL-E)
-            for asset_ref in references.get("asset_pointers", []):
-                size_bytes = asset_ref.get("size_bytes")
-                pointer_type = asset_ref.get("type")
-
-                # Skip if already matched by hash (sediment) or file-ID
-                if pointer_type in ["sediment", "file"]:
-                    continue
-
-                if size_bytes:
-                    candidate_files = file_indices["size_to_paths"].get(size_bytes, [])
-                    if len(candidate_files) == 1:
-                        filepath = candidate_files[0]
-                        if filepath not in matched_files:
-                            matched_files.add(filepath)
-                            self.stats["by_size_only"] += 1
-                            self.log(f"    Matched by size: {size_bytes} bytes")
-
-            # Strategy 7: Match by filename alone (least reliable)
-            filenames = reference_extractor.get_all_filenames(references)
-            for filename in filenames:
-                # Look through all files for basename match
-                for filepath, metadata in file_indices["path_to_metadata"].items():
-                    if metadata["basename"] == filename:
-                        if filepath not in matched_files:
-                            matched_files.add(filepath)
-                            self.stats["by_filename_only"] += 1
-                            self.log(f"    Matched by filename only: {filename}")
-                            break
+        context = (
+            file_hash_to_path,
+            file_id_to_path,
+            conversation_to_paths,
+            size_to_paths,
+            unique_size_to_path,
+            file_indices["basename_size_to_path"],
+            basename_to_paths,
+            reference_extractor,
+            verbose,
+        )
+
+        # Conversation ids, interned like the indexer's conversation_to_paths
+        # keys so Strategy 4's lookups hit on identity instead of comparing
+        # UUID strings.
+        conv_ids = [
+            sys.intern(conv.get("conversation_id") or conv.get("id") or "")
+            for conv in conversations
+        ]
+
+        if self.jobs < 2 or len(conversations) < self.PARALLEL_THRESHOLD:
+            matched = (
+                _match_conversation(context, conv, conv_id)
+                for conv, conv_id in zip(conversations, conv_ids)
+            )
+            self._apply_results(conversations, conv_ids, matched)
+            return conversations
+
+        # Each worker gets the indices once (see _init_worker); only the
+        # conversations go out and only the matched paths come back.
+        with multiprocessing.Pool(
+            self.jobs, initializer=_init_worker, initargs=(context,)
+        ) as pool:
+            results = pool.imap(
+                _match_in_worker, zip(conversations, conv_ids), chunksize=64
+            )
+            self._apply_results(conversations, conv_ids, results)
+        return conversations
+
+    def _apply_results(self, conversations, conv_ids, results):
+        """Record _match_conversation results in conversations and stats."""
+        stats = self.stats
+        for conv, conv_id, (matched_files, conv_stats, log_lines) in zip(
+            conversations, conv_ids, results
+        ):
+            stats["conversations_processed"] += 1
+            for key, count in conv_stats.items():
+                stats[key] += count
+            for line in log_lines:
+                self.log(line)
 
             # Update conversation with matched files
             if matched_files:
-                conv["_media_files"] = list(matched_files)
-                self.stats["conversations_with_media"] += 1
-                self.stats["total_files_matched"] += len(matched_files)
+                conv["_media_files"] = matched_files
+                stats["conversations_with_media"] += 1
+                stats["total_files_matched"] += len(matched_files)
                 self.log(
-                    f"  Conversation {conv_id[:8] if conv_id else 'unknown'}: matched {len(matched_files)} files"
+                    "  Conversation %s: matched %d files",
+                    conv_id[:8] if conv_id else "unknown",
+                    len(matched_files),
                 )
 
-        return conversations
-
     def get_stats(self) -> Dict:
         """Get matching statistics."""
         return self.stats
@@ -207,3 +175,187 @@ class ComprehensiveMediaMatcher:
         self.log(f"  By size only: {self.stats['by_size_only']}")
         self.log(f"  By filename only: {self.stats['by_filename_only']}")
         self.log(f"\nUnmatched references: {self.stats['unmatched_references']}")
+
+
+# Matching context of a pool worker process, set once by _init_worker
+_worker_context = None
+
+
+def _init_worker(context):
+    """Pool initializer: keep the matching context for _match_in_worker."""
+    global _worker_context
+    _worker_context = context
+
+
+def _match_in_worker(conv_and_id):
+    """_match_conversation for a (conversation, conversation id) pair."""
+    conv, conv_id = conv_and_id
+    return _match_conversation(_worker_context, conv, sys.intern(conv_id))
+
+
+def _match_conversation(context, conv, conv_id):
+    """
+    Match one conversation's media references against the file indices.
+
+    Runs the seven strategies of ``ComprehensiveMediaMatcher`` without
+    touching the conversation, so it can run in a worker process.
+
+    Args:
+        context: Indices and settings tuple built by
+            ``ComprehensiveMediaMatcher.match``
+        conv: Conversation dict
+        conv_id: Its (interned) conversation id, or ""
+
+    Returns:
+        (matched file paths as a list or None, stats counts to add,
+        verbose log lines)
+    """
+    (
+        file_hash_to_path,
+        file_id_to_path,
+        conversation_to_paths,
+        size_to_paths,
+        unique_size_to_path,
+        basename_size_to_path,
+        basename_to_paths,
+        reference_extractor,
+        verbose,
+    ) = context
+    stats = defaultdict(int)
+    log_lines = []
+    log = log_lines.append if verbose else None
+
+    # Extract all media references from this conversation. Most conversations
+    # are text-only; each strategy below is skipped unless the kinds of
+    # reference it reads are present.
+    references = reference_extractor.extract_all_references(conv)
+    asset_pointers = references["asset_pointers"]
+    attachments = references["attachments"]
+    dalle_generations = references["dalle_generations"]
+    text_references = references["text_references"]
+
+    # Collect matched files
+    matched_files = set()
+
+    # Strategy 1: Match by file hash (sediment://)
+    file_hashes = (
+        reference_extractor.get_all_file_hashes(references) if asset_pointers else ()
+    )
+    for file_hash in file_hashes:
+        filepath = file_hash_to_path.get(file_hash)
+        if filepath:
+            matched_files.add(filepath)
+            stats["by_file_hash"] += 1
+            if log:
+                log(f"    Matched by file_hash: {file_hash}")
+        else:
+            stats["unmatched_references"] += 1
+            if log:
+                log(f"    UNMATCHED file_hash: {file_hash}")
+
+    # Strategy 2: Match by file-ID
+    # (the set difference drops files that are already matched)
+    if asset_pointers or attachments or text_references:
+        file_ids = reference_extractor.get_all_file_ids(references)
+        new_files = {file_id_to_path.get(file_id) for file_id in file_ids}
+        new_files.discard(None)
+        new_files -= matched_files
+        matched_files |= new_files
+        stats["by_file_id"] += len(new_files)
+        if log:
+            for filepath in new_files:
+                log(f"    Matched by file_id: {os.path.basename(filepath)}")
+
+    # Strategy 3: Match by filename + size (for attachments)
+    if attachments:
+        new_files = set()
+        for attachment in attachments:
+            filename = attachment.get("name")
+            size = attachment.get("size")
+            if filename and size:
+                filepath = basename_size_to_path.get((filename, size))
+                if filepath:
+                    new_files.add(filepath)
+        new_files -= matched_files
+        matched_files |= new_files
+        stats["by_filename_size"] += len(new_files)
+        if log:
+            for filepath in new_files:
+                log(f"    Matched by filename+size: {os.path.basename(filepath)}")
+
+    # Strategy 4: Match by conversation directory
+    if conv_id:
+        conv_files = conversation_to_paths.get(conv_id)
+        if conv_files:
+            new_files = set(conv_files) - matched_files
+            matched_files |= new_files
+            stats["by_conversation_dir"] += len(new_files)
+            if log:
+                for filepath in new_files:
+                    log(
+                        "    Matched by conversation_dir: "
+                        f"{os.path.basename(filepath)}"
+                    )
+
+    # Strategy 5: Match by size + metadata (DALL-E generations)
+    for dalle_gen in dalle_generations:
+        size_bytes = dalle_gen.get("size_bytes")
+        if not size_bytes:
+            continue
+
+        # If we have only one file with this size, it's likely a match
+        filepath = unique_size_to_path.get(size_bytes)
+        if filepath is not None:
+            if filepath not in matched_files:
+                matched_files.add(filepath)
+                stats["by_size_metadata"] += 1
+                if log:
+                    log(f"    Matched by size (unique): {size_bytes} bytes")
+            continue
+
+        # If multiple files have same size, we can't reliably match without
+        # opening files. Just take the first one for now (could be improved)
+        candidate_files = size_to_paths.get(size_bytes)
+        if candidate_files and candidate_files[0] not in matched_files:
+            filepath = candidate_files[0]
+            matched_files.add(filepath)
+            stats["by_size_only"] += 1
+            if log:
+                log(
+                    f"    Matched by size (ambiguous): {size_bytes} bytes"
+                    f" - {len(candidate_files)} candidates"
+                )
+
+    # Strategy 6: Match by asset_pointer size alone (for non-DALL-E)
+    for asset_ref in asset_pointers:
+        # Skip if already matched by hash (sediment) or file-ID
+        if asset_ref.get("type") in ("sediment", "file"):
+            continue
+
+        size_bytes = asset_ref.get("size_bytes")
+        filepath = unique_size_to_path.get(size_bytes) if size_bytes else None
+        if filepath is not None and filepath not in matched_files:
+            matched_files.add(filepath)
+            stats["by_size_only"] += 1
+            if log:
+                log(f"    Matched by size: {size_bytes} bytes")
+
+    # Strategy 7: Match by filename alone (least reliable)
+    # Only for filenames no earlier strategy has matched a file for; a
+    # second file with the same basename would be a duplicate.
+    if not (attachments or text_references):
+        return (list(matched_files) if matched_files else None), stats, log_lines
+    filenames = reference_extractor.get_all_filenames(references)
+    if filenames and matched_files:
+        filenames -= {os.path.basename(path) for path in matched_files}
+    for filename in filenames:
+        # First file with this basename, in index order, that isn't matched yet
+        for filepath in basename_to_paths.get(filename, ()):
+            if filepath not in matched_files:
+                matched_files.add(filepath)
+                stats["by_filename_only"] += 1
+                if log:
+                    log(f"    Matched by filename only: {filename}")
+                break
+
+    return (list(matched_files) if matched_files else None), stats, log_lines
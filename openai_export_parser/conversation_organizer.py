@@ -5,24 +5,27 @@ Each conversation gets its own folder with format:
 {timestamp}_{title}_{conv_id}/
   ├── conversation.json
   └── media/
-      ├── {hash}_{filename1}
-      └── {hash}_{filename2}
+      ├── {filename1}
+      └── {size}_{filename2}   (size or {hash} prefix only on a name clash)
 """
 
+import itertools
 import os
-import json
 import shutil
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from .utils import (
     ensure_dir,
+    hash_and_copy,
     hash_file,
+    link_or_copy,
     sanitize_filename,
     timestamp_to_iso,
-    copy_file,
     sniff_extension,
+    write_json,
 )
 from .html_generator import HTMLGenerator
+from .claude_parser import with_mapping
 
 
 class ConversationOrganizer:
@@ -31,11 +34,29 @@ class ConversationOrganizer:
     with self-contained media.
     """
 
-    def __init__(self, verbose=False, output_format="both"):
+    # Media copies handed to a worker thread per task (see _copy_media_batch)
+    MEDIA_BATCH_SIZE = 64
+
+    def __init__(
+        self,
+        verbose=False,
+        output_format="both",
+        media_workers=None,
+        duplicate_media=False,
+        pretty_json=False,
+    ):
         self.verbose = verbose
         self.output_format = output_format
-        self.media_by_conversation = defaultdict(list)  # conv_index -> [media_paths]
+        # Hard link media into conversation folders unless copies are requested
+        self.duplicate_media = duplicate_media
+        # Indent conversation.json / media_manifest.json (compact by default)
+        self.json_indent = 2 if pretty_json else None
+        # Threads hashing/copying media files (I/O-bound)
+        self.media_workers = media_workers or min(8, (os.cpu_count() or 1) * 2)
+        self.media_by_conversation = {}  # conv_index -> [media_paths]
         self.html_generator = HTMLGenerator()
+        # Source path -> content hash, for media hashed by several conversations
+        self._hash_cache = {}
 
     def log(self, *args):
         """Print log message if verbose mode is enabled."""
@@ -53,15 +74,18 @@ class ConversationOrganizer:
         Returns:
             Dict mapping conversation index to list of media file paths
         """
-        for conv_idx, conv in enumerate(conversations):
-            media_files = set()
-
-            # Extract media references from all messages
-            for msg in conv.get("messages", []):
-                if "media" in msg:
-                    media_files.update(msg["media"])
-
-            self.media_by_conversation[conv_idx] = list(media_files)
+        # Each conversation's media references, de-duplicated across messages
+        # and kept in the order they are first mentioned
+        self.media_by_conversation = {
+            conv_idx: list(
+                dict.fromkeys(
+                    itertools.chain.from_iterable(
+                        msg.get("media", ()) for msg in conv.get("messages", ())
+                    )
+                )
+            )
+            for conv_idx, conv in enumerate(conversations)
+        }
 
         return self.media_by_conversation
 
@@ -112,9 +136,10 @@ class ConversationOrganizer:
                 continue
 
             content = message.get("content", {})
+            content_type = content.get("content_type")
 
             # Extract canvas/artifacts
-            if content.get("content_type") == "canvas":
+            if content_type == "canvas":
                 asset_counter["canvas"] += 1
                 text = content.get("text", "")
                 language = content.get("language", "txt")
@@ -122,7 +147,7 @@ class ConversationOrganizer:
                 assets.append((filename, text))
 
             # Extract code blocks from text content
-            elif content.get("content_type") == "code":
+            elif content_type == "code":
                 asset_counter["code_block"] += 1
                 text = content.get("text", "")
                 language = content.get("language", "txt")
@@ -133,20 +158,19 @@ class ConversationOrganizer:
 
         return assets
 
-    def _hashed_media_name(self, src_path):
+    def _media_basename(self, src_path):
         """
-        Build the destination filename for a copied media file:
-        "{hash}_{basename}", recovering a real extension when the source
-        was stored with a generic ".dat" extension (2025+ OpenAI exports).
+        Build the basename a copied media file is stored under, recovering a
+        real extension when the source was stored with a generic ".dat"
+        extension (2025+ OpenAI exports).
 
         The file-ID / hash embedded in the basename is preserved, so the
         HTML viewer's asset-pointer resolution still matches.
 
         Returns:
-            (hashed_name, original_basename)
+            (basename, original_basename)
         """
         original_basename = os.path.basename(src_path)
-        file_hash = hash_file(src_path)
 
         stem, ext = os.path.splitext(original_basename)
         if ext.lower() in (".dat", ""):
@@ -155,7 +179,7 @@ class ConversationOrganizer:
         else:
             basename = original_basename
 
-        return f"{file_hash}_{basename}", original_basename
+        return basename, original_basename
 
     def write_organized_output(
         self, conversations, all_media_files, out_dir, media_manifest
@@ -174,136 +198,274 @@ class ConversationOrganizer:
         """
         ensure_dir(out_dir)
         created_folders = []
+        self._hash_cache = {}
 
         # Build lookup for media files by basename
-        media_lookup = {}
-        for media_path in all_media_files:
-            basename = os.path.basename(media_path)
-            media_lookup[basename] = media_path
+        media_lookup = {os.path.basename(path): path for path in all_media_files}
+
+        # Source path -> (basename, original_basename). A file shared by several
+        # conversations is named (and its extension sniffed) only once.
+        media_basenames = {}
 
         self.log(f"Processing {len(conversations)} conversations...")
 
-        for conv_idx, conv in enumerate(conversations):
-            # Generate folder name
-            folder_name = self.generate_folder_name(conv, conv_idx)
-            conv_dir = os.path.join(out_dir, folder_name)
-            media_dir = os.path.join(conv_dir, "media")
-
-            ensure_dir(conv_dir)
-            ensure_dir(media_dir)
-
-            # Write conversation.json (unless output format is html-only)
-            if self.output_format in ["json", "both"]:
-                conv_path = os.path.join(conv_dir, "conversation.json")
-                with open(conv_path, "w", encoding="utf-8") as f:
-                    json.dump(conv, f, indent=2, ensure_ascii=False)
-
-            # Extract assets (code blocks, canvas artifacts)
-            assets = self.extract_assets_from_conversation(conv)
-            asset_filenames = []
-
-            if assets:
-                assets_dir = os.path.join(conv_dir, "assets")
-                ensure_dir(assets_dir)
-
-                for filename, content in assets:
-                    asset_path = os.path.join(assets_dir, filename)
-                    with open(asset_path, "w", encoding="utf-8") as f:
-                        f.write(content)
-                    asset_filenames.append(filename)
-
-            # Copy media files for this conversation
-            # First try to use the new _media_files field (from conversation_id matching)
-            media_paths = conv.get("_media_files", [])
-            media_mapping = {}  # basename -> hashed_filename
-
-            if media_paths:
-                # New method: use full paths from media index
-                for src_path in media_paths:
-                    if not os.path.exists(src_path):
-                        self.log(f"Warning: Media file not found: {src_path}")
+        with ThreadPoolExecutor(max_workers=self.media_workers) as executor:
+            # Queue every conversation's media copies up front so hashing and
+            # copying overlap across files (and conversations) while the
+            # JSON/HTML below is written. Copies are submitted in batches of
+            # MEDIA_BATCH_SIZE (spanning conversations), so tens of thousands
+            # of small files don't each pay for a task and a future.
+            layout = []
+            batch = []  # (src_path, media_dir, name, basename)
+            batch_job = [None]  # the batch's future, set when it is submitted
+            for conv_idx, conv in enumerate(conversations):
+                folder_name = self.generate_folder_name(conv, conv_idx)
+                conv_dir = os.path.join(out_dir, folder_name)
+                media_dir = os.path.join(conv_dir, "media")
+
+                ensure_dir(media_dir)  # creates conv_dir along the way
+
+                media_jobs = []
+                used_names = set()
+                for src_path in self._media_sources(
+                    conv, conv_idx, media_lookup, media_manifest
+                ):
+                    try:
+                        names = media_basenames.get(src_path)
+                        if names is None:
+                            names = media_basenames[src_path] = self._media_basename(
+                                src_path
+                            )
+                        basename, original_basename = names
+                        name = self._unique_media_name(src_path, basename, used_names)
+                    except OSError as e:
+                        self.log(f"Error processing media {src_path}: {e}")
                         continue
+                    media_jobs.append((original_basename, batch_job, len(batch)))
+                    batch.append((src_path, media_dir, name, basename))
+                    if len(batch) == self.MEDIA_BATCH_SIZE:
+                        batch_job[0] = executor.submit(self._copy_media_batch, batch)
+                        batch, batch_job = [], [None]
+                layout.append((folder_name, conv_dir, media_jobs))
+
+            if batch:
+                batch_job[0] = executor.submit(self._copy_media_batch, batch)
+
+            for conv_idx, conv in enumerate(conversations):
+                folder_name, conv_dir, media_jobs = layout[conv_idx]
+                layout[conv_idx] = None
+                created_folders.append(
+                    self._write_conversation(conv, folder_name, conv_dir, media_jobs)
+                )
 
-                    basename = os.path.basename(src_path)
+                if (conv_idx + 1) % 100 == 0:
+                    self.log(
+                        f"Processed {conv_idx + 1}/{len(conversations)} conversations"
+                    )
 
-                    # Generate hash for unique naming (recovers real extension
-                    # for ".dat" assets so the HTML viewer can render them)
-                    try:
-                        hashed_name, original_basename = self._hashed_media_name(
-                            src_path
-                        )
+        # Create convenience symlink folders
+        self._create_convenience_symlinks(out_dir, created_folders)
 
-                        dst_path = os.path.join(media_dir, hashed_name)
-                        copy_file(src_path, dst_path)
+        self.log(f"✅ Created {len(created_folders)} conversation folders")
+        return created_folders
 
-                        media_mapping[original_basename] = hashed_name
+    def _media_sources(self, conv, conv_idx, media_lookup, media_manifest):
+        """
+        Resolve the source paths of the media files to copy for a conversation.
 
-                    except Exception as e:
-                        self.log(f"Error processing media {basename}: {e}")
-            else:
-                # Fallback to old method: use media_manifest lookup
-                media_basenames = media_manifest.get(conv_idx, [])
+        Args:
+            conv: Conversation dict
+            conv_idx: Index of conversation in list
+            media_lookup: Dict mapping media basename to path
+            media_manifest: Dict mapping conversation index to media basenames
 
-                for basename in media_basenames:
-                    if basename not in media_lookup:
-                        self.log(f"Warning: Media file not found: {basename}")
-                        continue
+        Returns:
+            List of existing source paths
+        """
+        sources = []
+
+        # First try to use the new _media_files field (from conversation_id matching)
+        media_paths = conv.get("_media_files", [])
+
+        if media_paths:
+            # New method: use full paths from media index
+            # Warnings pass their values as separate log() arguments, so
+            # nothing is formatted unless verbose output is on.
+            for src_path in media_paths:
+                if not os.path.exists(src_path):
+                    self.log("Warning: Media file not found:", src_path)
+                    continue
+                sources.append(src_path)
+        else:
+            # Fallback to old method: use media_manifest lookup
+            for basename in media_manifest.get(conv_idx, []):
+                if basename not in media_lookup:
+                    self.log("Warning: Media file not found:", basename)
+                    continue
+                sources.append(media_lookup[basename])
 
-                    src_path = media_lookup[basename]
+        return sources
 
-                    # Generate hash for unique naming (recovers real extension
-                    # for ".dat" assets so the HTML viewer can render them)
-                    try:
-                        hashed_name, original_basename = self._hashed_media_name(
-                            src_path
-                        )
-
-                        dst_path = os.path.join(media_dir, hashed_name)
-                        copy_file(src_path, dst_path)
-
-                        media_mapping[original_basename] = hashed_name
-
-                    except Exception as e:
-                        self.log(f"Error processing media {basename}: {e}")
-
-            # Write media manifest for this conversation
-            if media_mapping:
-                manifest_path = os.path.join(conv_dir, "media_manifest.json")
-                with open(manifest_path, "w", encoding="utf-8") as f:
-                    json.dump(media_mapping, f, indent=2, ensure_ascii=False)
-
-            # Generate HTML viewer for this conversation (unless output format is json-only)
-            if self.output_format in ["html", "both"]:
-                media_filenames = list(media_mapping.values()) if media_mapping else []
-                conv["_folder_name"] = folder_name  # Store for index generation
-                conv["_assets"] = bool(asset_filenames)  # Mark if has assets
-
-                html_content = self.html_generator.generate_conversation_html(
-                    conversation=conv,
-                    media_files=media_filenames,
-                    assets=asset_filenames,
-                    folder_name=folder_name,
-                    media_mapping=media_mapping,
-                )
+    def _unique_media_name(self, src_path, basename, used_names):
+        """
+        Pick a media filename that is unique within one conversation's
+        media folder, hashing only as a last resort.
 
-                html_path = os.path.join(conv_dir, "conversation.html")
-                with open(html_path, "w", encoding="utf-8") as f:
-                    f.write(html_content)
-            else:
-                # Still store metadata even if not generating HTML
-                conv["_folder_name"] = folder_name
-                conv["_assets"] = bool(asset_filenames)
+        Tries the plain basename, then "{size}_{basename}". If both are
+        taken, returns None: the copy is then named "{hash}_{basename}" by
+        content (identical files share that name).
 
-            created_folders.append(conv_dir)
+        Args:
+            src_path: Path of the source file
+            basename: Basename to store it under (see _media_basename)
+            used_names: Names already given out in this media folder (updated)
 
-            if (conv_idx + 1) % 100 == 0:
-                self.log(f"Processed {conv_idx + 1}/{len(conversations)} conversations")
+        Returns:
+            Filename, or None to name by content hash
+        """
+        if basename not in used_names:
+            used_names.add(basename)
+            return basename
 
-        # Create convenience symlink folders
-        self._create_convenience_symlinks(out_dir, created_folders)
+        sized_name = f"{os.path.getsize(src_path)}_{basename}"
+        if sized_name not in used_names:
+            used_names.add(sized_name)
+            return sized_name
 
-        self.log(f"✅ Created {len(created_folders)} conversation folders")
-        return created_folders
+        return None
+
+    def _copy_media(self, src_path, media_dir, name, basename=None):
+        """
+        Copy one media file into a conversation's media folder. Runs on a
+        worker thread.
+
+        The file is hard linked when it lives on the same filesystem, unless
+        ``duplicate_media`` is set; otherwise it is copied.
+
+        Args:
+            src_path: Path of the source file
+            media_dir: Conversation media folder
+            name: Destination filename, or None for "{hash}_{basename}"
+            basename: Basename after the hash prefix when name is None
+
+        Returns:
+            The destination filename
+        """
+        if name is None:
+            # Each source is hashed at most once per run, however many
+            # conversations need it under a hashed name.
+            file_hash = self._hash_cache.get(src_path)
+            if file_hash is None:
+                if self.duplicate_media:
+                    name = hash_and_copy(src_path, media_dir, basename)
+                    self._hash_cache[src_path] = name.partition("_")[0]
+                    return name
+                file_hash = self._hash_cache[src_path] = hash_file(src_path)
+            name = f"{file_hash}_{basename}"
+
+        link_or_copy(
+            src_path, os.path.join(media_dir, name), link=not self.duplicate_media
+        )
+        return name
+
+    def _copy_media_batch(self, batch):
+        """
+        Run _copy_media for a batch of media files on one worker thread.
+
+        Args:
+            batch: List of (src_path, media_dir, name, basename) tuples
+
+        Returns:
+            List with, per file, the destination filename or the exception
+            its copy raised
+        """
+        results = []
+        for src_path, media_dir, name, basename in batch:
+            try:
+                results.append(self._copy_media(src_path, media_dir, name, basename))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _write_conversation(self, conv, folder_name, conv_dir, media_jobs):
+        """
+        Write one conversation's folder contents once its media is queued.
+
+        Args:
+            conv: Conversation dict
+            folder_name: Folder name from generate_folder_name
+            conv_dir: Path of the conversation folder
+            media_jobs: List of (original_basename, batch_job, position): the
+                file's result is at ``position`` in the result of the future
+                ``batch_job[0]`` (see _copy_media_batch)
+
+        Returns:
+            conv_dir
+        """
+        # Claude conversations carry a flat message list; their mapping
+        # tree is built here, one conversation at a time, for the outputs.
+        conv_out = with_mapping(conv)
+
+        # Write conversation.json (unless output format is html-only)
+        if self.output_format in ["json", "both"]:
+            conv_path = os.path.join(conv_dir, "conversation.json")
+            write_json(conv_path, conv_out, indent=self.json_indent)
+
+        # Extract assets (code blocks, canvas artifacts)
+        assets = self.extract_assets_from_conversation(conv_out)
+        asset_filenames = []
+
+        if assets:
+            assets_dir = os.path.join(conv_dir, "assets")
+            ensure_dir(assets_dir)
+
+            for filename, content in assets:
+                asset_path = os.path.join(assets_dir, filename)
+                with open(asset_path, "w", encoding="utf-8") as f:
+                    f.write(content)
+                asset_filenames.append(filename)
+
+        # Collect this conversation's copied media. ".dat" assets get their
+        # real extension so the HTML viewer can render them.
+        media_mapping = {}  # original basename -> stored filename
+        for original_basename, batch_job, position in media_jobs:
+            result = batch_job[0].result()[position]
+            if isinstance(result, Exception):
+                self.log(f"Error processing media {original_basename}: {result}")
+            else:
+                media_mapping[original_basename] = result
+
+        # Write media manifest for this conversation
+        if media_mapping:
+            manifest_path = os.path.join(conv_dir, "media_manifest.json")
+            write_json(manifest_path, media_mapping, indent=self.json_indent)
+
+        # Generate HTML viewer for this conversation (unless output format is json-only)
+        if self.output_format in ["html", "both"]:
+            media_filenames = list(media_mapping.values()) if media_mapping else []
+            conv["_folder_name"] = folder_name  # Store for index generation
+            conv["_assets"] = bool(asset_filenames)  # Mark if has assets
+            if conv_out is not conv:
+                conv_out["_folder_name"] = folder_name
+                conv_out["_assets"] = conv["_assets"]
+
+            html_path = os.path.join(conv_dir, "conversation.html")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.writelines(
+                    self.html_generator.iter_html_chunks(
+                        conversation=conv_out,
+                        media_files=media_filenames,
+                        assets=asset_filenames,
+                        folder_name=folder_name,
+                        media_mapping=media_mapping,
+                    )
+                )
+        else:
+            # Still store metadata even if not generating HTML
+            conv["_folder_name"] = folder_name
+            conv["_assets"] = bool(asset_filenames)
+
+        return conv_dir
 
     def _create_convenience_symlinks(self, out_dir, created_folders):
         """
@@ -332,11 +494,10 @@ class ConversationOrganizer:
 
         for conv_dir in created_folders:
             folder_name = os.path.basename(conv_dir)
-            media_dir = os.path.join(conv_dir, "media")
-            assets_dir = os.path.join(conv_dir, "assets")
+            filled = self._non_empty_subdirs(conv_dir)
 
             # Check if media folder exists and has files
-            if os.path.exists(media_dir) and os.listdir(media_dir):
+            if "media" in filled:
                 # Create relative symlink
                 symlink_path = os.path.join(media_symlink_dir, folder_name)
                 # Use relative path from symlink location to target
@@ -350,7 +511,7 @@ class ConversationOrganizer:
                     )
 
             # Check if assets folder exists and has files
-            if os.path.exists(assets_dir) and os.listdir(assets_dir):
+            if "assets" in filled:
                 # Create relative symlink
                 symlink_path = os.path.join(assets_symlink_dir, folder_name)
                 # Use relative path from symlink location to target
@@ -365,3 +526,33 @@ class ConversationOrganizer:
 
         self.log(f"✅ Created {media_count} symlinks in _with_media/")
         self.log(f"✅ Created {assets_count} symlinks in _with_assets/")
+
+    def _non_empty_subdirs(self, conv_dir):
+        """
+        Return which of a conversation folder's "media" and "assets"
+        subfolders exist and contain at least one entry.
+
+        One directory scan of conv_dir, plus a scan of each candidate that
+        stops at its first entry.
+
+        Args:
+            conv_dir: Path of the conversation folder
+
+        Returns:
+            Set of subfolder names
+        """
+        filled = set()
+        try:
+            with os.scandir(conv_dir) as entries:
+                candidates = [
+                    entry
+                    for entry in entries
+                    if entry.name in ("media", "assets") and entry.is_dir()
+                ]
+            for entry in candidates:
+                with os.scandir(entry.path) as children:
+                    if next(children, None) is not None:
+                        filled.add(entry.name)
+        except OSError:
+            pass
+        return filled
@@ -41,6 +41,31 @@ class HTMLGenerator:
         Returns:
             HTML string
         """
+        return "".join(
+            self.iter_html_chunks(
+                conversation, media_files, assets, folder_name, media_mapping
+            )
+        )
+
+    def iter_html_chunks(
+        self,
+        conversation,
+        media_files=None,
+        assets=None,
+        folder_name="",
+        media_mapping=None,
+    ):
+        """
+        Generate a conversation's standalone HTML file piece by piece.
+
+        Takes the same arguments as ``generate_conversation_html``. The
+        embedded conversation JSON is encoded incrementally, so writing the
+        chunks to a file (``f.writelines(...)``) never holds the whole page
+        in memory.
+
+        Yields:
+            Consecutive pieces of the HTML document
+        """
         media_files = media_files or []
         assets = assets or []
         media_mapping = media_mapping or {}
@@ -67,10 +92,7 @@ class HTMLGenerator:
             conversation, media_files, media_mapping
         )
 
-        # Serialize conversation data for embedding
-        conv_json = json.dumps(conversation, indent=2, ensure_ascii=False)
-
-        html_template = f"""<!DOCTYPE html>
+        yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -132,7 +154,14 @@ class HTMLGenerator:
     </div>
 
     <!-- Embedded Conversation Data -->
-    <script id="conversation-data" type="application/json">{conv_json}</script>
+    <script id="conversation-data" type="application/json">"""
+
+        # Embedded conversation data, serialized incrementally
+        yield from json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(
+            conversation
+        )
+
+        yield f"""</script>
     <script id="media-files-data" type="application/json">{json.dumps(media_files)}</script>
     <script id="asset-files-data" type="application/json">{json.dumps(assets)}</script>
     <script id="media-mapping-data" type="application/json">{json.dumps(media_mapping)}</script>
@@ -154,8 +183,6 @@ class HTMLGenerator:
 </body>
 </html>"""
 
-        return html_template
-
     def _get_css(self):
         """Get CSS styles for the conversation viewer."""
         return """
@@ -1354,14 +1381,18 @@ class HTMLGenerator:
             create_time = conv.get("create_time")
             conv_id = conv.get("conversation_id") or conv.get("id", "unknown")
 
-            # Count messages and calculate metrics
-            mapping = conv.get("mapping", {})
+            # Count messages and calculate metrics. Claude conversations list
+            # their messages directly instead of in a mapping tree.
+            if "mapping" not in conv and conv.get("_source") == "claude":
+                messages = conv.get("messages", [])
+            else:
+                mapping = conv.get("mapping", {})
+                messages = (node.get("message") for node in mapping.values())
             message_count = 0
             total_words = 0
             code_block_count = 0
 
-            for node in mapping.values():
-                msg = node.get("message")
+            for msg in messages:
                 if not msg:
                     continue
 
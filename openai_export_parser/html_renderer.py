@@ -9,261 +9,201 @@ Generates human-readable HTML from conversation JSON with:
 """
 
 import os
-import json
+from collections import defaultdict
 from datetime import datetime
 from html import escape
 
+from .utils import ijson, load_json
 
-class HTMLRenderer:
-    """
-    Renders OpenAI conversation exports as HTML.
-
-    Handles the complex 'mapping' structure and generates
-    readable HTML with media embedded.
-    """
-
-    def __init__(self):
-        self.conversation = None
-        self.media_manifest = None
-        self.media_dir = "media"
-
-    def render_conversation(self, conversation_folder):
-        """
-        Render a conversation folder to HTML.
-
-        Args:
-            conversation_folder: Path to conversation folder containing:
-                - conversation.json
-                - media/ (optional)
-                - media_manifest.json (optional)
-
-        Returns:
-            HTML string
-        """
-        # Load conversation
-        conv_path = os.path.join(conversation_folder, "conversation.json")
-        with open(conv_path, "r", encoding="utf-8") as f:
-            self.conversation = json.load(f)
-
-        # Load media manifest if exists
-        manifest_path = os.path.join(conversation_folder, "media_manifest.json")
-        if os.path.exists(manifest_path):
-            with open(manifest_path, "r", encoding="utf-8") as f:
-                self.media_manifest = json.load(f)
-        else:
-            self.media_manifest = {}
-
-        # Generate HTML
-        html = self._generate_html()
-
-        return html
-
-    def _generate_html(self):
-        """Generate complete HTML document."""
-        # Extract messages from conversation
-        messages = self._extract_messages()
-
-        # Build HTML
-        html_parts = []
-
-        # Header
-        html_parts.append(self._html_header())
-
-        # Metadata panel
-        html_parts.append(self._html_metadata())
-
-        # Messages
-        html_parts.append('<div class="messages">')
-        for msg in messages:
-            html_parts.append(self._html_message(msg))
-        html_parts.append("</div>")
-
-        # Footer
-        html_parts.append(self._html_footer())
-
-        return "\n".join(html_parts)
-
-    def _extract_messages(self):
-        """
-        Extract messages from conversation structure.
+_CONTAINER_START = frozenset(("start_map", "start_array"))
+_CONTAINER_END = frozenset(("end_map", "end_array"))
 
-        Handles both simple messages array and complex mapping structure.
-
-        Returns:
-            List of message dicts in display order
-        """
-        messages = []
-
-        # Try simple messages array first
-        if "messages" in self.conversation and isinstance(
-            self.conversation["messages"], list
-        ):
-            return self.conversation["messages"]
-
-        # Handle complex mapping structure
-        if "mapping" in self.conversation:
-            messages = self._extract_from_mapping()
-
-        return messages
 
-    def _extract_from_mapping(self):
-        """
-        Extract messages from OpenAI's complex mapping structure.
-
-        The mapping is a graph of message nodes with parent/child relationships.
-        We need to traverse it to get messages in conversation order.
-        """
-        mapping = self.conversation.get("mapping", {})
-        current_node = self.conversation.get("current_node")
-
-        # Build parent->children index
-        children_map = {}
-        for node_id, node_data in mapping.items():
-            parent = node_data.get("parent")
-            if parent:
-                children_map.setdefault(parent, []).append(node_id)
+def _build_value(events, event, value):
+    """
+    Build the JSON value that starts with (event, value) from an ijson event
+    stream, consuming its events up to the matching end event.
+    """
+    if event not in _CONTAINER_START:
+        return value
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in _CONTAINER_START:
+            depth += 1
+        elif event in _CONTAINER_END:
+            depth -= 1
+            if not depth:
+                return builder.value
+    raise ValueError("Truncated JSON value")
+
+
+def _stream_conversation(path):
+    """
+    Load conversation.json with ijson, keeping only what rendering needs from
+    the "mapping" tree.
 
-        # Find root node (no parent)
-        root_nodes = [
-            node_id
-            for node_id, node_data in mapping.items()
-            if not node_data.get("parent")
-        ]
+    Nodes are built one at a time and reduced to their "parent" and "message"
+    as they are read, so neither the raw file nor the nodes' "children" lists
+    and ids are held in memory alongside the result. Other top-level fields
+    are loaded whole.
 
-        if not root_nodes:
-            return []
+    Returns:
+        The conversation dict, with a reduced "mapping" in file order
+    """
+    conversation = {}
+    with open(path, "rb") as f:
+        events = ijson.parse(f, use_float=True)
+        for prefix, event, value in events:
+            if prefix != "" or event != "map_key":
+                continue
+            key = value
+            _, event, value = next(events)
+            if key != "mapping" or event != "start_map":
+                conversation[key] = _build_value(events, event, value)
+                continue
+
+            mapping = conversation[key] = {}
+            for _, event, value in events:
+                if event == "end_map":
+                    break
+                node_id = value  # map_key
+                _, event, value = next(events)
+                node = _build_value(events, event, value)
+                if isinstance(node, dict):
+                    node = {
+                        "parent": node.get("parent"),
+                        "message": node.get("message"),
+                    }
+                mapping[node_id] = node
+    return conversation
 
-        # Traverse from root
-        messages = []
-        self._traverse_mapping(root_nodes[0], mapping, children_map, messages)
 
-        return messages
-
-    def _traverse_mapping(self, node_id, mapping, children_map, messages):
-        """Recursively traverse mapping to extract messages."""
-        node = mapping.get(node_id)
-        if not node:
-            return
+class HTMLRenderer:
+    """
+    Renders OpenAI conversation exports as HTML.
 
-        # Add message if it exists and has content
-        if "message" in node and node["message"]:
-            msg = node["message"]
-            # Skip hidden system messages
-            if not msg.get("metadata", {}).get("is_visually_hidden_from_conversation"):
-                messages.append(msg)
+    Handles the complex 'mapping' structure and generates
+    readable HTML with media embedded.
+    """
 
-        # Traverse children
-        for child_id in children_map.get(node_id, []):
-            self._traverse_mapping(child_id, mapping, children_map, messages)
+    # Author roles that need no HTML escaping; anything else goes through escape()
+    _KNOWN_ROLES = frozenset(
+        ("user", "assistant", "system", "tool", "function", "unknown")
+    )
 
-    def _html_header(self):
-        """Generate HTML header with CSS."""
-        title = escape(self.conversation.get("title", "Conversation"))
+    # Lower-case extensions rendered inline as <img>
+    _IMAGE_EXTENSIONS = frozenset((".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg"))
 
-        return f"""<!DOCTYPE html>
+    # Static parts of the page around the (escaped) title, built once
+    _HEADER_BEFORE_TITLE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
+    <title>"""
+
+    _HEADER_AFTER_TITLE = """</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
-        body {{
+        }
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
             line-height: 1.6;
             color: #333;
             background: #f5f5f5;
             padding: 20px;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 900px;
             margin: 0 auto;
             background: white;
             padding: 30px;
             border-radius: 8px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        .metadata {{
+        }
+        .metadata {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 6px;
             margin-bottom: 30px;
-        }}
-        .metadata h1 {{
+        }
+        .metadata h1 {
             margin-bottom: 15px;
             color: #2c3e50;
-        }}
-        .metadata .info {{
+        }
+        .metadata .info {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 10px;
             font-size: 0.9em;
             color: #666;
-        }}
-        .metadata .info-item {{
+        }
+        .metadata .info-item {
             padding: 8px;
             background: white;
             border-radius: 4px;
-        }}
-        .metadata .info-item strong {{
+        }
+        .metadata .info-item strong {
             display: block;
             color: #333;
             margin-bottom: 4px;
-        }}
-        .messages {{
+        }
+        .messages {
             display: flex;
             flex-direction: column;
             gap: 20px;
-        }}
-        .message {{
+        }
+        .message {
             padding: 15px 20px;
             border-radius: 8px;
             border-left: 4px solid #e0e0e0;
-        }}
-        .message.user {{
+        }
+        .message.user {
             background: #e3f2fd;
             border-left-color: #2196f3;
-        }}
-        .message.assistant {{
+        }
+        .message.assistant {
             background: #f3e5f5;
             border-left-color: #9c27b0;
-        }}
-        .message.system {{
+        }
+        .message.system {
             background: #fff3e0;
             border-left-color: #ff9800;
             font-size: 0.9em;
-        }}
-        .message-header {{
+        }
+        .message-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 10px;
             font-size: 0.9em;
             color: #666;
-        }}
-        .message-role {{
+        }
+        .message-role {
             font-weight: bold;
             text-transform: capitalize;
-        }}
-        .message-time {{
+        }
+        .message-time {
             font-size: 0.85em;
-        }}
-        .message-content {{
+        }
+        .message-content {
             white-space: pre-wrap;
             word-wrap: break-word;
-        }}
-        .message-content img {{
+        }
+        .message-content img {
             max-width: 100%;
             height: auto;
             margin: 15px 0;
             border-radius: 6px;
             box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-        .file-attachment {{
+        }
+        .file-attachment {
             display: inline-block;
             padding: 8px 12px;
             background: #eceff1;
@@ -272,18 +212,212 @@ class HTMLRenderer:
             text-decoration: none;
             color: #1976d2;
             font-size: 0.9em;
-        }}
-        .file-attachment:hover {{
+        }
+        .file-attachment:hover {
             background: #cfd8dc;
-        }}
-        .file-attachment::before {{
+        }
+        .file-attachment::before {
             content: "📎 ";
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">"""
 
+    _FOOTER = """
+    </div>
+</body>
+</html>"""
+
+    # conversation.json files at least this big are streamed with ijson (when
+    # installed) instead of being loaded whole
+    STREAM_THRESHOLD = 10 * 1024 * 1024
+
+    def __init__(self):
+        self.conversation = None
+        self.media_manifest = None
+        self.media_dir = "media"
+        # "simple" (a "messages" list), "mapping" or None; set by _load_folder
+        self._schema_kind = None
+
+    def render_conversation(self, conversation_folder):
+        """
+        Render a conversation folder to HTML.
+
+        Args:
+            conversation_folder: Path to conversation folder containing:
+                - conversation.json
+                - media/ (optional)
+                - media_manifest.json (optional)
+
+        Returns:
+            HTML string
+        """
+        return "".join(self.iter_conversation(conversation_folder))
+
+    def iter_conversation(self, conversation_folder):
+        """
+        Render a conversation folder to HTML, yielding it in consecutive chunks.
+
+        The folder is loaded when iteration starts. Joining the chunks gives
+        the same string as ``render_conversation``; consumers that only write
+        the HTML out can do so chunk by chunk instead.
+
+        Args:
+            conversation_folder: Path to conversation folder (see
+                ``render_conversation``)
+
+        Yields:
+            HTML fragments in document order
+        """
+        self._load_folder(conversation_folder)
+        yield from self._iter_html()
+
+    def render_conversation_to_stream(self, conversation_folder, writer):
+        """
+        Render a conversation folder to HTML, writing it piece by piece.
+
+        Only one message's HTML is held in memory at a time, however long the
+        conversation is.
+
+        Args:
+            conversation_folder: Path to conversation folder (see
+                ``render_conversation``)
+            writer: Text stream to write to, e.g. a file opened with "w"
+        """
+        writer.writelines(self.iter_conversation(conversation_folder))
+
+    def _load_folder(self, conversation_folder):
+        """Load a folder's conversation.json and media_manifest.json."""
+        # Load conversation (orjson when installed; see utils.load_json), or
+        # stream very large ones so their mapping is never held twice
+        conv_path = os.path.join(conversation_folder, "conversation.json")
+        if ijson is not None and os.path.getsize(conv_path) >= self.STREAM_THRESHOLD:
+            self.conversation = _stream_conversation(conv_path)
+        else:
+            self.conversation = load_json(conv_path)
+        self._schema_kind = self._detect_schema_kind(self.conversation)
+
+        # Load media manifest if exists
+        manifest_path = os.path.join(conversation_folder, "media_manifest.json")
+        if os.path.exists(manifest_path):
+            self.media_manifest = load_json(manifest_path)
+        else:
+            self.media_manifest = {}
+
+    def _iter_html(self):
+        """Yield the HTML document in consecutive chunks."""
+        # Extract messages from conversation
+        messages = self._extract_messages()
+
+        # Header
+        yield self._html_header()
+
+        # Metadata panel
+        yield "\n"
+        yield self._html_metadata()
+
+        # Messages
+        yield '\n<div class="messages">'
+        for msg in messages:
+            html_parts = ["\n"]
+            self._html_message(msg, html_parts)
+            yield from html_parts
+        yield "\n</div>\n"
+
+        # Footer
+        yield self._html_footer()
+
+    def _extract_messages(self):
+        """
+        Extract messages from conversation structure.
+
+        Handles both simple messages array and complex mapping structure.
+
+        Returns:
+            List of message dicts in display order
+        """
+        kind = self._schema_kind
+        if kind is None:
+            kind = self._schema_kind = self._detect_schema_kind(self.conversation)
+
+        if kind == "simple":
+            return self.conversation["messages"]
+        if kind == "mapping":
+            return self._extract_from_mapping()
+        return []
+
+    @staticmethod
+    def _detect_schema_kind(conversation):
+        """
+        Classify a conversation's message layout.
+
+        Returns:
+            "simple" for a plain "messages" list (tried first), "mapping" for
+            the OpenAI node tree, or "" when neither is present
+        """
+        if isinstance(conversation.get("messages"), list):
+            return "simple"
+        if "mapping" in conversation:
+            return "mapping"
+        return ""
+
+    def _extract_from_mapping(self):
+        """
+        Extract messages from OpenAI's complex mapping structure.
+
+        The mapping is a graph of message nodes with parent/child relationships.
+        We need to traverse it to get messages in conversation order.
+        """
+        mapping = self.conversation.get("mapping", {})
+
+        # Build parent->children index and find the root node (the first
+        # node without a parent) in the same pass
+        children_map = defaultdict(list)
+        root = None
+        for node_id, node_data in mapping.items():
+            parent = node_data.get("parent")
+            if parent:
+                children_map[parent].append(node_id)
+            elif root is None:
+                root = node_id
+
+        if root is None:
+            return []
+
+        # Traverse from root, depth first with an explicit stack (long threads
+        # would otherwise hit the recursion limit)
+        messages = []
+        stack = [root]
+        while stack:
+            node_id = stack.pop()
+            node = mapping.get(node_id)
+            if not node:
+                continue
+
+            # Add message if it exists and has content
+            msg = node.get("message")
+            if msg:
+                # Skip hidden system messages
+                metadata = msg.get("metadata")
+                if not metadata or not metadata.get(
+                    "is_visually_hidden_from_conversation"
+                ):
+                    messages.append(msg)
+
+            # Push children in reverse so they are visited in order
+            children = children_map.get(node_id)
+            if children:
+                stack.extend(reversed(children))
+
+        return messages
+
+    def _html_header(self):
+        """Generate HTML header with CSS."""
+        title = escape(self.conversation.get("title", "Conversation"))
+
+        return self._HEADER_BEFORE_TITLE + title + self._HEADER_AFTER_TITLE
+
     def _html_metadata(self):
         """Generate metadata panel HTML."""
         title = escape(self.conversation.get("title", "Untitled"))
@@ -315,25 +449,28 @@ class HTMLRenderer:
             </div>
         </div>"""
 
-    def _html_message(self, message):
-        """Generate HTML for a single message."""
+    def _html_message(self, message, html_parts):
+        """Append the HTML for a single message to html_parts."""
         role = message.get("author", {}).get("role", "unknown")
+        if role not in self._KNOWN_ROLES:
+            role = escape(role)
         timestamp = self._format_timestamp(message.get("create_time"))
 
         # Extract content
         content = self._extract_message_content(message)
-        content_html = self._format_content(content, message)
 
-        return f"""
-        <div class="message {escape(role)}">
+        html_parts.append(f"""
+        <div class="message {role}">
             <div class="message-header">
-                <span class="message-role">{escape(role)}</span>
+                <span class="message-role">{role}</span>
                 <span class="message-time">{timestamp}</span>
             </div>
             <div class="message-content">
-                {content_html}
+                """)
+        html_parts.append(self._format_content(content, message))
+        html_parts.append("""
             </div>
-        </div>"""
+        </div>""")
 
     def _extract_message_content(self, message):
         """Extract text content from message."""
@@ -366,28 +503,42 @@ class HTMLRenderer:
         """
         Format message content HTML with inline images and attachments.
         """
-        html = escape(content)
+        parts = [escape(content)]
+        media = message.get("media")
+        if not media:
+            return parts[0]
 
-        # Add inline images if message has media
-        if "media" in message:
-            for media_file in message["media"]:
-                # Look up hashed filename
-                hashed_name = self.media_manifest.get(media_file, media_file)
-                img_path = f"{self.media_dir}/{hashed_name}"
-
-                # Check if it's an image
-                if self._is_image(hashed_name):
-                    html += f'<br><img src="{img_path}" alt="{escape(media_file)}">'
-                else:
-                    html += f'<br><a href="{img_path}" class="file-attachment">{escape(media_file)}</a>'
+        # Bound once for the loop below
+        append = parts.append
+        manifest_get = self.media_manifest.get
+        media_dir = self.media_dir
+        is_image = self._is_image
 
-        return html
+        # Add inline images if message has media
+        for media_file in media:
+            # Look up hashed filename
+            hashed_name = manifest_get(media_file, media_file)
+            img_path = f"{media_dir}/{hashed_name}"
+
+            # Check if it's an image
+            if is_image(hashed_name):
+                append(f'<br><img src="{img_path}" alt="{escape(media_file)}">')
+            else:
+                append(
+                    f'<br><a href="{img_path}" class="file-attachment">'
+                    f"{escape(media_file)}</a>"
+                )
+
+        return "".join(parts)
 
     def _is_image(self, filename):
         """Check if filename is an image."""
-        img_exts = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg"}
-        ext = os.path.splitext(filename.lower())[1]
-        return ext in img_exts
+        # Only the extension is lower-cased; a leading dot alone (".png") is a
+        # hidden file name, not an extension, as with os.path.splitext.
+        dot = filename.rfind(".")
+        if dot <= 0:
+            return False
+        return filename[dot:].lower() in self._IMAGE_EXTENSIONS
 
     def _format_timestamp(self, timestamp):
         """Format Unix timestamp to readable string."""
@@ -402,32 +553,36 @@ class HTMLRenderer:
 
     def _html_footer(self):
         """Generate HTML footer."""
-        return """
-    </div>
-</body>
-</html>"""
+        return self._FOOTER
 
 
-def render_conversation_folder(folder_path, output_html=None):
+def render_conversation_folder(folder_path, output_html=None, return_html=True):
     """
     Convenience function to render a conversation folder to HTML.
 
     Args:
         folder_path: Path to conversation folder
         output_html: Optional path to save HTML (default: same folder as index.html)
+        return_html: Set False to stream the HTML straight to output_html
+            without building it in memory (nothing is returned then)
 
     Returns:
-        HTML string
+        HTML string, or None when return_html is False
     """
     renderer = HTMLRenderer()
-    html = renderer.render_conversation(folder_path)
 
-    if output_html:
-        with open(output_html, "w", encoding="utf-8") as f:
-            f.write(html)
-    elif output_html is None:
+    if output_html is None:
         # Save to folder as index.html
         output_html = os.path.join(folder_path, "index.html")
+
+    if not return_html and output_html:
+        with open(output_html, "w", encoding="utf-8") as f:
+            renderer.render_conversation_to_stream(folder_path, f)
+        return None
+
+    html = renderer.render_conversation(folder_path)
+
+    if output_html:
         with open(output_html, "w", encoding="utf-8") as f:
             f.write(html)
 
@@ -7,7 +7,26 @@ index mapping conversation IDs to their associated media files.
 
 import os
 import re
-from typing import Dict, List, Set
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set, Tuple
+
+from .utils import split_dir_entries
+
+# Patterns compiled once: the extractors run for every file in the export.
+# Standard (8-4-4-4-12) and alternative (8-4-4-4-8) UUIDs in one pass.
+_CONV_UUID_RE = re.compile(
+    r"/conversations/"
+    r"([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-(?:[a-f0-9]{12}|[a-f0-9]{8}))/"
+)
+_FILE_ID_UNDER_RE = re.compile(r"(file-[A-Za-z0-9]+)_")
+_FILE_ID_DASH_RE = re.compile(r"(file-[A-Za-z0-9]+)-")
+_FILE_HASH_RE = re.compile(r"(file_[a-f0-9]{32})-[a-f0-9-]{36}\.")
+# str.translate tables deleting the characters of a lowercase / uppercase UUID;
+# a UUID translates to "" under one of them (see _is_uuid_filename).
+_UUID_LOWER_CHARS = str.maketrans("", "", "0123456789abcdef-")
+_UUID_UPPER_CHARS = str.maketrans("", "", "0123456789ABCDEF-")
 
 
 class MediaIndexer:
@@ -27,8 +46,10 @@ class MediaIndexer:
         ".mov",
     }
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, max_workers=None):
         self.verbose = verbose
+        # Threads listing and stat'ing subdirectories (I/O-bound)
+        self.max_workers = max_workers or min(32, 4 * (os.cpu_count() or 1))
         self.conversation_media = {}  # conversation_id -> list of file paths
         self.file_id_to_path = {}  # file-ID -> file path
         self.file_hash_to_path = {}  # file_{hash} -> file path (for sediment://)
@@ -41,6 +62,9 @@ class MediaIndexer:
         self.filename_size_to_path = (
             {}
         )  # (filename, size) -> file path (for files without file-ID prefix)
+        # Running totals kept by build_index, so get_stats needn't re-sum
+        self._total_dalle_files = 0  # files in conversation_media
+        self._total_dalle_generation_files = 0  # files in size_to_paths
 
     def log(self, msg):
         """Print log message if verbose mode is enabled."""
@@ -63,7 +87,7 @@ class MediaIndexer:
         """
         self.log("Building media index from directory structure...")
 
-        conversation_media = {}
+        conversation_media: Dict[str, List[str]] = defaultdict(list)
         file_id_to_path = {}
         file_hash_to_path = {}
         filename_size_to_path = {}  # NEW: Index all media files by (filename, size)
@@ -72,57 +96,76 @@ class MediaIndexer:
         file_id_files = 0
         file_hash_files = 0
 
-        # Walk through all files in temp directory
-        for root, dirs, files in os.walk(tmp_dir):
-            for filename in files:
-                filepath = os.path.join(root, filename)
-
-                # Check if it's a media file (by extension or by checking file-ID pattern)
-                _, ext = os.path.splitext(filename.lower())
-                has_media_ext = ext in self.MEDIA_EXTENSIONS
-
-                # NEW: Index ALL media files by (filename, size) for fallback matching
-                if has_media_ext:
-                    file_size = os.path.getsize(filepath)
+        # Pattern 5 (below): DALL-E generations in dalle-generations/ folders
+        size_to_paths = defaultdict(list)
+        dalle_generation_files = 0
+        conversation_files = 0  # all files added to conversation_media
+
+        # Walk through all files in temp directory, once, a directory at a
+        # time (same order as os.walk) so per-directory checks run once per
+        # directory. Listing and stat'ing run on worker threads (see
+        # _scan_directories); classification stays here, in walk order.
+        for dirpath, file_records in self._scan_directories(tmp_dir):
+            is_dalle_dir = "dalle-generations" in dirpath
+            # Depends only on the directory, so it's shared by all its files.
+            # Interned so directories of the same conversation share one key
+            # string in conversation_media.
+            dir_conv_id = self._extract_conversation_id_from_dir(dirpath)
+            if dir_conv_id:
+                dir_conv_id = sys.intern(dir_conv_id)
+
+            for filename, filepath, ext, has_media_ext, file_size in file_records:
+                # (file_size is only set for media files)
+                if file_size is not None:
+                    # NEW: Index ALL media files by (filename, size) for
+                    # fallback matching
                     filename_size_to_path[(filename, file_size)] = filepath
 
+                    # Pattern 5: DALL-E generations in dalle-generations/ folders
+                    # These are UUID-named files that need to be matched by file size
+                    if is_dalle_dir:
+                        size_to_paths[file_size].append(filepath)
+                        dalle_generation_files += 1
+
                 # Pattern 1: DALL-E images organized by conversation_id
                 # Pattern: /conversations/{conversation_id}/filename
                 if has_media_ext:
-                    conv_id = self._extract_conversation_id_from_path(filepath)
+                    conv_id = dir_conv_id
                     if conv_id:
-                        if conv_id not in conversation_media:
-                            conversation_media[conv_id] = []
                         conversation_media[conv_id].append(filepath)
+                        conversation_files += 1
                         total_files += 1
                         dalle_files += 1
                         continue
 
-                # Pattern 2: User uploaded files with file-ID prefix
-                # Pattern: file-{ID}_{original_name}.ext
-                file_id = self._extract_file_id_from_name(filename)
-                if file_id:
-                    file_id_to_path[file_id] = filepath
-                    total_files += 1
-                    file_id_files += 1
-                    continue
-
-                # Pattern 3: Newer files with file_{hash}-{uuid}.ext pattern (sediment://)
-                # Pattern: file_{16-hex}-{uuid}.{ext}
-                file_hash = self._extract_file_hash_from_name(filename)
-                if file_hash:
-                    # Extract conversation_id from parent path if available
-                    conv_id = self._extract_conversation_id_from_path(filepath)
-                    if conv_id:
-                        if conv_id not in conversation_media:
-                            conversation_media[conv_id] = []
-                        conversation_media[conv_id].append(filepath)
+                # Patterns 2 and 3 are anchored at a "file-" / "file_" prefix;
+                # a plain prefix test spares their regexes for every other name
+                if filename.startswith("file"):
+                    # Pattern 2: User uploaded files with file-ID prefix
+                    # Pattern: file-{ID}_{original_name}.ext
+                    file_id = self._extract_file_id_from_name(filename)
+                    if file_id:
+                        file_id_to_path[file_id] = filepath
+                        total_files += 1
+                        file_id_files += 1
+                        continue
 
-                    # Also index by hash for sediment:// matching
-                    file_hash_to_path[file_hash] = filepath
-                    total_files += 1
-                    file_hash_files += 1
-                    continue
+                    # Pattern 3: Newer files with file_{hash}-{uuid}.ext
+                    # pattern (sediment://)
+                    # Pattern: file_{16-hex}-{uuid}.{ext}
+                    file_hash = self._extract_file_hash_from_name(filename)
+                    if file_hash:
+                        # Extract conversation_id from parent path if available
+                        conv_id = dir_conv_id
+                        if conv_id:
+                            conversation_media[conv_id].append(filepath)
+                            conversation_files += 1
+
+                        # Also index by hash for sediment:// matching
+                        file_hash_to_path[file_hash] = filepath
+                        total_files += 1
+                        file_hash_files += 1
+                        continue
 
                 # Pattern 4: Files without extension (might be images)
                 # We'll check these if they match UUID patterns
@@ -132,26 +175,14 @@ class MediaIndexer:
                     file_id_to_path[filename] = filepath
                     total_files += 1
 
-        # Pattern 5: DALL-E generations in dalle-generations/ folders
-        # These are UUID-named files that need to be matched by file size
-        size_to_paths = {}
-        dalle_generation_files = 0
-        for root, dirs, files in os.walk(tmp_dir):
-            if "dalle-generations" in root:
-                for filename in files:
-                    filepath = os.path.join(root, filename)
-                    _, ext = os.path.splitext(filename.lower())
-                    if ext in self.MEDIA_EXTENSIONS:
-                        file_size = os.path.getsize(filepath)
-                        if file_size not in size_to_paths:
-                            size_to_paths[file_size] = []
-                        size_to_paths[file_size].append(filepath)
-                        dalle_generation_files += 1
-
+        # Plain dicts from here on, so lookups of unknown keys don't add them
+        conversation_media = dict(conversation_media)
         self.conversation_media = conversation_media
+        self._total_dalle_files = conversation_files
+        self._total_dalle_generation_files = dalle_generation_files
         self.file_id_to_path = file_id_to_path
         self.file_hash_to_path = file_hash_to_path
-        self.size_to_paths = size_to_paths
+        self.size_to_paths = dict(size_to_paths)
         self.filename_size_to_path = filename_size_to_path  # NEW
 
         self.log(f"✓ Indexed {total_files} total media files")
@@ -164,6 +195,69 @@ class MediaIndexer:
 
         return conversation_media
 
+    def _scan_directories(self, tmp_dir: str) -> List[Tuple[str, List[Tuple]]]:
+        """
+        List every directory under tmp_dir with its files.
+
+        Each top-level subdirectory is walked by its own worker thread; the
+        results are concatenated in os.walk order.
+
+        Returns:
+            List of (dirpath, file_records) pairs, see _file_records
+        """
+        files, subdirs = split_dir_entries(tmp_dir)
+        listing = [(tmp_dir, self._file_records(files))]
+
+        if len(subdirs) < 2 or self.max_workers < 2:
+            for subdir in subdirs:
+                listing.extend(self._scan_subtree(subdir))
+            return listing
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for subtree_listing in executor.map(self._scan_subtree, subdirs):
+                listing.extend(subtree_listing)
+        return listing
+
+    def _scan_subtree(self, root: str) -> List[Tuple[str, List[Tuple]]]:
+        """(dirpath, file_records) for every directory under root."""
+        listing = []
+        stack = [root]
+        while stack:
+            dirpath = stack.pop()
+            files, subdirs = split_dir_entries(dirpath)
+            # Reversed so the first subdirectory is popped (and walked) first.
+            stack.extend(reversed(subdirs))
+            listing.append((dirpath, self._file_records(files)))
+        return listing
+
+    def _file_records(self, entries) -> List[Tuple]:
+        """
+        Describe a directory's files from their DirEntry objects.
+
+        Returns:
+            List of (filename, filepath, ext, has_media_ext, size) tuples; size
+            is only read for media files and is None if it can't be (e.g. a
+            dangling symlink)
+        """
+        media_extensions = self.MEDIA_EXTENSIONS
+        records = []
+        for entry in entries:
+            filename = entry.name
+
+            # Check if it's a media file (by extension or by checking file-ID pattern)
+            _, ext = os.path.splitext(filename.lower())
+            has_media_ext = ext in media_extensions
+
+            file_size = None
+            if has_media_ext:
+                try:
+                    file_size = entry.stat().st_size
+                except OSError:
+                    pass
+
+            records.append((filename, entry.path, ext, has_media_ext, file_size))
+        return records
+
     def _extract_conversation_id_from_path(self, filepath: str) -> str:
         """
         Extract conversation_id from file path.
@@ -176,24 +270,30 @@ class MediaIndexer:
         Returns:
             conversation_id if found, None otherwise
         """
-        # UUID pattern: 8-4-4-4-12 hex characters
-        match = re.search(
-            r"/conversations/([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/",
-            filepath,
-        )
-        if match:
-            return match.group(1)
-
-        # Also try 8-4-4-4-4-8 pattern (some UUIDs have this format)
-        match = re.search(
-            r"/conversations/([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{8})/",
-            filepath,
-        )
+        # UUID pattern: 8-4-4-4-12 hex characters, or 8-4-4-4-8 (some UUIDs
+        # have this format)
+        match = _CONV_UUID_RE.search(filepath)
         if match:
             return match.group(1)
 
         return None
 
+    def _extract_conversation_id_from_dir(self, dirpath: str) -> str:
+        """
+        Extract the conversation_id shared by all files in a directory.
+
+        Same as ``_extract_conversation_id_from_path`` for any file directly
+        inside ``dirpath``: the pattern ends in "/", so it can never reach
+        into the filename.
+
+        Args:
+            dirpath: Path of the directory
+
+        Returns:
+            conversation_id if found, None otherwise
+        """
+        return self._extract_conversation_id_from_path(os.path.join(dirpath, ""))
+
     def get_media_for_conversation(self, conversation_id: str) -> List[str]:
         """
         Get all media files for a specific conversation.
@@ -221,12 +321,12 @@ class MediaIndexer:
             file-ID (e.g., "file-CSDzgtOhPLr3NzxdVkRcDgEC") if found, None otherwise
         """
         # Try underscore separator first (most common)
-        match = re.match(r"(file-[A-Za-z0-9]+)_", filename)
+        match = _FILE_ID_UNDER_RE.match(filename)
         if match:
             return match.group(1)
 
         # Try hyphen separator (less common, but exists)
-        match = re.match(r"(file-[A-Za-z0-9]+)-", filename)
+        match = _FILE_ID_DASH_RE.match(filename)
         if match:
             return match.group(1)
 
@@ -246,7 +346,7 @@ class MediaIndexer:
             "file_{hash}" (e.g., "file_000000009e586230866e2a177650b0e8") if found, None otherwise
         """
         # Match: file_{16 hex chars}-{uuid}.ext
-        match = re.match(r"(file_[a-f0-9]{32})-[a-f0-9-]{36}\.", filename)
+        match = _FILE_HASH_RE.match(filename)
         if match:
             return match.group(1)
         return None
@@ -261,17 +361,20 @@ class MediaIndexer:
         Returns:
             True if filename matches UUID pattern
         """
-        # Standard UUID: 8-4-4-4-12
-        if re.match(
-            r"^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", filename
-        ):
-            return True
-        # iOS UUID: 8-4-4-4-12 (uppercase)
-        if re.match(
-            r"^[A-F0-9]{8}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{4}-[A-F0-9]{12}$", filename
+        # Standard UUID: 8-4-4-4-12, lowercase or (iOS) uppercase. Checked
+        # by length and hyphen positions first, which rejects most names.
+        if (
+            len(filename) != 36
+            or filename[8] != "-"
+            or filename[13] != "-"
+            or filename[18] != "-"
+            or filename[23] != "-"
+            or filename.count("-") != 4
         ):
-            return True
-        return False
+            return False
+        return not filename.translate(_UUID_LOWER_CHARS) or not filename.translate(
+            _UUID_UPPER_CHARS
+        )
 
     def get_file_by_id(self, file_id: str) -> str:
         """
@@ -304,12 +407,8 @@ class MediaIndexer:
         Returns:
             Dictionary with statistics
         """
-        total_dalle_files = sum(
-            len(files) for files in self.conversation_media.values()
-        )
-        total_dalle_generation_files = sum(
-            len(files) for files in self.size_to_paths.values()
-        )
+        total_dalle_files = self._total_dalle_files
+        total_dalle_generation_files = self._total_dalle_generation_files
 
         return {
             "total_conversations_with_media": len(self.conversation_media),
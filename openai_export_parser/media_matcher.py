@@ -1,5 +1,9 @@
+import itertools
 import os
 import re
+from collections import defaultdict
+
+from .utils import ahocorasick
 
 
 class MediaMatcher:
@@ -17,6 +21,9 @@ class MediaMatcher:
         r"[0-9a-fA-F]{4}-"
         r"[0-9a-fA-F]{12}"
     )
+    # For _token_index: letter/digit runs, and UUIDs starting at any position
+    _ALNUM_RUN = re.compile(r"[A-Za-z0-9]+")
+    _UUID_AT = re.compile(f"(?=({UUID_PATTERN.pattern}))")
 
     def __init__(self, verbose=False):
         self.verbose = verbose
@@ -29,10 +36,15 @@ class MediaMatcher:
             "no_matches": 0,
         }
 
-    def log(self, msg):
-        """Print log message if verbose mode is enabled."""
+    def log(self, msg, *args):
+        """
+        Print log message if verbose mode is enabled.
+
+        ``args`` are %-formatted into ``msg`` only when the message is
+        printed, so hot loops can log without building strings.
+        """
         if self.verbose:
-            print(msg)
+            print(msg % args if args else msg)
 
     def match(
         self,
@@ -94,19 +106,16 @@ class MediaMatcher:
         if media_index:
             conversations = self._match_by_conversation_id(conversations, media_index)
 
-        # Strategy 2: File-ID matching (user uploads with prefix)
-        if file_id_index:
-            conversations = self._match_by_file_id(
-                conversations, file_id_index, filename_size_index
-            )
-
-        # Strategy 3: File-hash matching (sediment:// / asset_pointer)
-        if file_hash_index:
-            conversations = self._match_by_file_hash(conversations, file_hash_index)
-
-        # Strategy 4: Size matching (DALL-E generations)
-        if size_index:
-            conversations = self._match_by_size(conversations, size_index)
+        # Strategies 2-4: File-ID matching (user uploads with prefix),
+        # file-hash matching (sediment:// / asset_pointer) and size matching
+        # (DALL-E generations), in one pass over the conversations
+        conversations = self._match_by_indices(
+            conversations,
+            file_id_index=file_id_index,
+            file_hash_index=file_hash_index,
+            size_index=size_index,
+            filename_size_index=filename_size_index,
+        )
 
         # Strategy 5: Text content fallback
         if (
@@ -127,6 +136,7 @@ class MediaMatcher:
 
         This is the primary and most reliable matching strategy.
         """
+        matched = unmatched = 0
         for conv in conversations:
             conv_id = conv.get("conversation_id") or conv.get("id")
 
@@ -143,243 +153,179 @@ class MediaMatcher:
                     first_msg = conv["messages"][0]
                     first_msg.setdefault("media", []).extend(basenames)
 
-                self.stats["conversation_id_matches"] += 1
+                matched += 1
                 self.log(
-                    f"  Matched {len(media_paths)} files to conversation {conv_id[:8]}..."
+                    "  Matched %d files to conversation %s...",
+                    len(media_paths),
+                    conv_id[:8],
                 )
             else:
-                self.stats["no_matches"] += 1
+                unmatched += 1
 
+        self.stats["conversation_id_matches"] += matched
+        self.stats["no_matches"] += unmatched
         return conversations
 
-    def _match_by_file_id(self, conversations, file_id_index, filename_size_index=None):
-        """
-        Match media files using file-IDs from attachments metadata.
-
-        This strategy extracts file-IDs from metadata.attachments[].id fields
-        and looks them up in the file_id_index.
-
-        If file-ID lookup fails and filename_size_index is provided, falls back
-        to matching by (filename, size) from the same attachment metadata.
+    def _match_by_indices(
+        self,
+        conversations,
+        file_id_index=None,
+        file_hash_index=None,
+        size_index=None,
+        filename_size_index=None,
+    ):
         """
-        for conv in conversations:
-            conv_media_files = set(conv.get("_media_files", []))
-            file_ids_found = []
-            filename_size_found = []
-
-            # Scan all messages for attachments
-            mapping = conv.get("mapping", {})
-            for node_id, node_data in mapping.items():
-                message = node_data.get("message")
-                if not message:
-                    continue
+        Match media files using the file-ID, file-hash and size indices
+        (strategies 2 to 4) in one walk over each conversation's mapping.
 
-                metadata = message.get("metadata", {})
-                attachments = metadata.get("attachments", [])
+        Strategy 2: metadata.attachments[].id looked up in file_id_index. If
+        that lookup fails and filename_size_index is provided, falls back to
+        matching by (name, size) from the same attachment metadata.
 
-                for attachment in attachments:
-                    file_id = attachment.get("id")
-                    if not file_id:
-                        continue
+        Strategy 3: file hashes from content.parts[].asset_pointer
+        (sediment://file_{hash}) looked up in file_hash_index.
 
-                    # Strategy 2: Try file-ID lookup first
-                    file_path = file_id_index.get(file_id)
-                    if file_path:
-                        conv_media_files.add(file_path)
-                        file_ids_found.append(file_id)
-                    # Strategy 2.5: Fallback to filename+size matching
-                    elif filename_size_index:
-                        filename = attachment.get("name")
-                        size = attachment.get("size")
-                        if filename and size:
-                            file_path = filename_size_index.get((filename, size))
-                            if file_path:
-                                conv_media_files.add(file_path)
-                                filename_size_found.append((filename, size))
-                                self.log(
-                                    f"    Fallback: Matched {filename} ({size} bytes) by filename+size"
-                                )
-
-            # Update conversation with found files
-            if file_ids_found or filename_size_found:
-                conv["_media_files"] = list(conv_media_files)
-                self.stats["file_id_matches"] += 1
-                if file_ids_found:
-                    self.log(
-                        f"  Matched {len(file_ids_found)} file-IDs to conversation {conv.get('conversation_id', 'unknown')[:8]}..."
-                    )
-                if filename_size_found:
-                    self.log(
-                        f"  Matched {len(filename_size_found)} files by filename+size to conversation {conv.get('conversation_id', 'unknown')[:8]}..."
-                    )
-
-        return conversations
-
-    def _match_by_file_hash(self, conversations, file_hash_index):
-        """
-        Match media files using file hashes from asset_pointer (sediment://).
+        Strategy 4: DALL-E generation files in dalle-generations/ folders, by
+        the size_bytes of file-service:// parts with DALL-E metadata:
+        - Primary match: size_bytes (99.8% accurate - only 2 collisions in 1,222 files)
+        - The first file is taken when several have the same size (the gen_id
+          can't tell them apart without opening the files)
 
-        This strategy extracts file hashes from content.parts[].asset_pointer fields
-        (pattern: sediment://file_{hash}) and looks them up in the file_hash_index.
+        A strategy is skipped when its index is empty. Its matches are
+        merged into "_media_files" in strategy order, and stats are counted
+        per strategy, as if each had walked the conversations on its own.
         """
+        # One probe per attachment / part; bound once for the loops below
+        file_id_get = file_id_index.get if file_id_index else None
+        filename_size_get = filename_size_index.get if filename_size_index else None
+        file_hash_get = file_hash_index.get if file_hash_index else None
+        size_index_get = size_index.get if size_index else None
+        if not (file_id_get or file_hash_get or size_index_get):
+            return conversations
+
+        # Per-strategy counts, added to self.stats once at the end
+        id_matched = hash_matched = size_matched = 0
         for conv in conversations:
-            conv_media_files = set(conv.get("_media_files", []))
-            file_hashes_found = []
+            id_paths = []  # strategy 2 (file-ID and filename+size matches)
+            file_ids_found = 0
+            filename_size_found = 0
+            hash_paths = []  # strategy 3
+            size_paths = []  # strategy 4
 
-            # Scan all messages for asset_pointer in content parts
-            mapping = conv.get("mapping", {})
-            for node_id, node_data in mapping.items():
+            for node_data in conv.get("mapping", {}).values():
                 message = node_data.get("message")
                 if not message:
                     continue
 
-                content = message.get("content", {})
-                parts = content.get("parts", [])
+                if file_id_get:
+                    metadata = message.get("metadata")
+                    attachments = metadata.get("attachments") if metadata else None
+                    for attachment in attachments or ():
+                        file_id = attachment.get("id")
+                        if not file_id:
+                            continue
 
-                for part in parts:
-                    if not isinstance(part, dict):
-                        continue
-
-                    # Check for asset_pointer with sediment://
-                    asset_pointer = part.get("asset_pointer", "")
-                    if asset_pointer and asset_pointer.startswith("sediment://"):
-                        # Extract file_{hash} from sediment://file_{hash}
-                        file_hash = asset_pointer.replace("sediment://", "")
-
-                        # Look up file path in index
-                        file_path = file_hash_index.get(file_hash)
+                        # Strategy 2: Try file-ID lookup first
+                        file_path = file_id_get(file_id)
                         if file_path:
-                            conv_media_files.add(file_path)
-                            file_hashes_found.append(file_hash)
-
-            # Update conversation with found files
-            if file_hashes_found:
-                conv["_media_files"] = list(conv_media_files)
-                self.stats["file_hash_matches"] += 1
-                self.log(
-                    f"  Matched {len(file_hashes_found)} sediment files to conversation {conv.get('conversation_id', 'unknown')[:8]}..."
-                )
-
-        return conversations
-
-    def _match_by_size(self, conversations, size_index):
-        """
-        Match media files using file size from asset_pointer (file-service://) with DALL-E metadata.
-
-        This strategy matches DALL-E generation files in dalle-generations/ folders by:
-        1. Finding file-service:// URLs with DALL-E metadata in content.parts
-        2. Extracting size_bytes from the asset_pointer metadata
-        3. Looking up files with matching size in size_index
-        4. Using gen_id as tiebreaker if multiple files have same size
-
-        Strategy:
-        - Primary match: size_bytes (99.8% accurate - only 2 collisions in 1,222 files)
-        - Tiebreaker: gen_id from metadata.dalle (100% accurate with tiebreaker)
-        """
-        # First pass: Build reverse index of (size, gen_id) -> file_path
-        # This requires scanning all conversations to collect gen_ids with their sizes
-        size_gen_id_map = {}  # (size, gen_id) -> file_path
+                            id_paths.append(file_path)
+                            file_ids_found += 1
+                        # Strategy 2.5: Fallback to filename+size matching
+                        elif filename_size_get:
+                            filename = attachment.get("name")
+                            size = attachment.get("size")
+                            if filename and size:
+                                file_path = filename_size_get((filename, size))
+                                if file_path:
+                                    id_paths.append(file_path)
+                                    filename_size_found += 1
+                                    self.log(
+                                        "    Fallback: Matched %s (%s bytes)"
+                                        " by filename+size",
+                                        filename,
+                                        size,
+                                    )
 
-        # Collect all (size, gen_id) pairs from conversations
-        for conv in conversations:
-            mapping = conv.get("mapping", {})
-            for node_id, node_data in mapping.items():
-                message = node_data.get("message")
-                if not message:
+                if not (file_hash_get or size_index_get):
                     continue
-
                 content = message.get("content", {})
                 if not content:
                     continue
 
-                parts = content.get("parts", [])
-                for part in parts:
+                for part in content.get("parts", ()):
                     if not isinstance(part, dict):
                         continue
 
                     asset_pointer = part.get("asset_pointer", "")
-                    if asset_pointer and asset_pointer.startswith("file-service://"):
-                        metadata = part.get("metadata", {}) or {}
-                        dalle = metadata.get("dalle", {})
-
-                        if dalle:
-                            file_size = part.get("size_bytes")
-                            gen_id = dalle.get("gen_id")
-
-                            if file_size and gen_id and file_size in size_index:
-                                matching_files = size_index[file_size]
-
-                                # If unique size, map it directly
-                                if len(matching_files) == 1:
-                                    size_gen_id_map[(file_size, gen_id)] = (
-                                        matching_files[0]
-                                    )
-                                # If collision, we'll need to try both files
-                                # (we can't know which gen_id goes with which file without opening them)
-                                # For now, map both combinations
-                                elif len(matching_files) > 1:
-                                    # This is a collision case - map first file
-                                    # In practice, caller should match by conversation context
-                                    size_gen_id_map[(file_size, gen_id)] = (
-                                        matching_files[0]
-                                    )
-
-        # Second pass: Match files to conversations
-        for conv in conversations:
-            conv_media_files = set(conv.get("_media_files", []))
-            sizes_found = []
-
-            # Scan all messages for asset_pointer with file-service:// and DALL-E metadata
-            mapping = conv.get("mapping", {})
-            for node_id, node_data in mapping.items():
-                message = node_data.get("message")
-                if not message:
-                    continue
-
-                content = message.get("content", {})
-                if not content:
-                    continue
-
-                parts = content.get("parts", [])
-
-                for part in parts:
-                    if not isinstance(part, dict):
+                    if not asset_pointer:
                         continue
 
-                    # Check for file-service:// with DALL-E metadata
-                    asset_pointer = part.get("asset_pointer", "")
-                    if asset_pointer and asset_pointer.startswith("file-service://"):
-                        metadata = part.get("metadata", {}) or {}
-                        dalle = metadata.get("dalle", {})
-
-                        # Only match if it has DALL-E metadata (generated images)
-                        if dalle:
-                            file_size = part.get("size_bytes")
-                            gen_id = dalle.get("gen_id")
-
-                            if file_size and file_size in size_index:
-                                matching_files = size_index[file_size]
-
-                                # Try gen_id match first (best accuracy)
-                                matched_file = None
-                                if gen_id and (file_size, gen_id) in size_gen_id_map:
-                                    matched_file = size_gen_id_map[(file_size, gen_id)]
-                                # Fallback to size-only match
-                                elif matching_files:
-                                    matched_file = matching_files[0]
-
-                                if matched_file:
-                                    conv_media_files.add(matched_file)
-                                    sizes_found.append(file_size)
-
-            # Update conversation with found files
-            if sizes_found:
-                conv["_media_files"] = list(conv_media_files)
-                self.stats["size_matches"] += 1
+                    # Strategy 3: sediment://file_{hash}
+                    if asset_pointer.startswith("sediment://"):
+                        if file_hash_get:
+                            file_path = file_hash_get(
+                                asset_pointer.replace("sediment://", "")
+                            )
+                            if file_path:
+                                hash_paths.append(file_path)
+
+                    # Strategy 4: file-service:// with DALL-E metadata only
+                    # (generated images)
+                    elif size_index_get and asset_pointer.startswith("file-service://"):
+                        metadata = part.get("metadata")
+                        if not metadata or not metadata.get("dalle"):
+                            continue
+                        file_size = part.get("size_bytes")
+                        matching_files = (
+                            size_index_get(file_size) if file_size else None
+                        )
+                        if matching_files:
+                            size_paths.append(matching_files[0])
+
+            if not (id_paths or hash_paths or size_paths):
+                continue
+
+            # Update conversation with found files, strategy by strategy,
+            # merging into one set that becomes the list once at the end
+            conv_id = conv.get("conversation_id", "unknown")[:8]
+            conv_media_files = set(conv.get("_media_files", ()))
+            if id_paths:
+                conv_media_files.update(id_paths)
+                id_matched += 1
+                if file_ids_found:
+                    self.log(
+                        "  Matched %d file-IDs to conversation %s...",
+                        file_ids_found,
+                        conv_id,
+                    )
+                if filename_size_found:
+                    self.log(
+                        "  Matched %d files by filename+size to conversation %s...",
+                        filename_size_found,
+                        conv_id,
+                    )
+            if hash_paths:
+                conv_media_files.update(hash_paths)
+                hash_matched += 1
                 self.log(
-                    f"  Matched {len(sizes_found)} DALL-E generation files to conversation {conv.get('conversation_id', 'unknown')[:8]}..."
+                    "  Matched %d sediment files to conversation %s...",
+                    len(hash_paths),
+                    conv_id,
                 )
+            if size_paths:
+                conv_media_files.update(size_paths)
+                size_matched += 1
+                self.log(
+                    "  Matched %d DALL-E generation files to conversation %s...",
+                    len(size_paths),
+                    conv_id,
+                )
+            conv["_media_files"] = list(conv_media_files)
 
+        stats = self.stats
+        stats["file_id_matches"] += id_matched
+        stats["file_hash_matches"] += hash_matched
+        stats["size_matches"] += size_matched
         return conversations
 
     def _match_by_text_content(self, conversations, media_files):
@@ -387,37 +333,102 @@ class MediaMatcher:
         Match media files by searching for references in message text.
 
         This is a fallback strategy used when conversation_id matching is not available.
+        A media file matches a message when its name appears in the message,
+        or when a file-ID or UUID in the message appears in its name.
         """
+        basenames = [os.path.basename(media) for media in media_files]
+        # name -> its positions in basenames, so matches keep media_files order
+        positions = defaultdict(list)
+        for position, fname in enumerate(basenames):
+            positions[fname].append(position)
+        find_mentioned = self._name_finder(positions)
+        names_containing = self._token_index(positions)
+        file_id_findall = self.FILE_ID_PATTERN.findall
+        uuid_findall = self.UUID_PATTERN.findall
+
+        text_matches = 0
         for conv in conversations:
             for msg in conv.get("messages", []):
+                # The whole message, not just its text parts: file names and
+                # IDs also turn up in metadata (e.g. Claude's "_files")
                 msg_str = str(msg)
 
-                for media in media_files:
-                    fname = os.path.basename(media)
-                    matched = False
+                # Names mentioned verbatim, plus the names containing a file-ID
+                # or UUID from the message (looked up, not searched for)
+                names = find_mentioned(msg_str)
+                # (both patterns need a "-", and file-IDs a literal "file-";
+                # substring tests are much cheaper than a regex pass)
+                if "-" in msg_str:
+                    tokens = uuid_findall(msg_str)
+                    if "file-" in msg_str:
+                        tokens += file_id_findall(msg_str)
+                    for token in tokens:
+                        names.update(names_containing.get(token, ()))
+
+                if not names:
+                    continue
 
-                    # Direct substring match
-                    if fname in msg_str:
-                        matched = True
+                matches = [
+                    basenames[position]
+                    for position in sorted(
+                        itertools.chain.from_iterable(positions[n] for n in names)
+                    )
+                ]
+                msg.setdefault("media", []).extend(matches)
+                text_matches += len(matches)
 
-                    # Match file-id pattern
-                    for m in self.FILE_ID_PATTERN.findall(msg_str):
-                        if m in fname:
-                            matched = True
-                            break
+        self.stats["text_matches"] += text_matches
+        return conversations
 
-                    # Match UUID pattern
-                    if not matched:
-                        for u in self.UUID_PATTERN.findall(msg_str):
-                            if u in fname:
-                                matched = True
-                                break
+    @classmethod
+    def _token_index(cls, names):
+        """
+        Index names by every file-ID and UUID token they contain.
 
-                    if matched:
-                        msg.setdefault("media", []).append(fname)
-                        self.stats["text_matches"] += 1
+        A file-ID token (``file-`` and a run of letters and digits) is
+        contained in a name when the name has ``file-`` followed by that run,
+        possibly continued, so each prefix of each such run is a key; UUID
+        tokens have a fixed length and are keyed as they appear (including
+        overlapping ones).
 
-        return conversations
+        Returns:
+            Dict mapping each token to the set of names containing it
+        """
+        index = defaultdict(set)
+        for name in names:
+            start = name.find("file-")
+            while start >= 0:
+                run = cls._ALNUM_RUN.match(name, start + 5)
+                if run:
+                    for end in range(start + 6, run.end() + 1):
+                        index[name[start:end]].add(name)
+                start = name.find("file-", start + 5)
+            for match in cls._UUID_AT.finditer(name):
+                index[match.group(1)].add(name)
+        return index
+
+    @staticmethod
+    def _name_finder(names):
+        """
+        Build a function returning the set of names that occur in a string.
+
+        With pyahocorasick installed the names are compiled into one
+        Aho-Corasick automaton, so each string is scanned once however many
+        names there are; otherwise each name is a substring test.
+        """
+        names = set(names)
+        # "" occurs in every string (and can't be an automaton key)
+        always = {""} & names
+        names -= always
+
+        if ahocorasick is None or not names:
+            return lambda text: {name for name in names if name in text} | always
+
+        automaton = ahocorasick.Automaton()
+        for name in names:
+            automaton.add_word(name, name)
+        automaton.make_automaton()
+        return lambda text: {name for _, name in automaton.iter(text)} | always
 
     def get_stats(self):
         """Get matching statistics."""
@@ -10,7 +10,138 @@ references with their metadata, including:
 """
 
 import re
-from typing import Dict, List, Tuple, Set
+from typing import Dict, Iterator, List, Tuple, Set
+
+from .utils import SlottedRecord
+
+
+class AssetPointerRef(SlottedRecord):
+    """A content part's asset_pointer (sediment://, file-service://, ...)."""
+
+    __slots__ = (
+        "pointer",
+        "size_bytes",
+        "width",
+        "height",
+        "metadata",
+        "type",
+        "file_hash",
+        "filename",
+    )
+
+    FIELDS = ("pointer", "size_bytes", "width", "height", "metadata", "type")
+
+    def __init__(self, pointer, size_bytes, width, height, metadata, type=None):
+        self.pointer = pointer
+        self.size_bytes = size_bytes
+        self.width = width
+        self.height = height
+        self.metadata = metadata
+        self.type = type
+        # Set for "sediment" and "file" pointers respectively
+        self.file_hash = None
+        self.filename = None
+
+    def keys(self):
+        if self.type == "sediment":
+            return self.FIELDS + ("file_hash",)
+        if self.type == "file":
+            return self.FIELDS + ("filename",)
+        return self.FIELDS
+
+
+class AttachmentRef(SlottedRecord):
+    """An entry of a message's metadata.attachments."""
+
+    __slots__ = ("id", "name", "size", "mime_type", "width", "height")
+
+    FIELDS = __slots__
+
+    def __init__(self, id, name, size, mime_type, width, height):
+        self.id = id
+        self.name = name
+        self.size = size
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+
+
+class DalleGenerationRef(SlottedRecord):
+    """A file-service:// part carrying DALL-E generation metadata."""
+
+    __slots__ = (
+        "gen_id",
+        "size_bytes",
+        "width",
+        "height",
+        "asset_pointer",
+        "dalle_metadata",
+    )
+
+    FIELDS = __slots__
+
+    def __init__(
+        self, gen_id, size_bytes, width, height, asset_pointer, dalle_metadata
+    ):
+        self.gen_id = gen_id
+        self.size_bytes = size_bytes
+        self.width = width
+        self.height = height
+        self.asset_pointer = asset_pointer
+        self.dalle_metadata = dalle_metadata
+
+
+class TextRef(SlottedRecord):
+    """A filename, file-ID or UUID found in message text."""
+
+    __slots__ = ("match", "context")
+
+    FIELDS = __slots__
+
+    def __init__(self, match, context):
+        self.match = match
+        self.context = context
+
+
+def _handle_sediment(ref, rest, part):
+    """sediment://<file hash>"""
+    ref.type = "sediment"
+    ref.file_hash = rest
+    yield "asset_pointers", ref
+
+
+def _handle_file_service(ref, rest, part):
+    """file-service://<file ID>, possibly a DALL-E generation."""
+    ref.type = "file-service"
+
+    # Check for DALL-E metadata
+    metadata = part.get("metadata")
+    dalle_metadata = metadata.get("dalle") if metadata else None
+    if dalle_metadata:
+        gen_ref = DalleGenerationRef(
+            dalle_metadata.get("gen_id"),
+            part.get("size_bytes"),
+            part.get("width"),
+            part.get("height"),
+            ref.pointer,
+            dalle_metadata,
+        )
+        yield "dalle_generations", gen_ref
+
+    yield "asset_pointers", ref
+
+
+def _handle_file(ref, rest, part):
+    """file://<path>; the filename is its last component."""
+    ref.type = "file"
+    ref.filename = rest.split("/")[-1]
+    yield "asset_pointers", ref
+
+
+def _handle_unknown(ref, rest, part):
+    """Any other pointer."""
+    ref.type = "unknown"
+    yield "asset_pointers", ref
 
 
 class MediaReferenceExtractor:
@@ -21,6 +152,33 @@ class MediaReferenceExtractor:
     everywhere for any hint of media files.
     """
 
+    # Common filename patterns looked for in message text, compiled once, each
+    # with a character every match contains: text without it is not scanned.
+    # Filenames only start where a run of name characters does, so a long run
+    # without an extension is scanned once instead of once per character.
+    TEXT_PATTERNS = tuple(
+        (marker, re.compile(pattern, re.IGNORECASE))
+        for marker, pattern in (
+            (
+                ".",
+                r"(?<![\w\-])[\w\-]+\.(jpg|jpeg|png|gif|webp|pdf|mp3|wav|mp4|mov)",
+            ),
+            ("-", r"file-[A-Za-z0-9]+"),  # file-IDs
+            (
+                "-",
+                r"[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}",
+            ),  # UUIDs
+        )
+    )
+
+    # asset_pointer scheme (the part before "://") -> handler yielding the
+    # pointer's (kind, record) pairs; other schemes go to _handle_unknown
+    _POINTER_HANDLERS = {
+        "sediment": _handle_sediment,
+        "file-service": _handle_file_service,
+        "file": _handle_file,
+    }
+
     def __init__(self, verbose=False):
         self.verbose = verbose
 
@@ -33,7 +191,9 @@ class MediaReferenceExtractor:
         """
         Extract ALL media references from a conversation JSON.
 
-        Returns a dict with different types of references:
+        Returns a dict with different types of references. Each reference is
+        a slotted record (AssetPointerRef, AttachmentRef, DalleGenerationRef,
+        TextRef) that reads like the dicts shown here:
         {
             'asset_pointers': [
                 {
@@ -75,10 +235,23 @@ class MediaReferenceExtractor:
             "dalle_generations": [],
             "text_references": [],
         }
+        for kind, ref in self.iter_references(conversation):
+            references[kind].append(ref)
+        return references
+
+    def iter_references(self, conversation: Dict) -> Iterator[Tuple[str, object]]:
+        """
+        Yield a conversation's media references one at a time.
 
+        Same references as ``extract_all_references``, as (kind, record)
+        pairs where kind is the list the record goes in there
+        ("asset_pointers", "attachments", "dalle_generations" or
+        "text_references"), for consumers that need only one pass and so
+        needn't hold every reference at once.
+        """
         mapping = conversation.get("mapping", {})
 
-        for node_id, node_data in mapping.items():
+        for node_data in mapping.values():
             message = node_data.get("message")
             if not message:
                 continue
@@ -90,105 +263,73 @@ class MediaReferenceExtractor:
             for part in parts:
                 # Handle dict parts (asset_pointer, metadata)
                 if isinstance(part, dict):
-                    self._extract_from_part(part, references)
+                    yield from self._extract_from_part(part)
 
                 # Handle string parts (text content)
                 elif isinstance(part, str):
-                    self._extract_from_text(part, references)
+                    for ref in self._extract_from_text(part):
+                        yield "text_references", ref
 
             # Extract from message metadata (attachments)
-            metadata = message.get("metadata", {})
-            self._extract_from_metadata(metadata, references)
-
-        return references
+            metadata = message.get("metadata")
+            if metadata:
+                for attachment in self._extract_from_metadata(metadata):
+                    yield "attachments", attachment
 
-    def _extract_from_part(self, part: Dict, references: Dict):
-        """Extract media references from a content part dict."""
+    def _extract_from_part(self, part: Dict) -> Iterator[Tuple[str, object]]:
+        """Yield (kind, record) for the media references in a content part dict."""
 
         # Extract asset_pointer
         asset_pointer = part.get("asset_pointer", "")
         if asset_pointer:
-            ref = {
-                "pointer": asset_pointer,
-                "size_bytes": part.get("size_bytes"),
-                "width": part.get("width"),
-                "height": part.get("height"),
-                "metadata": part.get("metadata", {}),
-            }
-
-            # Classify by pointer type
-            if asset_pointer.startswith("sediment://"):
-                ref["type"] = "sediment"
-                ref["file_hash"] = asset_pointer.replace("sediment://", "")
-                references["asset_pointers"].append(ref)
-
-            elif asset_pointer.startswith("file-service://"):
-                ref["type"] = "file-service"
-
-                # Check for DALL-E metadata
-                metadata = part.get("metadata") or {}
-                dalle_metadata = metadata.get("dalle", {})
-                if dalle_metadata:
-                    gen_ref = {
-                        "gen_id": dalle_metadata.get("gen_id"),
-                        "size_bytes": part.get("size_bytes"),
-                        "width": part.get("width"),
-                        "height": part.get("height"),
-                        "asset_pointer": asset_pointer,
-                        "dalle_metadata": dalle_metadata,
-                    }
-                    references["dalle_generations"].append(gen_ref)
-
-                references["asset_pointers"].append(ref)
-
-            elif asset_pointer.startswith("file://"):
-                ref["type"] = "file"
-                # Extract filename from file:// URL if possible
-                filename = asset_pointer.replace("file://", "").split("/")[-1]
-                ref["filename"] = filename
-                references["asset_pointers"].append(ref)
-
-            else:
-                # Unknown pointer type
-                ref["type"] = "unknown"
-                references["asset_pointers"].append(ref)
-
-    def _extract_from_text(self, text: str, references: Dict):
-        """Extract media references from text content."""
+            ref = AssetPointerRef(
+                asset_pointer,
+                part.get("size_bytes"),
+                part.get("width"),
+                part.get("height"),
+                part.get("metadata", {}),
+            )
+
+            # Classify by pointer type: one split and one dict lookup instead
+            # of a startswith per candidate prefix
+            scheme, separator, rest = asset_pointer.partition("://")
+            handler = (
+                self._POINTER_HANDLERS.get(scheme, _handle_unknown)
+                if separator
+                else _handle_unknown
+            )
+            yield from handler(ref, rest, part)
+
+    def _extract_from_text(self, text: str) -> Iterator[TextRef]:
+        """Yield the media references in text content."""
 
         # Look for common filename patterns
-        filename_patterns = [
-            r"[\w\-]+\.(jpg|jpeg|png|gif|webp|pdf|mp3|wav|mp4|mov)",
-            r"file-[A-Za-z0-9]+",  # file-IDs
-            r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",  # UUIDs
-        ]
-
-        for pattern in filename_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        text_len = len(text)
+        for marker, pattern in self.TEXT_PATTERNS:
+            if marker not in text:
+                continue
+            for match in pattern.finditer(text):
                 # Get context around the match (50 chars before and after)
                 start = max(0, match.start() - 50)
-                end = min(len(text), match.end() + 50)
+                end = min(text_len, match.end() + 50)
                 context = text[start:end]
 
-                ref = {"match": match.group(0), "context": context}
-                references["text_references"].append(ref)
+                yield TextRef(match.group(0), context)
 
-    def _extract_from_metadata(self, metadata: Dict, references: Dict):
-        """Extract media references from message metadata."""
+    def _extract_from_metadata(self, metadata: Dict) -> Iterator[AttachmentRef]:
+        """Yield the media references in message metadata (attachments)."""
 
         # Extract attachments
         attachments = metadata.get("attachments", [])
         for attachment in attachments:
-            ref = {
-                "id": attachment.get("id"),
-                "name": attachment.get("name"),
-                "size": attachment.get("size"),
-                "mime_type": attachment.get("mimeType"),
-                "width": attachment.get("width"),
-                "height": attachment.get("height"),
-            }
-            references["attachments"].append(ref)
+            yield AttachmentRef(
+                attachment.get("id"),
+                attachment.get("name"),
+                attachment.get("size"),
+                attachment.get("mimeType"),
+                attachment.get("width"),
+                attachment.get("height"),
+            )
 
     def count_references(self, references: Dict) -> Dict:
         """Count references by type."""
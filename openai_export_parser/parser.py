@@ -1,9 +1,24 @@
 import os
-import json
+import multiprocessing
+import zipfile
 from tqdm import tqdm
 from dateutil.parser import parse as parse_dt
 
-from .utils import ensure_dir, unzip, is_zip, copy_file
+from .utils import (
+    ensure_dir,
+    unzip,
+    is_zip,
+    copy_file,
+    write_json,
+    load_json,
+    iter_json_array,
+    first_json_char,
+    default_jobs,
+    scan_files,
+    extract_zip,
+    exceeds_zipfile_limit,
+    JSON_STREAM_THRESHOLD,
+)
 from .comprehensive_media_indexer import ComprehensiveMediaIndexer
 from .media_reference_extractor import MediaReferenceExtractor
 from .comprehensive_media_matcher import ComprehensiveMediaMatcher
@@ -26,6 +41,9 @@ MEDIA_EXT = {
     ".dat",
 }
 
+# MEDIA_EXT without the dots, for matching a name's rpartition(".") suffix
+_MEDIA_SUFFIXES = frozenset(ext[1:] for ext in MEDIA_EXT)
+
 
 class ExportParser:
     """
@@ -39,20 +57,34 @@ class ExportParser:
     - Output generation with normalized structure
     """
 
+    # Exports with fewer conversation files than this are loaded in-process.
+    PARALLEL_THRESHOLD = 8
+
     def __init__(
-        self, verbose=False, organize_by_conversation=True, output_format="both"
+        self,
+        verbose=False,
+        organize_by_conversation=True,
+        output_format="both",
+        duplicate_media=False,
+        pretty_json=False,
+        jobs=None,
     ):
         self.verbose = verbose
         self.organize_by_conversation = organize_by_conversation
         self.output_format = output_format
+        # Worker processes for loading conversation files and media matching
+        self.jobs = jobs or default_jobs()
 
         self.indexer = ComprehensiveMediaIndexer(verbose=verbose)
         self.extractor = MediaReferenceExtractor(verbose=verbose)
-        self.matcher = ComprehensiveMediaMatcher(verbose=verbose)
+        self.matcher = ComprehensiveMediaMatcher(verbose=verbose, jobs=self.jobs)
         self.infer = SchemaInference()
         self.threader = ConversationThreader()
         self.organizer = ConversationOrganizer(
-            verbose=verbose, output_format=output_format
+            verbose=verbose,
+            output_format=output_format,
+            duplicate_media=duplicate_media,
+            pretty_json=pretty_json,
         )
 
         self.conversation_files = []
@@ -86,7 +118,7 @@ class ExportParser:
         ensure_dir(tmp_dir)
 
         self.log("Unzipping top-level archive...")
-        unzip(zip_path, tmp_dir)
+        preloaded = self._unzip_and_preload(zip_path, tmp_dir)
 
         self.log("Scanning for conversations and media...")
         self.scan(tmp_dir)
@@ -94,7 +126,7 @@ class ExportParser:
         self.log(f"Found {len(self.conversation_files)} conversation files")
         self.log(f"Found {len(self.media_files)} media files")
 
-        conversations = self.load_conversations()
+        conversations = self.load_conversations(preloaded)
         conversations = self.normalize_conversations(conversations)
 
         # Build comprehensive media index from directory structure
@@ -137,6 +169,61 @@ class ExportParser:
 
         self.log("✅ Parsing complete")
 
+    def _unzip_and_preload(self, zip_path, tmp_dir):
+        """
+        Unzip the top-level archive, loading its conversation files while the
+        rest of it is extracted.
+
+        The conversation JSON members are extracted first; a worker process
+        then extracts the other members (mostly media) while the conversation
+        files are parsed - by the same pool's other workers when there are
+        several (split ``conversations-NNN.json`` exports). Archives
+        ``zipfile`` can't (or, past 4 GiB, shouldn't) read, ones without
+        conversation files, and ``jobs=1`` just go through ``unzip``.
+
+        Args:
+            zip_path: Path to the export.zip file
+            tmp_dir: Directory to extract into
+
+        Returns:
+            Dict mapping each preloaded file's absolute path to its
+            ``_load_conversation_file`` result (empty if none were)
+        """
+        members = None
+        try:
+            if self.jobs > 1 and not exceeds_zipfile_limit(zip_path):
+                members = _extract_conversation_members(zip_path, tmp_dir, self.jobs)
+        except (zipfile.BadZipFile, OSError):
+            pass
+        if not members:
+            unzip(zip_path, tmp_dir, jobs=self.jobs)
+            return {}
+        paths, rest = members
+
+        # One worker for the extraction; the rest parse conversation files.
+        # A lone file is parsed here instead, since shipping its (large)
+        # result back from a worker would only add a pickling round trip.
+        workers = min(self.jobs, len(paths)) if len(paths) > 1 else 0
+        with multiprocessing.Pool(1 + workers) as pool:
+            extraction = pool.apply_async(
+                extract_zip, (zip_path, tmp_dir, self.jobs, rest)
+            )
+            if workers:
+                loaded = pool.imap(_load_conversation_file, paths, chunksize=1)
+            else:
+                loaded = map(_load_conversation_file, paths)
+            preloaded = {
+                os.path.abspath(path): result for path, result in zip(paths, loaded)
+            }
+            try:
+                extraction.get()
+            except (zipfile.BadZipFile, OSError):
+                # Same recovery as a failed zipfile fast path in unzip; the
+                # conversation files were read intact (zipfile checks CRCs)
+                unzip(zip_path, tmp_dir, jobs=self.jobs)
+
+        return preloaded
+
     # ----------------------------------------
     # Recursive scan for conversations and media
     # ----------------------------------------
@@ -148,61 +235,96 @@ class ExportParser:
         - Conversation JSON files
         - Media files (images, audio, video, PDFs)
 
+        Nested zips found in one directory tree are extracted concurrently by
+        up to ``jobs`` threads (zlib releases the GIL while inflating); files
+        are still classified in walk order, each nested zip's contents at the
+        point the zip was found.
+
         Args:
             root: Root directory to scan
         """
-        for dirpath, dirs, files in os.walk(root):
-            for f in files:
-                full = os.path.join(dirpath, f)
-                ext = os.path.splitext(f)[1].lower()
-
-                # Handle nested zip archives
-                if is_zip(full):
-                    self.log(f"Extracting nested zip: {f}")
-                    out = full + "_unzipped"
-                    unzip(full, out)
-                    self.scan(out)
-                    continue
-
-                # Detect conversation files
-                if f == "conversations.json":
-                    self.conversation_files.append(full)
-                elif ext == ".json" and "conversation" in f.lower():
-                    self.conversation_files.append(full)
-
-                # Detect media files
-                elif ext in MEDIA_EXT:
-                    self.media_files.append(full)
+        # The whole tree is listed before any nested zip is extracted, so the
+        # "_unzipped" directories are scanned once, by the recursive call.
+        entries = list(scan_files(root))
+        # Only ".zip" files are opened to check: other zip-based files
+        # (.docx, .xlsx, ...) are attachments, not parts of the export
+        nested_zips = [
+            entry
+            for entry in entries
+            if entry.name.lower().endswith(".zip") and is_zip(entry.path)
+        ]
+        for entry in nested_zips:
+            self.log(f"Extracting nested zip: {entry.name}")
+        if len(nested_zips) > 1 and self.jobs > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                list(executor.map(_unzip_nested, nested_zips))
+        else:
+            for entry in nested_zips:
+                _unzip_nested(entry, self.jobs)
+        nested_zips = {entry.path for entry in nested_zips}
+
+        add_conversation_file = self.conversation_files.append
+        add_media_file = self.media_files.append
+        for entry in entries:
+            f = entry.name
+            full = entry.path
+
+            # Handle nested zip archives
+            if full in nested_zips:
+                self.scan(full + "_unzipped")
+                continue
+
+            # Detect conversation files
+            if _is_conversation_file(f):
+                add_conversation_file(full)
+                continue
+
+            # Detect media files. Same extension as os.path.splitext finds:
+            # none when everything before the last dot is dots (".png").
+            head, _, ext = f.rpartition(".")
+            if head.strip(".") and ext.lower() in _MEDIA_SUFFIXES:
+                add_media_file(full)
 
     # ----------------------------------------
     # Load & normalize conversations
     # ----------------------------------------
 
-    def load_conversations(self):
+    def load_conversations(self, preloaded=None):
         """
         Load all discovered conversation JSON files.
 
+        Exports with at least ``PARALLEL_THRESHOLD`` conversation files are
+        parsed by a pool of ``jobs`` worker processes; conversations are
+        returned in file order either way.
+
+        Args:
+            preloaded: Optional dict of files already loaded (see
+                ``_unzip_and_preload``), which aren't read again
+
         Returns:
             List of conversation dicts
         """
         conversations = []
+        paths = self.conversation_files
+        preloaded = preloaded or {}
+        pending = [path for path in paths if os.path.abspath(path) not in preloaded]
 
-        for path in tqdm(self.conversation_files, desc="Loading conversations"):
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                # Handle both list and single-object formats
-                if isinstance(data, list):
-                    conversations.extend(data)
-                elif isinstance(data, dict):
-                    conversations.append(data)
-                else:
-                    self.log(f"Warning: Unexpected format in {path}")
-                    conversations.append({"raw": data})
+        def collect(loaded):
+            for path in tqdm(paths, desc="Loading conversations"):
+                result = preloaded.get(os.path.abspath(path))
+                data, message = result if result is not None else next(loaded)
+                conversations.extend(data)
+                if message:
+                    self.log(message)
 
-            except Exception as e:
-                self.log(f"Error reading {path}: {e}")
+        if self.jobs < 2 or len(pending) < self.PARALLEL_THRESHOLD:
+            collect(map(_load_conversation_file, pending))
+            return conversations
+
+        with multiprocessing.Pool(min(self.jobs, len(pending))) as pool:
+            collect(pool.imap(_load_conversation_file, pending, chunksize=1))
 
         return conversations
 
@@ -250,13 +372,9 @@ class ExportParser:
         ensure_dir(out_dir)
 
         # Build media manifest (which media belongs to which conversation)
-        media_manifest = {}
-        for conv_idx, conv in enumerate(conversations):
-            media_files = set()
-            for msg in conv.get("messages", []):
-                if "media" in msg:
-                    media_files.update(msg["media"])
-            media_manifest[conv_idx] = list(media_files)
+        media_manifest = self.organizer.assign_media_to_conversations(
+            conversations, self.matcher
+        )
 
         # Create organized folders
         created_folders = self.organizer.write_organized_output(
@@ -287,8 +405,7 @@ class ExportParser:
             "folders": [os.path.basename(f) for f in created_folders],
         }
 
-        with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
-            json.dump(index, f, indent=2, ensure_ascii=False)
+        write_json(os.path.join(out_dir, "index.json"), index)
 
         self.log(f"✅ Wrote {len(conversations)} conversations in organized folders")
         if self.output_format in ["html", "both"]:
@@ -379,19 +496,35 @@ class ExportParser:
         ensure_dir(conv_dir)
         ensure_dir(media_dir)
 
-        # Write individual conversation files
-        for i, conv in enumerate(conversations):
-            path = os.path.join(conv_dir, f"conv_{i:05d}.json")
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(conv, f, indent=2, ensure_ascii=False)
+        # Media files are copied on a thread per job (the copies are
+        # I/O-bound). Of several files with one basename the last is kept, as
+        # when they were copied over each other in order.
+        sources = {os.path.basename(src): src for src in self.media_files}
 
-        # Copy media files
-        for src in self.media_files:
-            dst = os.path.join(media_dir, os.path.basename(src))
+        def copy(src):
             try:
-                copy_file(src, dst)
+                copy_file(src, os.path.join(media_dir, os.path.basename(src)))
             except Exception as e:
-                self.log(f"Error copying {src}: {e}")
+                return f"Error copying {src}: {e}"
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            # Queued before the conversations are serialized, which holds the
+            # GIL (orjson and json alike), so the copies run meanwhile
+            copy_errors = executor.map(copy, sources.values())
+
+            # Write individual conversation files
+            for i, conv in enumerate(conversations):
+                write_json(
+                    os.path.join(conv_dir, f"conv_{i:05d}.json"),
+                    conv,
+                    indent=self.organizer.json_indent,
+                )
+
+            for error in copy_errors:
+                if error:
+                    self.log(error)
 
         # Create global index
         index = {
@@ -401,8 +534,81 @@ class ExportParser:
             "organization_mode": "flat",
         }
 
-        with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
-            json.dump(index, f, indent=2, ensure_ascii=False)
+        write_json(os.path.join(out_dir, "index.json"), index)
 
         self.log(f"✅ Wrote {len(conversations)} conversations")
         self.log(f"✅ Wrote {len(self.media_files)} media files")
+
+
+def _is_conversation_file(name):
+    """Whether a file with this basename holds conversations."""
+    if name == "conversations.json":
+        return True
+    lowered = name.lower()
+    return lowered.endswith(".json") and "conversation" in lowered
+
+
+def _extract_conversation_members(zip_path, dst, jobs=1):
+    """
+    Extract just the conversation files of a zip.
+
+    Returns:
+        (extracted paths, names of the other members), or None without
+        extracting anything when the zip has no conversation files or
+        nothing else
+    """
+    with zipfile.ZipFile(zip_path, "r") as z:
+        first = []
+        rest = []
+        for info in z.infolist():
+            name = info.filename.rstrip("/").rpartition("/")[2]
+            if not info.is_dir() and _is_conversation_file(name):
+                first.append(info.filename)
+            else:
+                rest.append(info.filename)
+    if not first or not rest:
+        return None
+    return extract_zip(zip_path, dst, jobs, members=first), rest
+
+
+def _unzip_nested(entry, jobs=1):
+    """Extract a nested zip found by ``ExportParser.scan`` next to itself."""
+    unzip(entry.path, entry.path + "_unzipped", jobs=jobs)
+
+
+def _load_conversation_file(path):
+    """
+    Load one conversation JSON file.
+
+    Module-level so ``ExportParser.load_conversations`` can run it in a
+    worker process.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        (list of conversation dicts, warning or error message or None)
+    """
+    try:
+        if os.path.getsize(path) >= JSON_STREAM_THRESHOLD and _is_json_array(path):
+            # Streamed item by item when ijson is installed, so the file's
+            # bytes aren't held in memory next to the conversations parsed
+            # from them
+            data = list(iter_json_array(path, stream_threshold=JSON_STREAM_THRESHOLD))
+        else:
+            data = load_json(path)
+    except Exception as e:
+        return [], f"Error reading {path}: {e}"
+
+    # Handle both list and single-object formats
+    if isinstance(data, list):
+        return data, None
+    if isinstance(data, dict):
+        return [data], None
+    return [{"raw": data}], f"Warning: Unexpected format in {path}"
+
+
+def _is_json_array(path):
+    """True if the top-level value of the JSON file at ``path`` is an array."""
+    with open(path, "rb") as f:
+        return first_json_char(f) == b"["
@@ -47,7 +47,7 @@ def main():
     output_html = args.output or os.path.join(args.folder, "index.html")
 
     try:
-        render_conversation_folder(args.folder, output_html)
+        render_conversation_folder(args.folder, output_html, return_html=False)
         print(f"✅ HTML saved to: {output_html}")
     except Exception as e:
         print(f"Error rendering HTML: {e}", file=sys.stderr)
@@ -19,24 +19,27 @@ class SchemaInference:
         Returns:
             Dict describing the message schema
         """
+        content = msg.get("content")
         return {
-            "fields": list(msg.keys()),
-            "has_content_list": isinstance(msg.get("content"), list),
-            "has_text": isinstance(msg.get("content"), str),
-            "has_files": any(
-                k in msg for k in ["file_id", "asset_pointer", "attachments"]
-            ),
-            "has_image_blocks": self._has_image_blocks(msg),
+            "fields": list(msg),
+            "has_content_list": isinstance(content, list),
+            "has_text": isinstance(content, str),
+            "has_files": "file_id" in msg
+            or "asset_pointer" in msg
+            or "attachments" in msg,
+            "has_image_blocks": self._has_image_blocks(msg, content),
         }
 
-    def _has_image_blocks(self, msg):
+    def _has_image_blocks(self, msg, content=None):
         """Check if message contains image content blocks."""
-        c = msg.get("content")
+        c = msg.get("content") if content is None else content
         if not isinstance(c, list):
             return False
-        return any(
-            isinstance(i, dict) and i.get("type") in ("image", "input_image") for i in c
-        )
+        image_types = ("image", "input_image")
+        for block in c:
+            if isinstance(block, dict) and block.get("type") in image_types:
+                return True
+        return False
 
     def infer_conversation_schema(self, conversation):
         """
@@ -16,11 +16,17 @@ class ConversationThreader:
         Returns:
             Updated conversation with message IDs and parent references
         """
-        for i, msg in enumerate(conversation.get("messages", [])):
-            msg.setdefault("id", f"msg_{i+1:05d}")
+        parent_id = None
+        for i, msg in enumerate(conversation.get("messages", []), 1):
+            # The default id is only formatted for messages without one
+            if "id" in msg:
+                msg_id = msg["id"]
+            else:
+                msg_id = msg["id"] = f"msg_{i:05d}"
 
             # Basic linear threading - each message references previous
-            if i > 0:
-                msg["parent"] = conversation["messages"][i - 1]["id"]
+            if i > 1:
+                msg["parent"] = parent_id
+            parent_id = msg_id
 
         return conversation
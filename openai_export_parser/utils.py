@@ -1,9 +1,42 @@
 import os
+import hashlib
+import json
+import threading
 import zipfile
 import uuid
 import shutil
 import struct
 import zlib
+from typing import Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used when orjson isn't installed
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import ijson
+except ImportError:  # optional: large JSON arrays are loaded whole without it
+    ijson = None
+
+try:
+    import blake3
+except ImportError:  # optional: media files are hashed with SHA256 without it
+    blake3 = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional: text-fallback media matching uses substring tests
+    ahocorasick = None
+
+# JSON files at least this big are streamed with ijson (when installed).
+# Smaller files parse faster in one go than through ijson's per-item overhead.
+JSON_STREAM_THRESHOLD = 50 * 1024 * 1024
+
+# Files are hashed in chunks of this size; files at least HASH_MMAP_THRESHOLD
+# big are memory-mapped and hashed in one update call instead.
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_MMAP_THRESHOLD = 16 * 1024 * 1024
 
 
 def ensure_dir(path):
@@ -11,6 +44,62 @@ def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
 
+def default_jobs():
+    """Default worker count for parallel extraction: the CPU count, capped at 8."""
+    return min(8, os.cpu_count() or 1)
+
+
+class SlottedRecord:
+    """
+    Base for slotted records that read like a dict.
+
+    Indexing and extraction build one record per file or reference, which
+    adds up over a large export; a slotted record is far smaller than a dict.
+    Subclasses list their fields in ``FIELDS`` (or override ``keys``) and get
+    the read-only mapping interface consumers were written against:
+    ``rec["size"]``, ``rec.get("id")``, ``"size" in rec``, iteration,
+    ``items()``/``values()`` and ``dict(rec)``.
+    """
+
+    __slots__ = ()
+
+    FIELDS: Tuple[str, ...] = ()
+
+    def keys(self):
+        return self.FIELDS
+
+    def __getitem__(self, field):
+        if field not in self.keys():
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in self.keys() else default
+
+    def __contains__(self, field):
+        return field in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in self.keys()]
+
+    def values(self):
+        return [getattr(self, field) for field in self.keys()]
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return dict(self) == dict(other)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
 # 4 GiB. OpenAI's 2025+ multi-GB exports are written as non-ZIP64 archives
 # whose central-directory offsets wrap at this boundary and whose members use
 # data descriptors. Python's zipfile (and Info-ZIP unzip / bsdtar) cannot read
@@ -23,14 +112,15 @@ _CFH_SIG = b"PK\x01\x02"  # central directory file header
 _EOCD_SIG = b"PK\x05\x06"  # end of central directory
 
 
-def unzip(src, dst):
+def unzip(src, dst, jobs=1):
     """
     Extract a zip archive to ``dst``, recovering from the malformed multi-GB
     archives that recent OpenAI exports ship.
 
     Strategy, in order:
       1. Python's ``zipfile`` — fast path for normal/well-formed archives
-         (skipped for >4 GiB archives, which are the known-broken kind).
+         (skipped for >4 GiB archives, which are the known-broken kind),
+         extracting on ``jobs`` threads (see ``extract_zip``).
       2. macOS ``ditto`` — streams members correctly (Archive Utility's engine).
       3. Pure-Python streaming extractor — cross-platform recovery that walks
          local file headers and reads member sizes from the (intact) central
@@ -42,18 +132,18 @@ def unzip(src, dst):
 
     ensure_dir(dst)
 
-    try:
-        too_big = os.path.getsize(src) > _ZIP64_WRAP_THRESHOLD
-    except OSError:
-        too_big = False
+    too_big = exceeds_zipfile_limit(src)
 
     # 1. Fast path: Python zipfile for normal archives. The broken >4 GiB
     #    exports only partially extract before raising, so skip straight to the
     #    recovery extractors for them.
     if not too_big:
         try:
-            with zipfile.ZipFile(src, "r") as z:
-                z.extractall(dst)
+            if jobs > 1:
+                extract_zip(src, dst, jobs=jobs)
+            else:
+                with zipfile.ZipFile(src, "r") as z:
+                    z.extractall(dst)
             return
         except (zipfile.BadZipFile, OSError):
             pass
@@ -99,6 +189,106 @@ def unzip(src, dst):
         )
 
 
+def exceeds_zipfile_limit(path):
+    """
+    Whether a zip is past the 4 GiB boundary where OpenAI's non-ZIP64
+    exports stop being readable by ``zipfile`` (False if it can't be read).
+    """
+    try:
+        return os.path.getsize(path) > _ZIP64_WRAP_THRESHOLD
+    except OSError:
+        return False
+
+
+def extract_zip(src, dst, jobs=1, members=None):
+    """
+    Extract a well-formed zip archive to ``dst``, optionally in parallel.
+
+    Directories are created up front; file members are then extracted by a
+    pool of ``jobs`` threads. zlib releases the GIL while inflating, so one
+    member's decompression overlaps another's disk writes. ``ZipFile`` objects
+    are not safe to share between threads, so each worker opens its own
+    handle and reuses it for every member it extracts.
+
+    Args:
+        src: Path to the zip archive
+        dst: Destination directory
+        jobs: Number of worker threads (1 extracts sequentially)
+        members: Optional names of the members to extract (default: all)
+
+    Returns:
+        Paths of the extracted files, in archive order
+    """
+    ensure_dir(dst)
+
+    with zipfile.ZipFile(src, "r") as z:
+        infos = z.infolist()
+    if members is not None:
+        members = set(members)
+        infos = [info for info in infos if info.filename in members]
+
+    files = []
+    for info in infos:
+        out_path = _safe_member_path(dst, info.filename)
+        if info.is_dir():
+            ensure_dir(out_path)
+        else:
+            ensure_dir(os.path.dirname(out_path))
+            files.append((info, out_path))
+
+    if jobs <= 1 or len(files) < 2:
+        with zipfile.ZipFile(src, "r") as z:
+            for info, out_path in files:
+                _extract_zip_member(z, info, out_path)
+        return [out_path for _, out_path in files]
+
+    local = threading.local()
+    handles = []
+
+    def extract(item):
+        z = getattr(local, "zip", None)
+        if z is None:
+            z = local.zip = zipfile.ZipFile(src, "r")
+            handles.append(z)
+        _extract_zip_member(z, *item)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(extract, files))
+    finally:
+        for z in handles:
+            z.close()
+    return [out_path for _, out_path in files]
+
+
+def _extract_zip_member(z, info, out_path):
+    """Copy one member of an open ``ZipFile`` to ``out_path``."""
+    # Copy in a block sized to the member (up to 1 MiB) so small files are
+    # read and written in one step. The destination keeps default buffering:
+    # a raw FileIO may accept a short write, which copyfileobj would ignore.
+    with open(out_path, "wb") as dst:
+        if info.file_size == 0:
+            return
+        with z.open(info) as src:
+            shutil.copyfileobj(src, dst, min(info.file_size, 1024 * 1024))
+
+
+def _safe_member_path(dst, name):
+    """
+    Resolve a zip member name to a path under ``dst``.
+
+    Names that would escape ``dst`` (absolute paths, ``..`` components) are
+    flattened to their basename instead.
+    """
+    root = os.path.abspath(dst)
+    out_path = os.path.normpath(os.path.join(root, name))
+    if not out_path.startswith(root + os.sep) and out_path != root:
+        out_path = os.path.normpath(os.path.join(root, os.path.basename(name)))
+    return out_path
+
+
 def _stream_extract(src, dst):
     """
     Recover a malformed (non-ZIP64-wrapped) zip by streaming it.
@@ -188,11 +378,7 @@ def _find_next_record(f, from_pos):
 def _write_member(f, data_start, comp_size, method, dst, name):
     """Write a single member to ``dst/name``, inflating if deflated."""
     # Normalize and guard against path traversal in member names.
-    out_path = os.path.normpath(os.path.join(dst, name))
-    if not out_path.startswith(
-        os.path.abspath(dst) + os.sep
-    ) and out_path != os.path.abspath(dst):
-        out_path = os.path.normpath(os.path.join(dst, os.path.basename(name)))
+    out_path = _safe_member_path(dst, name)
 
     if name.endswith("/"):
         ensure_dir(out_path)
@@ -359,10 +545,219 @@ def sniff_extension(path, default=None):
     return default
 
 
+def load_json(path):
+    """
+    Load a JSON file, using orjson when it is installed.
+
+    The file is read as bytes and handed to the parser directly, skipping the
+    text-decoding layer; orjson parses the large export files several times
+    faster than the stdlib ``json`` module. Files orjson rejects are retried
+    with the stdlib parser.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        The decoded JSON value
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. integers beyond 64 bits, which write_json falls back to
+            # the stdlib for; json.loads accepts them (or raises properly)
+            pass
+    return json.loads(data)
+
+
+def iter_json_array(path, stream_threshold=JSON_STREAM_THRESHOLD):
+    """
+    Yield the items of a JSON file whose top level is an array.
+
+    Files of ``stream_threshold`` bytes or more are streamed item by item with
+    ijson when it is installed, so a multi-GB ``conversations.json`` never has
+    to be held in memory all at once. Anything else is loaded with
+    ``load_json``. A top-level value that is not an array is yielded as a
+    single item.
+
+    Args:
+        path: Path to the JSON file
+        stream_threshold: Minimum file size (bytes) for streaming
+
+    Yields:
+        Each element of the top-level array
+    """
+    if ijson is not None and os.path.getsize(path) >= stream_threshold:
+        with open(path, "rb") as f:
+            if first_json_char(f) == b"[":
+                f.seek(0)
+                yield from ijson.items(f, "item", use_float=True)
+                return
+
+    data = load_json(path)
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def first_json_char(f):
+    """
+    Return the first non-whitespace byte of an open binary file.
+
+    ``b"["`` means the top-level JSON value is an array. Reads from the
+    current position; callers seek back before parsing.
+    """
+    while True:
+        c = f.read(1)
+        if not c or not c.isspace():
+            return c
+
+
+def write_json(path, obj, indent=2):
+    """
+    Write obj to path as UTF-8 JSON (non-ASCII characters unescaped).
+
+    Uses orjson when it is installed and can represent obj (orjson only
+    indents by 2 and rejects e.g. integers beyond 64 bits); otherwise falls
+    back to the stdlib json module.
+
+    Args:
+        path: Output file path
+        obj: JSON-serializable object
+        indent: 2 for pretty-printed output, None for compact output
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            data = orjson.dumps(obj, option=option)
+        except TypeError:  # orjson.JSONEncodeError subclasses TypeError
+            data = None
+        if data is not None:
+            with open(path, "wb") as f:
+                f.write(data)
+            return
+
+    separators = None if indent else (",", ":")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=indent, separators=separators, ensure_ascii=False)
+
+
 def copy_file(src, dst):
-    """Copy file from src to dst, creating parent directories if needed."""
+    """
+    Copy file from src to dst, creating parent directories if needed.
+
+    Like ``shutil.copy2`` (data, then timestamps and permissions), but the
+    data is cloned or copied in-kernel where supported (see
+    ``_copy_file_range``).
+    """
     ensure_dir(os.path.dirname(dst))
-    shutil.copy2(src, dst)
+    _copy_file_range(src, dst)
+    shutil.copystat(src, dst)
+
+
+def link_or_copy(src, dst, link=True):
+    """
+    Place src at dst as a hard link when possible, otherwise as a copy.
+
+    Hard links only work within one filesystem; across devices (or where the
+    filesystem refuses them) the data is copied with ``os.copy_file_range``,
+    which lets the kernel copy - or reflink, on btrfs/XFS - without passing
+    the bytes through Python. An existing dst is replaced rather than written
+    through, since it may itself be a link to another file: the new link or
+    copy is made under a temporary name and renamed over dst, so concurrent
+    calls for the same dst can't clobber each other's source files.
+
+    Args:
+        src: Path to the source file
+        dst: Destination path; parent directories are created if needed
+        link: Set False to always make an independent copy
+
+    Returns:
+        True if dst was hard linked, False if it was copied
+    """
+    ensure_dir(os.path.dirname(dst))
+
+    if link:
+        try:
+            os.link(src, dst)
+            return True
+        except FileExistsError:
+            try:
+                # Already linked (an earlier run, or a concurrent call)
+                if os.path.samefile(src, dst):
+                    return True
+                _replace_file(dst, lambda tmp: os.link(src, tmp))
+                return True
+            except OSError:
+                pass
+        except OSError:
+            pass
+
+    def copy(tmp):
+        _copy_file_range(src, tmp)
+        shutil.copystat(src, tmp)
+
+    _replace_file(dst, copy)
+    return False
+
+
+def _replace_file(dst, make):
+    """Create a file with ``make(tmp_path)`` and rename it over ``dst``."""
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        make(tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _copy_file_range(src, dst):
+    """
+    Copy file data in-kernel where supported, else with shutil.copyfile.
+
+    On Linux the data is first cloned with the FICLONE ioctl (Python 3.12+;
+    an O(1) reflink on btrfs/XFS), then copied with ``os.copy_file_range``.
+    """
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfile(src, dst)
+        return
+
+    import fcntl
+
+    with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+        ficlone = getattr(fcntl, "FICLONE", None)
+        if ficlone is not None:
+            try:
+                fcntl.ioctl(f_out.fileno(), ficlone, f_in.fileno())
+                return
+            except OSError:
+                pass  # other filesystems, or src and dst on different ones
+
+        remaining = os.fstat(f_in.fileno()).st_size
+        try:
+            while remaining > 0:
+                sent = os.copy_file_range(
+                    f_in.fileno(), f_out.fileno(), min(remaining, 1 << 30)
+                )
+                if sent == 0:
+                    break
+                remaining -= sent
+        except OSError:
+            pass
+        if remaining > 0:
+            # Old kernels / unsupported filesystems raise, and some (FUSE,
+            # procfs-like) report 0 bytes before the end: finish in user
+            # space. Reads and writes continue from the current offsets.
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
 
 
 def generate_id(prefix="id"):
@@ -377,9 +772,109 @@ def list_files_recursive(root):
             yield os.path.join(dirpath, f)
 
 
+def split_dir_entries(path):
+    """
+    List one directory as ``(file_entries, subdir_paths)``.
+
+    ``file_entries`` are the ``os.DirEntry`` objects of every non-directory
+    entry; ``subdir_paths`` are the directories to descend into (symlinked
+    directories excluded, as in ``os.walk``). Both keep listing order. An
+    unreadable directory lists as empty.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return [], []
+
+    files = []
+    subdirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            files.append(entry)
+        elif not entry.is_symlink():
+            subdirs.append(entry.path)
+    return files, subdirs
+
+
+def scan_files(root):
+    """
+    Recursively yield ``os.DirEntry`` objects for the non-directory entries
+    under root, in the same order as ``os.walk``.
+
+    The entries carry their name, path and (on Windows) stat data from the
+    directory listing, which saves callers a separate ``os.path`` call per
+    file. Like ``os.walk``, symlinked directories are not descended into and
+    unreadable directories are skipped.
+    """
+    stack = [root]
+    while stack:
+        files, subdirs = split_dir_entries(stack.pop())
+        yield from files
+        # Reversed so the first subdirectory is popped (and walked) first.
+        stack.extend(reversed(subdirs))
+
+
+def hash_and_copy(src, dst_dir, basename):
+    """
+    Copy src into dst_dir as "{hash}_{basename}", hashing it on the way.
+
+    The file is read once: each chunk updates the hash and is written to a
+    temporary file in dst_dir, which is renamed once the hash is known. The
+    hash is the same 12-character prefix ``hash_file`` returns.
+
+    Args:
+        src: Path to the file to copy
+        dst_dir: Existing destination directory
+        basename: Filename to use after the hash prefix
+
+    Returns:
+        The destination filename ("{hash}_{basename}")
+    """
+    import tempfile
+
+    hasher = _content_hasher()
+    fd, tmp_path = tempfile.mkstemp(dir=dst_dir, prefix=".", suffix=".part")
+    try:
+        with open(src, "rb") as f_in, open(fd, "wb") as f_out:
+            for chunk in iter(lambda: f_in.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                f_out.write(chunk)
+
+        hashed_name = f"{hasher.hexdigest()[:12]}_{basename}"
+        dst = os.path.join(dst_dir, hashed_name)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    shutil.copystat(src, dst)  # keep copy2's timestamps/permissions
+    return hashed_name
+
+
+def _content_hasher():
+    """
+    New hash object for naming files by content.
+
+    The hash only disambiguates filenames, so it needn't be cryptographic:
+    BLAKE3 is used when installed (several times faster), else SHA256.
+    """
+    if blake3 is not None:
+        return blake3.blake3()
+    return hashlib.sha256()
+
+
 def hash_file(filepath):
     """
-    Generate SHA256 hash of file for unique identification.
+    Generate a content hash of a file for unique identification
+    (BLAKE3 when installed, else SHA256; see _content_hasher).
 
     Args:
         filepath: Path to file
@@ -387,13 +882,30 @@ def hash_file(filepath):
     Returns:
         Hex string of first 12 characters of hash
     """
-    import hashlib
+    hasher = _content_hasher()
+    if hasattr(hasher, "update_mmap"):  # blake3 >= 0.3.2
+        hasher.update_mmap(filepath)
+    else:
+        with open(filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= HASH_MMAP_THRESHOLD:
+                import mmap
+
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+            elif hasattr(hashlib, "file_digest"):  # Python 3.11+
+                # Reads into one reusable buffer instead of a bytes per chunk
+                hashlib.file_digest(f, lambda: hasher)
+            else:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+    return hasher.hexdigest()[:12]
+
 
-    sha256 = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()[:12]
+# sanitize_filename's table: spaces become underscores; characters that are
+# unsafe in filenames (and control characters) are dropped
+_FILENAME_TRANSLATION = str.maketrans(
+    {" ": "_", **{c: None for c in '<>:"/\\|?*'}, **{chr(i): None for i in range(32)}}
+)
 
 
 def sanitize_filename(name, max_length=50):
@@ -407,16 +919,12 @@ def sanitize_filename(name, max_length=50):
     Returns:
         Sanitized string safe for use in filenames
     """
-    import re
-
-    # Replace spaces with underscores
-    name = name.replace(" ", "_")
-
-    # Remove or replace unsafe characters
-    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "", name)
+    # Replace spaces with underscores, remove unsafe characters
+    name = name.translate(_FILENAME_TRANSLATION)
 
     # Replace multiple underscores with single
-    name = re.sub(r"_+", "_", name)
+    while "__" in name:
+        name = name.replace("__", "_")
 
     # Trim to max length
     if len(name) > max_length:
@@ -0,0 +1,131 @@
+"""Tests for the Claude export parser."""
+
+import json
+from datetime import datetime
+
+from openai_export_parser.claude_parser import ClaudeParser, with_mapping
+
+
+def _claude_conversation(uuid="conv-1", messages=2):
+    return {
+        "uuid": uuid,
+        "name": "Hello Claude",
+        "created_at": "2024-07-14T03:26:07.804181Z",
+        "updated_at": "2024-07-14T03:30:00Z",
+        "chat_messages": [
+            {
+                "uuid": f"{uuid}-msg-{i}",
+                "text": f"message {i}",
+                "sender": "human" if i % 2 == 0 else "assistant",
+                "created_at": "2024-07-14T03:26:07.804181Z",
+            }
+            for i in range(messages)
+        ],
+    }
+
+
+def _write_export(tmp_path, conversations):
+    (tmp_path / "conversations.json").write_text(json.dumps(conversations))
+    (tmp_path / "users.json").write_text("[]")
+    return tmp_path
+
+
+def test_parse_directory_converts_every_conversation(tmp_path):
+    export = _write_export(
+        tmp_path, [_claude_conversation("a"), _claude_conversation("b")]
+    )
+    conversations = ClaudeParser().parse_export(export)
+
+    assert [c["conversation_id"] for c in conversations] == ["a", "b"]
+    assert all(c["_source"] == "claude" for c in conversations)
+
+
+def test_parse_export_returns_mapping_trees(tmp_path):
+    export = _write_export(tmp_path, [_claude_conversation("a", messages=2)])
+    conv = ClaudeParser().parse_export(export)[0]
+
+    assert "messages" not in conv
+    assert conv["mapping"]["root"]["children"] == ["a-msg-0"]
+
+
+def test_converted_conversation_keeps_messages_in_order(tmp_path):
+    export = _write_export(tmp_path, [_claude_conversation("a", messages=3)])
+    conv = ClaudeParser().parse_export(export, flat_messages=True)[0]
+
+    assert "mapping" not in conv
+    assert [m["id"] for m in conv["messages"]] == ["a-msg-0", "a-msg-1", "a-msg-2"]
+
+
+def test_with_mapping_links_messages_in_order(tmp_path):
+    export = _write_export(tmp_path, [_claude_conversation("a", messages=3)])
+    conv = with_mapping(ClaudeParser().parse_export(export, flat_messages=True)[0])
+
+    assert list(conv) == [
+        "conversation_id",
+        "title",
+        "create_time",
+        "update_time",
+        "mapping",
+        "_source",
+    ]
+    mapping = conv["mapping"]
+    assert mapping["root"]["children"] == ["a-msg-0"]
+    assert mapping["a-msg-1"]["parent"] == "a-msg-0"
+    assert mapping["a-msg-0"]["message"]["author"]["role"] == "user"
+    assert mapping["a-msg-1"]["message"]["author"]["role"] == "assistant"
+    assert mapping["a-msg-2"]["message"]["content"]["parts"] == ["message 2"]
+
+
+def test_iso_timestamps_become_unix_time(tmp_path):
+    export = _write_export(tmp_path, [_claude_conversation("a")])
+    conv = ClaudeParser().parse_export(export)[0]
+
+    assert conv["create_time"] == 1720927567.804181
+    assert conv["update_time"] == 1720927800.0
+
+
+def test_iso_to_timestamp_matches_fromisoformat():
+    parser = ClaudeParser()
+    for value in [
+        "2024-07-14T03:26:07.804181Z",
+        "2024-07-14T03:26:07.804Z",
+        "2024-07-14T03:26:07Z",
+        "2024-07-14T03:26:07.804181+00:00",
+        "2024-07-14T03:26:07.804181-05:00",
+    ]:
+        expected = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        assert parser._iso_to_timestamp(value) == expected
+
+    assert parser._iso_to_timestamp("not a timestamp") is None
+
+
+def test_iso_to_timestamp_rejects_out_of_range_fields():
+    parser = ClaudeParser()
+    for value in [
+        "2024-02-30T10:00:00Z",
+        "2023-02-29T10:00:00Z",
+        "2024-13-01T10:00:00Z",
+        "2024-00-10T10:00:00Z",
+        "2024-01-00T10:00:00Z",
+        "2024-01-01T25:00:00Z",
+        "2024-01-01T10:60:00Z",
+        "2024-01-01T10:00:60.5Z",
+        "2024-+1-01T10:00:00Z",
+    ]:
+        assert parser._iso_to_timestamp(value) is None, value
+
+    # Leap day is valid and still matches the general parser.
+    expected = datetime.fromisoformat("2024-02-29T10:00:00+00:00").timestamp()
+    assert parser._iso_to_timestamp("2024-02-29T10:00:00Z") == expected
+
+
+def test_parallel_conversion_preserves_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(ClaudeParser, "PARALLEL_THRESHOLD", 2)
+    uuids = [f"conv-{i}" for i in range(5)]
+    export = _write_export(tmp_path, [_claude_conversation(u) for u in uuids])
+
+    parallel = ClaudeParser(jobs=2).parse_export(export)
+    serial = ClaudeParser(jobs=1).parse_export(export)
+
+    assert [c["conversation_id"] for c in parallel] == uuids
+    assert parallel == serial
@@ -0,0 +1,188 @@
+"""Tests for writing organized per-conversation output folders."""
+
+import json
+import os
+
+from openai_export_parser.conversation_organizer import ConversationOrganizer
+from openai_export_parser.utils import hash_file
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def _conversation(media_files):
+    return {
+        "conversation_id": "conv-1",
+        "title": "Hello",
+        "create_time": 1720927567.0,
+        "mapping": {},
+        "_media_files": media_files,
+    }
+
+
+def test_media_is_copied_under_its_own_name(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "photo.png").write_bytes(PNG)
+    (src / "file-ABC123.dat").write_bytes(PNG + b"\x01")
+
+    conv = _conversation(
+        [str(src / "photo.png"), str(src / "file-ABC123.dat"), str(src / "gone.png")]
+    )
+    out = tmp_path / "out"
+    (folder,) = ConversationOrganizer(output_format="json").write_organized_output(
+        [conv], [], str(out), {}
+    )
+
+    manifest = json.loads((out / folder / "media_manifest.json").read_text())
+    # ".dat" assets get their sniffed extension
+    assert manifest == {"photo.png": "photo.png", "file-ABC123.dat": "file-ABC123.png"}
+    assert sorted(os.listdir(os.path.join(folder, "media"))) == sorted(
+        manifest.values()
+    )
+    assert (out / folder / "media" / "photo.png").read_bytes() == PNG
+
+
+def test_clashing_media_names_get_size_then_hash_prefixes(tmp_path):
+    paths = []
+    for folder, payload in [("a", PNG), ("b", PNG + b"\x01"), ("c", PNG + b"\x02")]:
+        (tmp_path / folder).mkdir()
+        path = tmp_path / folder / "photo.png"
+        path.write_bytes(payload)
+        paths.append(str(path))
+
+    out = tmp_path / "out"
+    (folder,) = ConversationOrganizer(output_format="json").write_organized_output(
+        [_conversation(paths)], [], str(out), {}
+    )
+
+    names = sorted(os.listdir(os.path.join(folder, "media")))
+    assert len(names) == 3
+    assert "photo.png" in names
+    assert f"{len(PNG) + 1}_photo.png" in names
+    assert f"{hash_file(paths[2])}_photo.png" in names
+
+
+def test_conversation_json_is_written(tmp_path):
+    out = tmp_path / "out"
+    (folder,) = ConversationOrganizer(output_format="json").write_organized_output(
+        [_conversation([])], [], str(out), {}
+    )
+
+    written = json.loads((out / folder / "conversation.json").read_text())
+    assert written["conversation_id"] == "conv-1"
+    assert not (out / folder / "media_manifest.json").exists()
+
+
+def test_media_is_hard_linked_unless_duplicated(tmp_path):
+    (tmp_path / "photo.png").write_bytes(PNG)
+    src = str(tmp_path / "photo.png")
+
+    linked_out = tmp_path / "linked"
+    (folder,) = ConversationOrganizer(output_format="json").write_organized_output(
+        [_conversation([src])], [], str(linked_out), {}
+    )
+    assert os.path.samefile(os.path.join(folder, "media", "photo.png"), src)
+
+    copied_out = tmp_path / "copied"
+    (folder,) = ConversationOrganizer(
+        output_format="json", duplicate_media=True
+    ).write_organized_output([_conversation([src])], [], str(copied_out), {})
+    copy = os.path.join(folder, "media", "photo.png")
+    assert not os.path.samefile(copy, src)
+    with open(copy, "rb") as f:
+        assert f.read() == PNG
+
+
+def test_assign_media_to_conversations_dedupes_per_conversation():
+    conversations = [
+        {"messages": [{"media": ["a.png", "b.png"]}, {"media": ["a.png"]}, {}]},
+        {},
+    ]
+
+    assigned = ConversationOrganizer().assign_media_to_conversations(
+        conversations, None
+    )
+
+    assert assigned[0] == ["a.png", "b.png"]
+    assert assigned[1] == []
+
+
+def test_media_batches_span_conversations(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConversationOrganizer, "MEDIA_BATCH_SIZE", 2)
+    conversations = []
+    for idx in range(3):
+        (tmp_path / f"img{idx}.png").write_bytes(PNG + bytes([idx]))
+        conv = _conversation([str(tmp_path / f"img{idx}.png")])
+        conv["conversation_id"] = f"conv-{idx}"
+        conversations.append(conv)
+    # A directory passes the existence check but cannot be copied
+    (tmp_path / "broken").mkdir()
+    conversations[1]["_media_files"].append(str(tmp_path / "broken"))
+
+    out = tmp_path / "out"
+    folders = ConversationOrganizer(output_format="json").write_organized_output(
+        conversations, [], str(out), {}
+    )
+
+    for idx, folder in enumerate(folders):
+        with open(os.path.join(folder, "media_manifest.json")) as f:
+            assert json.load(f) == {f"img{idx}.png": f"img{idx}.png"}
+
+
+def test_conversation_json_is_compact_unless_pretty(tmp_path):
+    compact_out = tmp_path / "compact"
+    (folder,) = ConversationOrganizer(output_format="json").write_organized_output(
+        [_conversation([])], [], str(compact_out), {}
+    )
+    compact = (compact_out / folder / "conversation.json").read_text()
+    assert "\n" not in compact.strip()
+
+    pretty_out = tmp_path / "pretty"
+    (folder,) = ConversationOrganizer(
+        output_format="json", pretty_json=True
+    ).write_organized_output([_conversation([])], [], str(pretty_out), {})
+    pretty = (pretty_out / folder / "conversation.json").read_text()
+    assert '\n  "conversation_id": "conv-1"' in pretty
+    assert json.loads(pretty) == json.loads(compact)
+
+
+def test_shared_media_is_hashed_once(tmp_path, monkeypatch):
+    from openai_export_parser import conversation_organizer
+
+    paths = []
+    for folder, payload in [("a", PNG), ("b", PNG + b"\x01"), ("c", PNG + b"\x02")]:
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "photo.png").write_bytes(payload)
+        paths.append(str(tmp_path / folder / "photo.png"))
+
+    hashed = []
+
+    def counting_hash_file(path):
+        hashed.append(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(conversation_organizer, "hash_file", counting_hash_file)
+    conversations = [_conversation(list(paths)) for _ in range(3)]
+    folders = ConversationOrganizer(output_format="json").write_organized_output(
+        conversations, [], str(tmp_path / "out"), {}
+    )
+
+    assert hashed == [paths[2]]
+    for folder in folders:
+        assert f"{hash_file(paths[2])}_photo.png" in os.listdir(
+            os.path.join(folder, "media")
+        )
+
+
+def test_convenience_symlinks_point_at_folders_with_media(tmp_path):
+    (tmp_path / "photo.png").write_bytes(PNG)
+    with_media = _conversation([str(tmp_path / "photo.png")])
+    without_media = _conversation([])
+
+    out = tmp_path / "out"
+    folders = ConversationOrganizer(output_format="json").write_organized_output(
+        [with_media, without_media], [], str(out), {}
+    )
+
+    assert os.listdir(out / "_with_media") == [os.path.basename(folders[0])]
+    assert os.listdir(out / "_with_assets") == []
@@ -0,0 +1,134 @@
+"""Tests for the static per-folder HTML renderer."""
+
+import json
+
+import pytest
+
+from openai_export_parser.html_renderer import (
+    HTMLRenderer,
+    render_conversation_folder,
+)
+
+
+def _write_folder(folder, conversation, manifest=None):
+    folder.mkdir(exist_ok=True)
+    (folder / "conversation.json").write_text(json.dumps(conversation))
+    if manifest is not None:
+        (folder / "media_manifest.json").write_text(json.dumps(manifest))
+
+
+def _node(parent, role, content, **extra):
+    message = {"author": {"role": role}, "content": content}
+    message.update(extra)
+    return {"parent": parent, "message": message}
+
+
+CONVERSATION = {
+    "title": "Hello <world>",
+    "conversation_id": "conv-1",
+    "mapping": {
+        "root": {"parent": None, "message": None},
+        "a": _node("root", "user", {"parts": ["first <b>"]}, media=["p.png", "d.pdf"]),
+        "b": _node("a", "assistant", {"parts": ["second"]}),
+        "hidden": _node(
+            "b",
+            "system",
+            {"parts": ["hidden"]},
+            metadata={"is_visually_hidden_from_conversation": True},
+        ),
+    },
+}
+
+
+def test_render_conversation_in_thread_order(tmp_path):
+    _write_folder(tmp_path / "conv", CONVERSATION)
+
+    html = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+
+    assert html.startswith("<!DOCTYPE html>")
+    assert html.rstrip().endswith("</html>")
+    assert "<title>Hello &lt;world&gt;</title>" in html
+    assert html.index("first &lt;b&gt;") < html.index("second")
+    assert "hidden" not in html.split("</style>", 1)[1]
+
+
+def test_render_conversation_links_media_through_manifest(tmp_path):
+    _write_folder(tmp_path / "conv", CONVERSATION, {"p.png": "abc_p.png"})
+
+    html = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+
+    assert '<img src="media/abc_p.png" alt="p.png">' in html
+    assert '<a href="media/d.pdf" class="file-attachment">d.pdf</a>' in html
+
+
+def test_render_conversation_folder_writes_index_html(tmp_path):
+    _write_folder(tmp_path / "conv", CONVERSATION)
+
+    html = render_conversation_folder(str(tmp_path / "conv"))
+
+    assert (tmp_path / "conv" / "index.html").read_text(encoding="utf-8") == html
+
+
+def test_streamed_render_matches_string_render(tmp_path):
+    _write_folder(tmp_path / "conv", CONVERSATION, {"p.png": "abc_p.png"})
+    out = tmp_path / "out.html"
+
+    assert (
+        render_conversation_folder(str(tmp_path / "conv"), str(out), return_html=False)
+        is None
+    )
+
+    expected = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+    assert out.read_text(encoding="utf-8") == expected
+
+    chunks = list(HTMLRenderer().iter_conversation(str(tmp_path / "conv")))
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected
+
+
+def test_render_conversation_handles_threads_deeper_than_recursion_limit(tmp_path):
+    mapping = {"n0": {"parent": None, "message": None}}
+    for idx in range(1, 3000):
+        mapping[f"n{idx}"] = _node(f"n{idx - 1}", "user", {"parts": [f"msg {idx}"]})
+    _write_folder(tmp_path / "conv", {"title": "Long", "mapping": mapping})
+
+    html = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+
+    assert html.index("msg 1\n") < html.index("msg 2999\n")
+
+
+def test_render_conversation_escapes_unknown_roles(tmp_path):
+    conversation = {
+        "mapping": {
+            "root": {"parent": None, "message": None},
+            "a": _node("root", 'x"<role>', {"parts": ["hi"]}),
+        }
+    }
+    _write_folder(tmp_path / "conv", conversation)
+
+    html = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+
+    assert '<span class="message-role">x&quot;&lt;role&gt;</span>' in html
+    assert "<role>" not in html
+
+
+def test_is_image_checks_extension_case_insensitively():
+    renderer = HTMLRenderer()
+    assert renderer._is_image("file-abc_photo.PNG")
+    assert renderer._is_image("a.b.jpeg")
+    assert not renderer._is_image("notes.txt")
+    assert not renderer._is_image("png")
+    assert not renderer._is_image(".png")
+
+
+def test_streamed_load_renders_the_same_html(tmp_path, monkeypatch):
+    pytest.importorskip("ijson")
+    _write_folder(tmp_path / "conv", CONVERSATION, {"p.png": "hash_p.png"})
+    expected = HTMLRenderer().render_conversation(str(tmp_path / "conv"))
+
+    monkeypatch.setattr(HTMLRenderer, "STREAM_THRESHOLD", 0)
+    renderer = HTMLRenderer()
+    assert renderer.render_conversation(str(tmp_path / "conv")) == expected
+    # Nodes are reduced to what rendering needs
+    assert set(renderer.conversation["mapping"]["a"]) == {"parent", "message"}
+    assert renderer.conversation["title"] == CONVERSATION["title"]
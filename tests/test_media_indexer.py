@@ -3,6 +3,7 @@
 from openai_export_parser.comprehensive_media_indexer import (
     ComprehensiveMediaIndexer,
 )
+from openai_export_parser.media_indexer import MediaIndexer
 
 
 def test_dat_is_a_media_extension():
@@ -59,3 +60,169 @@ def test_build_index_finds_dat_assets_by_file_id(tmp_path):
 
     assert "file-aZlh7eXXkKmbAT3s8OUOyknk" in indices["file_id_to_path"]
     assert idx.get_stats()["total_files"] == 1
+
+
+def test_parallel_scan_matches_sequential_scan(tmp_path):
+    conv = "conversations/12345678-1234-1234-1234-123456789abc"
+    for rel in [
+        "top.png",
+        "a/file-AAA_one.png",
+        f"b/{conv}/file-BBB.dat",
+        "b/deeper/x.jpg",
+        "c/notes.txt",
+        "c/d/e/same.png",
+        "d/same.png",
+    ]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * len(rel))
+
+    sequential = ComprehensiveMediaIndexer(max_workers=1).build_index(str(tmp_path))
+    parallel = ComprehensiveMediaIndexer(max_workers=4).build_index(str(tmp_path))
+
+    assert parallel == sequential
+    assert len(parallel["all_files"]) == 6
+
+
+def test_path_to_metadata_describes_each_file(tmp_path):
+    media = tmp_path / "img" / "photo.PNG"
+    media.parent.mkdir()
+    media.write_bytes(b"x" * 10)
+
+    idx = ComprehensiveMediaIndexer()
+    metadata = idx.build_index(str(tmp_path))["path_to_metadata"]
+
+    assert metadata[str(media)]["basename"] == "photo.PNG"
+    assert {path: dict(info) for path, info in metadata.items()} == {
+        str(media): {
+            "size": 10,
+            "basename": "photo.PNG",
+            "ext": ".png",
+            "dirname": str(media.parent),
+            "filename_only": "photo.PNG",
+        }
+    }
+
+
+def test_file_info_supports_mapping_reads(tmp_path):
+    media = tmp_path / "photo.png"
+    media.write_bytes(b"x" * 10)
+
+    idx = ComprehensiveMediaIndexer()
+    info = idx.build_index(str(tmp_path))["path_to_metadata"][str(media)]
+
+    assert "size" in info
+    assert "missing" not in info
+    assert list(info) == list(info.keys())
+    assert dict(info.items()) == dict(info)
+    assert list(info.values()) == [info[field] for field in info]
+
+
+def test_build_index_indexes_file_ids_and_hashes(tmp_path):
+    file_hash = "file_" + "a" * 32
+    names = [
+        "file-AAA_document.pdf",
+        "file-BBB-photo.webp",
+        "file-CCC.dat",
+        f"{file_hash}-12345678-1234-1234-1234-123456789abc.png",
+        "photo-1234.jpeg",
+    ]
+    for name in names:
+        (tmp_path / name).write_bytes(b"x")
+
+    indices = ComprehensiveMediaIndexer().build_index(str(tmp_path))
+
+    assert sorted(indices["file_id_to_path"]) == ["file-AAA", "file-BBB", "file-CCC"]
+    assert list(indices["file_hash_to_path"]) == [file_hash]
+
+
+def test_legacy_media_indexer_name_patterns():
+    indexer = MediaIndexer()
+    uuid = "12345678-1234-1234-1234-123456789abc"
+
+    assert (
+        indexer._extract_conversation_id_from_path(
+            f"/tmp/x/conversations/{uuid}/img.png"
+        )
+        == uuid
+    )
+    assert (
+        indexer._extract_conversation_id_from_path(
+            "/tmp/x/conversations/12345678-1234-1234-1234-12345678/img.png"
+        )
+        == "12345678-1234-1234-1234-12345678"
+    )
+    assert indexer._extract_file_id_from_name("file-ABC_photo.png") == "file-ABC"
+    assert indexer._extract_file_id_from_name("file-ABC-photo.png") == "file-ABC"
+    assert (
+        indexer._extract_file_hash_from_name(f"file_{'0' * 32}-{uuid}.png")
+        == f"file_{'0' * 32}"
+    )
+    assert indexer._is_uuid_filename(uuid)
+    assert indexer._is_uuid_filename(uuid.upper())
+    assert not indexer._is_uuid_filename("12345678-1234-1234-1234-123456789ABc")
+
+
+def test_legacy_media_indexer_groups_conversation_dir_files(tmp_path):
+    uuid = "12345678-1234-1234-1234-123456789abc"
+    conv_dir = tmp_path / "conversations" / uuid
+    conv_dir.mkdir(parents=True)
+    for name in ("a.png", "b.webp", "notes.txt"):
+        (conv_dir / name).write_bytes(b"x")
+
+    media = MediaIndexer().build_index(str(tmp_path))
+
+    assert sorted(media[uuid]) == [str(conv_dir / "a.png"), str(conv_dir / "b.webp")]
+
+
+def test_legacy_media_indexer_parallel_scan_matches_sequential(tmp_path):
+    uuid = "12345678-1234-1234-1234-123456789abc"
+    for idx, rel in enumerate(
+        [
+            f"conversations/{uuid}/a.png",
+            "file-ABC_x.png",
+            "uploads/file-DEF-y.pdf",
+            "dalle-generations/one.webp",
+            "dalle-generations/nested/two.webp",
+            "z/deep/other.jpg",
+        ]
+    ):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * (idx + 1))
+
+    sequential = MediaIndexer(max_workers=1)
+    parallel = MediaIndexer(max_workers=4)
+    assert sequential.build_index(str(tmp_path)) == parallel.build_index(str(tmp_path))
+    for attr in ("file_id_to_path", "size_to_paths", "filename_size_to_path"):
+        assert list(getattr(sequential, attr).items()) == list(
+            getattr(parallel, attr).items()
+        )
+    assert parallel.get_stats()["total_dalle_generation_files"] == 2
+
+
+def test_legacy_media_indexer_lists_each_directory_once(tmp_path, monkeypatch):
+    # DALL-E generation sizes are collected during the one walk; there is no
+    # second pass over the tree, whether or not dalle-generations/ exists.
+    from openai_export_parser import media_indexer
+
+    for rel in ["a/one.png", "a/b/two.jpg", "c/three.webp"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+    listed = []
+    real_split = media_indexer.split_dir_entries
+
+    def counting_split(path):
+        listed.append(path)
+        return real_split(path)
+
+    monkeypatch.setattr(media_indexer, "split_dir_entries", counting_split)
+    indexer = MediaIndexer(max_workers=1)
+    indexer.build_index(str(tmp_path))
+
+    assert sorted(listed) == sorted(
+        str(p) for p in [tmp_path, tmp_path / "a", tmp_path / "a" / "b", tmp_path / "c"]
+    )
+    assert indexer.size_to_paths == {}
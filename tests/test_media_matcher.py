@@ -0,0 +1,219 @@
+"""Tests for the comprehensive multi-strategy media matcher."""
+
+import pytest
+
+from openai_export_parser import media_matcher
+from openai_export_parser.comprehensive_media_indexer import (
+    ComprehensiveMediaIndexer,
+)
+from openai_export_parser.comprehensive_media_matcher import (
+    ComprehensiveMediaMatcher,
+)
+from openai_export_parser.media_matcher import MediaMatcher
+from openai_export_parser.media_reference_extractor import (
+    MediaReferenceExtractor,
+)
+
+CONV_ID = "12345678-1234-1234-1234-123456789abc"
+
+
+def _conversation(attachments):
+    return {
+        "conversation_id": CONV_ID,
+        "mapping": {
+            "node-1": {
+                "message": {
+                    "author": {"role": "user"},
+                    "content": {"content_type": "text", "parts": ["hi"]},
+                    "metadata": {"attachments": attachments},
+                }
+            }
+        },
+    }
+
+
+def _match(tmp_path, conversations):
+    indices = ComprehensiveMediaIndexer().build_index(str(tmp_path))
+    matcher = ComprehensiveMediaMatcher()
+    matcher.match(conversations, indices, MediaReferenceExtractor())
+    return matcher
+
+
+def test_matches_by_file_id_and_conversation_dir(tmp_path):
+    (tmp_path / "file-AAA_photo.png").write_bytes(b"x" * 10)
+    conv_dir = tmp_path / "conversations" / CONV_ID
+    conv_dir.mkdir(parents=True)
+    (conv_dir / "generated.webp").write_bytes(b"y" * 20)
+
+    conv = _conversation([{"id": "file-AAA", "name": "photo.png", "size": 10}])
+    matcher = _match(tmp_path, [conv])
+
+    assert sorted(conv["_media_files"]) == sorted(
+        [str(tmp_path / "file-AAA_photo.png"), str(conv_dir / "generated.webp")]
+    )
+    assert matcher.stats["by_file_id"] == 1
+    assert matcher.stats["by_conversation_dir"] == 1
+
+
+def test_filename_only_fallback_takes_first_unmatched_file(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "report.pdf").write_bytes(b"x" * 10)
+
+    # Size doesn't match, so only the filename-only strategy applies.
+    conv = _conversation([{"name": "report.pdf", "size": 999}])
+    matcher = _match(tmp_path, [conv])
+
+    first_indexed = ComprehensiveMediaIndexer().build_index(str(tmp_path))["all_files"][
+        0
+    ]
+    assert conv["_media_files"] == [first_indexed]
+    assert matcher.stats["by_filename_only"] == 1
+
+
+def test_filename_only_fallback_keeps_index_order_across_sizes(tmp_path):
+    for folder, size in (("a", 20), ("b", 10), ("c", 20)):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "report.pdf").write_bytes(b"x" * size)
+
+    conv = _conversation([{"name": "report.pdf", "size": 999}])
+    _match(tmp_path, [conv])
+
+    indices = ComprehensiveMediaIndexer().build_index(str(tmp_path))
+    assert conv["_media_files"] == [indices["all_files"][0]]
+
+
+def test_filename_only_fallback_skips_already_matched_names(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "report.pdf").write_bytes(b"x" * 10)
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "report.pdf").write_bytes(b"x" * 20)
+
+    # Filename + size picks b/report.pdf; the other copy must not be added.
+    conv = _conversation([{"name": "report.pdf", "size": 20}])
+    matcher = _match(tmp_path, [conv])
+
+    assert conv["_media_files"] == [str(tmp_path / "b" / "report.pdf")]
+    assert matcher.stats["by_filename_only"] == 0
+
+
+def test_dalle_generation_with_ambiguous_size_takes_first_candidate(tmp_path):
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "image.webp").write_bytes(b"x" * 10)
+
+    conv = {
+        "conversation_id": CONV_ID,
+        "mapping": {
+            "node-1": {
+                "message": {
+                    "content": {
+                        "parts": [
+                            {
+                                "asset_pointer": "file-service://file-XYZ",
+                                "size_bytes": 10,
+                                "metadata": {"dalle": {"gen_id": "gen-1"}},
+                            }
+                        ]
+                    }
+                }
+            }
+        },
+    }
+    matcher = _match(tmp_path, [conv])
+
+    indices = ComprehensiveMediaIndexer().build_index(str(tmp_path))
+    assert conv["_media_files"] == [indices["size_to_paths"][10][0]]
+    assert matcher.stats["by_size_only"] == 1
+
+
+@pytest.mark.parametrize("use_automaton", [True, False])
+def test_legacy_text_fallback_matches_names_and_ids(monkeypatch, use_automaton):
+    if use_automaton:
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(media_matcher, "ahocorasick", None)
+
+    media_files = [
+        "/m/file-AbC123_photo.png",
+        "/m/plain.jpg",
+        f"/m/{CONV_ID}.webp",
+        "/m/other.pdf",
+    ]
+    conversations = [
+        {
+            "messages": [
+                {"content": "see plain.jpg"},
+                {"content": "uploaded file-AbC123 and " + CONV_ID},
+                {"content": "nothing here"},
+            ]
+        }
+    ]
+
+    matcher = MediaMatcher()
+    matcher.match(conversations, media_files)
+
+    first, second, third = conversations[0]["messages"]
+    assert first["media"] == ["plain.jpg"]
+    assert second["media"] == ["file-AbC123_photo.png", f"{CONV_ID}.webp"]
+    assert "media" not in third
+    assert matcher.get_stats()["text_matches"] == 3
+
+
+def test_legacy_text_fallback_matches_file_id_prefixes_inside_names():
+    # A file-ID in the text matches any name containing it, even as the start
+    # of a longer ID or after another "file-" run.
+    media_files = ["/m/file-abcfile-Def9_x.png", "/m/file-Abc.png", "/m/file-Ab.png"]
+    conversations = [{"messages": [{"content": "ids: file-Def file-Ab"}]}]
+
+    MediaMatcher().match(conversations, media_files)
+
+    assert conversations[0]["messages"][0]["media"] == [
+        "file-abcfile-Def9_x.png",
+        "file-Abc.png",
+        "file-Ab.png",
+    ]
+
+
+def test_legacy_text_fallback_matches_names_in_message_metadata():
+    media_files = ["/m/diagram.png", "/m/unused.png"]
+    conversations = [
+        {
+            "messages": [
+                {
+                    "content": {"content_type": "text", "parts": []},
+                    "_files": [{"file_name": "diagram.png"}],
+                }
+            ]
+        }
+    ]
+
+    MediaMatcher().match(conversations, media_files)
+
+    assert conversations[0]["messages"][0]["media"] == ["diagram.png"]
+
+
+def test_parallel_matching_matches_in_process_matching(tmp_path, monkeypatch):
+    (tmp_path / "file-AAA_photo.png").write_bytes(b"x" * 10)
+    conv_dir = tmp_path / "conversations" / CONV_ID
+    conv_dir.mkdir(parents=True)
+    (conv_dir / "generated.webp").write_bytes(b"y" * 20)
+    indices = ComprehensiveMediaIndexer().build_index(str(tmp_path))
+
+    def conversations():
+        matching = _conversation([{"id": "file-AAA", "name": "photo.png", "size": 10}])
+        other = _conversation([{"id": "file-ZZZ", "name": "none.png", "size": 1}])
+        other["conversation_id"] = "other"
+        return [matching, other] * 3
+
+    sequential = ComprehensiveMediaMatcher(jobs=1)
+    expected = sequential.match(conversations(), indices, MediaReferenceExtractor())
+
+    monkeypatch.setattr(ComprehensiveMediaMatcher, "PARALLEL_THRESHOLD", 0)
+    parallel = ComprehensiveMediaMatcher(jobs=2)
+    result = parallel.match(conversations(), indices, MediaReferenceExtractor())
+
+    assert [sorted(c.get("_media_files", [])) for c in result] == [
+        sorted(c.get("_media_files", [])) for c in expected
+    ]
+    assert parallel.stats == sequential.stats
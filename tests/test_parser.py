@@ -0,0 +1,227 @@
+"""Tests for the OpenAI export parser."""
+
+import json
+import os
+import zipfile
+
+import pytest
+
+from openai_export_parser.parser import ExportParser
+
+
+def _write_conversation_files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"conversation_{i}.json"
+        path.write_text(json.dumps([{"id": f"conv-{i}-a"}, {"id": f"conv-{i}-b"}]))
+        paths.append(str(path))
+    return paths
+
+
+def test_parallel_loading_preserves_file_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(ExportParser, "PARALLEL_THRESHOLD", 2)
+    paths = _write_conversation_files(tmp_path, 5)
+
+    parallel = ExportParser(jobs=2)
+    parallel.conversation_files = paths
+    serial = ExportParser(jobs=1)
+    serial.conversation_files = paths
+
+    loaded = parallel.load_conversations()
+    assert [c["id"] for c in loaded][:4] == [
+        "conv-0-a",
+        "conv-0-b",
+        "conv-1-a",
+        "conv-1-b",
+    ]
+    assert loaded == serial.load_conversations()
+
+
+def test_load_conversations_skips_unreadable_files(tmp_path):
+    good = tmp_path / "conversation.json"
+    good.write_text(json.dumps({"id": "conv-1"}))
+    bad = tmp_path / "conversation_bad.json"
+    bad.write_text("{not json")
+    scalar = tmp_path / "conversation_scalar.json"
+    scalar.write_text("42")
+
+    parser = ExportParser(jobs=1)
+    parser.conversation_files = [str(bad), str(good), str(scalar)]
+
+    assert parser.load_conversations() == [{"id": "conv-1"}, {"raw": 42}]
+
+
+def test_scan_classifies_files_and_extracts_nested_zips(tmp_path):
+
+    (tmp_path / "conversations.json").write_text("[]")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "photo.PNG").write_bytes(b"x")
+    (tmp_path / "sub" / "notes.txt").write_text("skip me")
+    with zipfile.ZipFile(tmp_path / "sub" / "inner.zip", "w") as z:
+        z.writestr("conversation_2.json", "[]")
+        z.writestr("media/file-ABC.dat", b"y")
+    # Zip-based attachments aren't unpacked
+    with zipfile.ZipFile(tmp_path / "sub" / "report.docx", "w") as z:
+        z.writestr("word/document.xml", "<w/>")
+
+    parser = ExportParser()
+    parser.scan(str(tmp_path))
+
+    inner = tmp_path / "sub" / "inner.zip_unzipped"
+    assert not (tmp_path / "sub" / "report.docx_unzipped").exists()
+    assert sorted(parser.conversation_files) == sorted(
+        [str(tmp_path / "conversations.json"), str(inner / "conversation_2.json")]
+    )
+    assert sorted(parser.media_files) == sorted(
+        [str(tmp_path / "sub" / "photo.PNG"), str(inner / "media" / "file-ABC.dat")]
+    )
+
+
+def test_scan_extracts_nested_zips_concurrently_in_walk_order(tmp_path):
+    def scan(jobs):
+        root = tmp_path / f"jobs{jobs}"
+        for i in range(4):
+            part = root / f"part{i}"
+            part.mkdir(parents=True)
+            with zipfile.ZipFile(part / f"export-{i}.zip", "w") as z:
+                z.writestr("conversations.json", "[]")
+                z.writestr(f"image-{i}.png", b"x")
+
+        parser = ExportParser(jobs=jobs)
+        parser.scan(str(root))
+        found = parser.conversation_files + parser.media_files
+        return [os.path.relpath(path, root) for path in found]
+
+    concurrent = scan(4)
+    assert concurrent == scan(1)
+    assert len(concurrent) == 8
+
+
+def test_unzip_preloads_conversations_while_extracting_the_rest(tmp_path):
+    archive = tmp_path / "export.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("conversations.json", json.dumps([{"id": "conv-1"}]))
+        z.writestr("file-ABC-photo.png", b"x")
+        z.writestr("dalle-generations/gen.webp", b"y")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    parser = ExportParser(jobs=2)
+    preloaded = parser._unzip_and_preload(str(archive), str(out))
+
+    assert (out / "file-ABC-photo.png").read_bytes() == b"x"
+    assert (out / "dalle-generations" / "gen.webp").read_bytes() == b"y"
+    parser.scan(str(out))
+    # Preloaded files aren't read again
+    (out / "conversations.json").unlink()
+    assert parser.load_conversations(preloaded) == [{"id": "conv-1"}]
+
+
+def test_flat_output_keeps_the_last_file_of_each_basename(tmp_path):
+    for folder in ("a", "b", "c"):
+        (tmp_path / folder).mkdir()
+    (tmp_path / "a" / "photo.png").write_bytes(b"first")
+    (tmp_path / "b" / "photo.png").write_bytes(b"second")
+    (tmp_path / "c" / "other.png").write_bytes(b"other")
+
+    parser = ExportParser(organize_by_conversation=False, jobs=4)
+    parser.media_files = [
+        str(tmp_path / "a" / "photo.png"),
+        str(tmp_path / "c" / "other.png"),
+        str(tmp_path / "b" / "photo.png"),
+    ]
+    out = tmp_path / "out"
+    parser._write_flat_output([], {}, str(out))
+
+    assert (out / "media" / "photo.png").read_bytes() == b"second"
+    assert (out / "media" / "other.png").read_bytes() == b"other"
+
+
+def test_large_conversation_files_are_streamed(tmp_path, monkeypatch):
+    ijson = pytest.importorskip("ijson")
+    from openai_export_parser import parser as parser_module
+
+    paths = _write_conversation_files(tmp_path, 2)
+    expected = ExportParser(jobs=1)
+    expected.conversation_files = paths
+    expected_conversations = expected.load_conversations()
+
+    streamed_files = []
+    real_items = ijson.items
+
+    def items(f, prefix, **kwargs):
+        streamed_files.append(f.name)
+        return real_items(f, prefix, **kwargs)
+
+    monkeypatch.setattr(ijson, "items", items)
+    monkeypatch.setattr(parser_module, "JSON_STREAM_THRESHOLD", 0)
+    streamed = ExportParser(jobs=1)
+    streamed.conversation_files = paths
+
+    assert streamed.load_conversations() == expected_conversations
+    assert streamed_files == paths
+
+
+def test_large_non_array_conversation_file_warns(tmp_path, monkeypatch):
+    from openai_export_parser import parser as parser_module
+
+    path = tmp_path / "conversations.json"
+    path.write_text("42")
+    monkeypatch.setattr(parser_module, "JSON_STREAM_THRESHOLD", 0)
+
+    data, message = parser_module._load_conversation_file(str(path))
+
+    assert data == [{"raw": 42}]
+    assert message.startswith("Warning: Unexpected format")
+
+
+def test_unzip_preloads_split_conversation_files_in_parallel(tmp_path):
+    archive = tmp_path / "export.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        for i in range(3):
+            z.writestr(f"conversations-00{i}.json", json.dumps([{"id": f"conv-{i}"}]))
+        # Member names are sanitised the same way for every member
+        z.writestr("../outside/conversations-003.json", json.dumps([{"id": "c-3"}]))
+        z.writestr("file-ABC-photo.png", b"x")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    parser = ExportParser(jobs=2)
+    preloaded = parser._unzip_and_preload(str(archive), str(out))
+
+    assert not (tmp_path / "outside").exists()
+    assert (out / "conversations-003.json").exists()
+    assert (out / "file-ABC-photo.png").read_bytes() == b"x"
+    assert len(preloaded) == 4
+    parser.scan(str(out))
+    ids = sorted(c["id"] for c in parser.load_conversations(preloaded))
+    assert ids == ["c-3", "conv-0", "conv-1", "conv-2"]
+
+
+def test_preloaded_files_are_not_reloaded_with_a_relative_output_dir(
+    tmp_path, monkeypatch
+):
+    from openai_export_parser import parser as parser_module
+
+    archive = tmp_path / "export.zip"
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("conversations.json", json.dumps([{"id": "conv-1"}]))
+        z.writestr("file-ABC-photo.png", b"x")
+    monkeypatch.chdir(tmp_path)
+    tmp_dir = os.path.join("out", "_tmp")
+    os.makedirs(tmp_dir)
+
+    parser = ExportParser(jobs=2)
+    preloaded = parser._unzip_and_preload("export.zip", tmp_dir)
+    parser.scan(tmp_dir)
+
+    loads = []
+    real_load = parser_module._load_conversation_file
+
+    def load(path):
+        loads.append(path)
+        return real_load(path)
+
+    monkeypatch.setattr(parser_module, "_load_conversation_file", load)
+    assert parser.load_conversations(preloaded) == [{"id": "conv-1"}]
+    assert loads == []
@@ -69,3 +69,57 @@ def test_empty_conversation_yields_no_references():
         "dalle_generations": 0,
         "text_references": 0,
     }
+
+
+def test_text_references_are_grouped_by_pattern_in_text_order():
+    extractor = MediaReferenceExtractor()
+    uuid = "12345678-1234-1234-1234-123456789ABC"
+    text_references = list(
+        extractor._extract_from_text(f"see file-Abc9 then Photo.PNG and {uuid}")
+    )
+
+    matches = [ref["match"] for ref in text_references]
+    assert matches == ["Photo.PNG", "file-Abc9", uuid]
+    assert text_references[0]["context"].startswith("see file-Abc9")
+
+
+def test_filename_pattern_matches_whole_names_only():
+    extractor = MediaReferenceExtractor()
+    text = "a" * 100_000 + ". see my-photo.jpg"
+
+    matches = [ref["match"] for ref in extractor._extract_from_text(text)]
+    assert matches == ["my-photo.jpg"]
+
+
+def test_reference_records_read_like_dicts():
+    extractor = MediaReferenceExtractor()
+    refs = extractor.extract_all_references(_conversation_with_image_and_attachment())
+
+    pointer = refs["asset_pointers"][0]
+    assert dict(pointer) == {
+        "pointer": "file-service://file-FVJSQmYWxZwxkqvQbDudDl8H",
+        "size_bytes": None,
+        "width": 1080,
+        "height": 1440,
+        "metadata": {},
+        "type": "file-service",
+    }
+    assert pointer.get("file_hash") is None
+    attachment = refs["attachments"][0]
+    assert attachment["mime_type"] == "image/jpeg"
+    assert attachment.get("missing", "default") == "default"
+    assert "id" in attachment
+    assert "file_hash" not in pointer
+    assert list(attachment) == list(attachment.keys())
+    assert dict(pointer.items()) == dict(pointer)
+
+
+def test_iter_references_yields_what_extract_all_references_collects():
+    extractor = MediaReferenceExtractor()
+    conversation = _conversation_with_image_and_attachment()
+
+    refs = extractor.extract_all_references(conversation)
+    pairs = list(extractor.iter_references(conversation))
+
+    assert [kind for kind, _ in pairs] == ["asset_pointers", "attachments"]
+    assert [ref for _, ref in pairs] == (refs["asset_pointers"] + refs["attachments"])
@@ -5,7 +5,7 @@ import zipfile
 
 import pytest
 
-from openai_export_parser.utils import _stream_extract
+from openai_export_parser.utils import _stream_extract, extract_zip, unzip
 
 
 def _build_zip(path):
@@ -53,3 +53,53 @@ def test_stream_extract_creates_subdirectories(tmp_path):
     out = tmp_path / "out"
     _stream_extract(str(zpath), str(out))
     assert (out / "a" / "b" / "c" / "deep.txt").read_text() == "deep"
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_extract_zip_matches_zipfile(tmp_path, jobs):
+    zpath = tmp_path / "test.zip"
+    _build_zip(zpath)
+    out = tmp_path / "out"
+
+    extract_zip(str(zpath), str(out), jobs=jobs)
+
+    with zipfile.ZipFile(zpath) as z:
+        for name in z.namelist():
+            assert (out / name).read_bytes() == z.read(name)
+
+
+def test_extract_zip_guards_path_traversal(tmp_path):
+    zpath = tmp_path / "evil.zip"
+    with zipfile.ZipFile(zpath, "w") as z:
+        z.writestr("../escape.txt", "nope")
+
+    out = tmp_path / "out"
+    extract_zip(str(zpath), str(out), jobs=2)
+    assert (out / "escape.txt").read_text() == "nope"
+    assert not (tmp_path / "escape.txt").exists()
+
+
+def test_extract_zip_extracts_only_the_named_members(tmp_path):
+    zpath = tmp_path / "test.zip"
+    _build_zip(zpath)
+    out = tmp_path / "out"
+
+    paths = extract_zip(str(zpath), str(out), jobs=2, members=["sub/dir/data.bin"])
+
+    assert paths == [str(out / "sub" / "dir" / "data.bin")]
+    assert (out / "sub" / "dir" / "data.bin").exists()
+    assert not (out / "hello.txt").exists()
+    assert not (out / "img").exists()
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_unzip_extracts_every_member(tmp_path, jobs):
+    zpath = tmp_path / "test.zip"
+    _build_zip(zpath)
+    out = tmp_path / "out"
+
+    unzip(str(zpath), str(out), jobs=jobs)
+
+    with zipfile.ZipFile(zpath) as z:
+        for name in z.namelist():
+            assert (out / name).read_bytes() == z.read(name)
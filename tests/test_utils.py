@@ -1,9 +1,23 @@
 """Tests for openai_export_parser.utils."""
 
+import hashlib
+import json
+import os
+
+import pytest
+
+from openai_export_parser import utils
 from openai_export_parser.utils import (
+    copy_file,
+    hash_and_copy,
+    link_or_copy,
+    hash_file,
+    iter_json_array,
+    scan_files,
     sniff_extension,
     sanitize_filename,
     timestamp_to_iso,
+    write_json,
 )
 
 # --- sniff_extension: recover real type for ".dat" / extension-less assets ----
@@ -87,3 +101,183 @@ def test_timestamp_to_iso_formats_date():
 def test_timestamp_to_iso_handles_missing():
     assert timestamp_to_iso(None) == "0000-00-00"
     assert timestamp_to_iso(0) == "0000-00-00"
+
+
+# --- iter_json_array ----------------------------------------------------------
+
+
+def test_iter_json_array_yields_items(tmp_path):
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps([{"a": 1}, {"b": 2.5}]))
+    assert list(iter_json_array(str(path))) == [{"a": 1}, {"b": 2.5}]
+    # Forcing the streaming path gives the same result (ijson permitting).
+    assert list(iter_json_array(str(path), stream_threshold=0)) == [
+        {"a": 1},
+        {"b": 2.5},
+    ]
+
+
+def test_iter_json_array_wraps_non_array_values(tmp_path):
+    path = tmp_path / "single.json"
+    path.write_text(json.dumps({"title": "only one"}))
+    assert list(iter_json_array(str(path), stream_threshold=0)) == [
+        {"title": "only one"}
+    ]
+
+
+def test_scan_files_matches_os_walk_order(tmp_path):
+    for rel in ["b.txt", "a/1.png", "a/x/2.png", "a/x/3.dat", "c/4.jpg", "z.bin"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+    expected = [
+        os.path.join(root, name)
+        for root, _dirs, files in os.walk(str(tmp_path))
+        for name in files
+    ]
+    assert [entry.path for entry in scan_files(str(tmp_path))] == expected
+
+
+def test_write_json_round_trips_unicode(tmp_path):
+    path = tmp_path / "out.json"
+    obj = {"title": "Café ☕", "create_time": 1720927567.804181, "parts": []}
+    write_json(str(path), obj)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == obj
+    assert "Café ☕" in path.read_text(encoding="utf-8")
+
+
+def test_write_json_handles_values_orjson_rejects(tmp_path):
+    path = tmp_path / "out.json"
+    obj = {"big": 2**70, 1: "int key"}
+    write_json(str(path), obj)
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "big": 2**70,
+        "1": "int key",
+    }
+
+
+def test_write_json_compact_output_matches_orjson(tmp_path):
+    obj = {"big": 2**70, "parts": ["a", "b"]}
+    path = tmp_path / "out.json"
+    write_json(str(path), obj, indent=None)
+
+    assert (
+        path.read_text(encoding="utf-8")
+        == '{"big":1180591620717411303424,"parts":["a","b"]}'
+    )
+
+
+def test_hash_and_copy_names_copy_by_content_hash(tmp_path):
+    src = tmp_path / "photo.png"
+    src.write_bytes(os.urandom(3 * 1024 * 1024 + 7))
+    dst_dir = tmp_path / "media"
+    dst_dir.mkdir()
+
+    name = hash_and_copy(str(src), str(dst_dir), "renamed.png")
+
+    assert name == f"{hash_file(str(src))}_renamed.png"
+    assert os.listdir(dst_dir) == [name]
+    assert (dst_dir / name).read_bytes() == src.read_bytes()
+
+
+def test_hash_file_falls_back_to_sha256(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "blake3", None)
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"hello world")
+
+    assert hash_file(str(path)) == hashlib.sha256(b"hello world").hexdigest()[:12]
+
+
+def test_hash_file_maps_large_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "blake3", None)
+    monkeypatch.setattr(utils, "HASH_MMAP_THRESHOLD", 1024)
+    data = os.urandom(5000)
+    path = tmp_path / "large.bin"
+    path.write_bytes(data)
+
+    assert hash_file(str(path)) == hashlib.sha256(data).hexdigest()[:12]
+
+
+def test_copy_file_copies_data_and_timestamps(tmp_path):
+    src = tmp_path / "photo.png"
+    src.write_bytes(b"\x89PNG" + os.urandom(3000))
+    os.utime(src, (1_000_000_000, 1_000_000_000))
+    dst = tmp_path / "out" / "sub" / "photo.png"
+
+    copy_file(str(src), str(dst))
+
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.stat().st_mtime == src.stat().st_mtime
+
+
+def test_link_or_copy_never_writes_through_an_existing_dst(tmp_path):
+    other = tmp_path / "other.png"
+    other.write_bytes(b"other")
+    src = tmp_path / "photo.png"
+    src.write_bytes(b"photo")
+    dst = tmp_path / "media" / "photo.png"
+    dst.parent.mkdir()
+    os.link(other, dst)
+
+    assert link_or_copy(str(src), str(dst), link=False) is False
+    assert dst.read_bytes() == b"photo"
+    assert other.read_bytes() == b"other"
+
+    os.unlink(dst)
+    os.link(other, dst)
+    assert link_or_copy(str(src), str(dst)) is True
+    assert os.path.samefile(src, dst)
+    assert other.read_bytes() == b"other"
+    assert sorted(os.listdir(dst.parent)) == ["photo.png"]
+
+
+def test_link_or_copy_survives_a_concurrent_link_to_dst(tmp_path, monkeypatch):
+    winner_src = tmp_path / "winner.png"
+    winner_src.write_bytes(b"winner")
+    src = tmp_path / "photo.png"
+    src.write_bytes(b"photo")
+    dst = tmp_path / "media" / "photo.png"
+    real_link = os.link
+
+    def racing_link(a, b):
+        if b == str(dst) and not dst.exists():
+            # Another worker links its file to dst first
+            real_link(winner_src, dst)
+            raise FileExistsError(b)
+        real_link(a, b)
+
+    monkeypatch.setattr(os, "link", racing_link)
+    assert link_or_copy(str(src), str(dst)) is True
+    assert os.path.samefile(src, dst)
+    assert winner_src.read_bytes() == b"winner"
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "copy_file_range"), reason="needs os.copy_file_range"
+)
+def test_copy_file_finishes_when_copy_file_range_stops_early(tmp_path, monkeypatch):
+    import fcntl
+
+    # Some filesystems copy part of the file and then report 0 bytes.
+    real_copy_file_range = os.copy_file_range
+    calls = []
+
+    def short_copy_file_range(src_fd, dst_fd, count, *args):
+        calls.append(count)
+        if len(calls) > 1:
+            return 0
+        return real_copy_file_range(src_fd, dst_fd, min(count, 1000), *args)
+
+    monkeypatch.delattr(fcntl, "FICLONE", raising=False)
+    monkeypatch.setattr(os, "copy_file_range", short_copy_file_range)
+    src = tmp_path / "photo.png"
+    src.write_bytes(os.urandom(3000))
+    dst = tmp_path / "out" / "photo.png"
+
+    copy_file(str(src), str(dst))
+
+    assert len(calls) == 2
+    assert dst.read_bytes() == src.read_bytes()